@@ -0,0 +1,39 @@
+# C:\Project\kaist\2_week\blockpass-back\api\access.py
+# 시설 출입 확인: 고객 앱은 QR 토큰을 받아 보여 주고, 출입구 단말(사업자 계정)은 토큰과 시설 id 로 확인합니다.
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.access import ACCESS_QR_TTL_SECONDS, access_index, issue_qr_token, verify_qr_token
+from app.core.db import get_db
+from api.auth import get_current_user, CurrentUser
+from app.core.responses import FastJSONResponse
+from app.schemas.schemas import AccessQRToken, AccessCheckRequest, AccessCheckResult
+
+router = APIRouter(prefix="/access", tags=["Access"])
+
+
+@router.post("/qr-token", response_model=AccessQRToken)
+async def get_qr_token(current_user: CurrentUser = Depends(get_current_user)):
+    if current_user.role != "customer":
+        raise HTTPException(status_code=403, detail="고객만 출입 QR 을 받을 수 있습니다.")
+    token, expires_at = issue_qr_token(current_user.user_id)
+    return FastJSONResponse({"token": token, "expires_at": expires_at, "ttl_seconds": ACCESS_QR_TTL_SECONDS})
+
+
+@router.post("/check", response_model=AccessCheckResult)
+async def check_access(
+    payload: AccessCheckRequest,
+    current_user: CurrentUser = Depends(get_current_user),
+    # 세션은 색인에 없을 때만 커넥션을 가져갑니다.
+    db: AsyncSession = Depends(get_db),
+):
+    if current_user.role != "business":
+        raise HTTPException(status_code=403, detail="사업자 출입 단말만 확인할 수 있습니다.")
+    business_id = await access_index.facility_business_id(db, payload.facility_id)
+    if business_id is None or business_id != current_user.business_profile_id:
+        raise HTTPException(status_code=404, detail="시설을 찾을 수 없습니다.")
+
+    user_id, reason = verify_qr_token(payload.token)
+    if user_id is None:
+        return FastJSONResponse({"allowed": False, "reason": reason})
+    return FastJSONResponse(await access_index.check(db, payload.facility_id, user_id))
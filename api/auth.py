@@ -1,16 +1,20 @@
 # C:\Project\kaist\2_week\blockpass-back\api\auth.py
+import os
+from dataclasses import dataclass
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordRequestForm
 from app.core.db import get_db
+from app.core.cache import TTLCache
 from app.models.models import User, BusinessProfile, CustomerProfile, Facility
 from app.schemas.schemas import UserCreate, UserLogin, Token, EmailCheckRequest, ProfileUpdateRequest
 from app.core.security import (
-    get_password_hash, 
-    verify_password, 
+    get_password_hash_async,
+    verify_password_async,
     create_access_token, 
     SECRET_KEY, 
     ALGORITHM
@@ -21,8 +25,39 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 # [허점 1 해결] Swagger UI 자물쇠 버튼을 위한 설정. 전체 경로를 정확히 입력합니다.
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# 인증 사용자 캐시 설정 (토큰 subject 기준, 워커 프로세스별로 유지)
+# 무효화는 요청을 처리한 워커에만 적용됩니다. 다른 워커는 프로필 수정(이름, 지갑 주소, 새 프로필 id) 후에도
+# 최대 USER_CACHE_TTL_SECONDS 동안 이전 CurrentUser 를 씁니다. 더 짧아야 하면 TTL 을 줄이세요.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """요청 처리에 필요한 사용자 정보 스냅샷 (비밀번호 해시는 포함하지 않음)"""
+    user_id: int
+    id: str
+    name: str | None
+    role: str | None
+    wallet_address: str | None
+    created_at: datetime | None
+    business_profile_id: int | None = None
+    customer_profile_id: int | None = None
+
+    @property
+    def profile_id(self) -> int | None:
+        # 역할에 맞는 프로필 ID (사업자 -> business_profiles.id, 고객 -> customer_profiles.id)
+        if self.role == "business":
+            return self.business_profile_id
+        return self.customer_profile_id
+
+def invalidate_user_cache(user_id: str) -> None:
+    # 사용자 정보가 바뀌면 반드시 호출해야 합니다. (이 워커만 비웁니다)
+    user_cache.invalidate(user_id)
+
 # [보안 로직] 토큰을 검증하여 현재 로그인한 사용자를 식별하는 의존성
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="인증 정보가 유효하지 않거나 만료되었습니다.",
@@ -37,11 +72,34 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     except JWTError:
         raise credentials_exception
         
-    # DB에서 실시간 유저 존재 여부 확인
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if user is None:
+    # 캐시에 있으면 DB 조회 없이 바로 반환
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    # 캐시 미스일 때만 유저 + 프로필 ID를 한 번의 조인 쿼리로 조회
+    result = await db.execute(
+        select(
+            User.user_id,
+            User.id,
+            User.name,
+            User.role,
+            User.wallet_address,
+            User.created_at,
+            BusinessProfile.id.label("business_profile_id"),
+            CustomerProfile.id.label("customer_profile_id"),
+        )
+        .outerjoin(BusinessProfile, BusinessProfile.user_id == User.user_id)
+        .outerjoin(CustomerProfile, CustomerProfile.user_id == User.user_id)
+        .where(User.id == user_id)
+        .order_by(BusinessProfile.id, CustomerProfile.id)
+        .limit(1)
+    )
+    row = result.first()
+    if row is None:
         raise credentials_exception
+    user = CurrentUser(**row._mapping)
+    user_cache.set(user_id, user)
     return user
 
 # 이메일 중복 체크 엔드포인트 추가
@@ -69,10 +127,10 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
             detail="이미 등록된 이메일입니다."
         )
     
-    # User 생성
+    # User 생성 (bcrypt 해싱은 워커 풀에서 처리)
     new_user = User(
         id=user_data.email, 
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await get_password_hash_async(user_data.password),
         name=user_data.name,
         role=user_data.role
     )
@@ -116,8 +174,8 @@ async def login(
     result = await db.execute(select(User).where(User.id == form_data.username))
     user = result.scalar_one_or_none()
     
-    # 비밀번호 검증
-    if not user or not verify_password(form_data.password, user.password_hash):
+    # 비밀번호 검증 (bcrypt 검증은 워커 풀에서 처리)
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="이메일 또는 비밀번호가 올바르지 않습니다.",
@@ -140,7 +198,7 @@ async def login(
     }
 # 3. 내 정보 조회 (토큰 인증 필요)
 @router.get("/me")
-async def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: CurrentUser = Depends(get_current_user)):
     # get_current_user 덕분에 '이미 로그인된 상태'임이 보장됩니다.
     return {
         "email": current_user.id,
@@ -153,29 +211,32 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
 @router.patch("/profile")
 async def update_profile(
     payload: ProfileUpdateRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     try:
         # 사업자 프로필 업데이트
         if current_user.role == "business":
-            result = await db.execute(
-                select(BusinessProfile).where(BusinessProfile.user_id == current_user.user_id)
-            )
-            profile = result.scalar_one_or_none()
-            
-            if not profile:
+            profile_id = current_user.business_profile_id
+            if not profile_id:
                 raise HTTPException(status_code=404, detail="프로필을 찾을 수 없습니다.")
             
+            profile_values = {}
             if payload.business_name:
-                profile.business_name = payload.business_name
+                profile_values["business_name"] = payload.business_name
             if payload.registration_number:
-                profile.registration_number = payload.registration_number
+                profile_values["registration_number"] = payload.registration_number
+            if profile_values:
+                await db.execute(
+                    update(BusinessProfile)
+                    .where(BusinessProfile.id == profile_id)
+                    .values(**profile_values)
+                )
 
             # 사업장 위치 정보가 들어오면 시설 정보를 생성/갱신
             if payload.address and payload.lat is not None and payload.lng is not None:
                 facility_result = await db.execute(
-                    select(Facility).where(Facility.business_id == profile.id).order_by(Facility.id)
+                    select(Facility).where(Facility.business_id == profile_id).order_by(Facility.id)
                 )
                 facility = facility_result.scalars().first()
                 if facility:
@@ -186,7 +247,7 @@ async def update_profile(
                         facility.name = payload.business_name
                 else:
                     facility = Facility(
-                        business_id=profile.id,
+                        business_id=profile_id,
                         name=payload.business_name or "사업장",
                         category="etc",
                         address=payload.address,
@@ -197,9 +258,14 @@ async def update_profile(
         
         # 지갑 주소는 User 테이블에 저장
         if payload.wallet_address:
-            current_user.wallet_address = payload.wallet_address
+            await db.execute(
+                update(User)
+                .where(User.user_id == current_user.user_id)
+                .values(wallet_address=payload.wallet_address)
+            )
         
         await db.commit()
+        invalidate_user_cache(current_user.id)
         
         return {
             "status": "success",
@@ -1,38 +1,39 @@
 # C:\Project\kaist\2_week\blockpass-back\api\business.py
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, text
 
-from app.core.db import get_db
-from api.auth import get_current_user
-from app.models.models import BusinessProfile, Pass, Facility
-from app.schemas.schemas import PassCreateRequest
+from app.core.bankruptcy import bankruptcy_jobs, start_bankruptcy
+from app.core.db import get_db, get_read_db
+from app.core.outbox import stream_events
+from api.auth import get_current_user, CurrentUser
+from app.models.models import Pass, Facility
+from app.core.responses import FastJSONResponse
+from app.schemas.schemas import PassCreateRequest, BusinessPassItem, PassCreatedResponse, BusinessMember, BankruptcyProgress
 
 router = APIRouter(prefix="/business", tags=["Business"])
 
 
-@router.get("/passes")
+@router.get("/passes", response_model=list[BusinessPassItem])
 async def list_business_passes(
-    current_user=Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
     if current_user.role != "business":
         raise HTTPException(status_code=403, detail="사업자만 접근할 수 있습니다.")
 
-    profile_result = await db.execute(
-        select(BusinessProfile).where(BusinessProfile.user_id == current_user.user_id)
-    )
-    profile = profile_result.scalar_one_or_none()
-    if not profile:
+    profile_id = current_user.business_profile_id
+    if not profile_id:
         return []
 
     passes_result = await db.execute(
-        select(Pass).where(Pass.business_id == profile.id).order_by(Pass.created_at.desc())
+        select(Pass).where(Pass.business_id == profile_id).order_by(Pass.created_at.desc())
     )
     passes = passes_result.scalars().all()
 
-    return [
+    return FastJSONResponse([
         {
             "id": p.id,
             "title": p.title,
@@ -47,32 +48,29 @@ async def list_business_passes(
             "created_at": p.created_at,
         }
         for p in passes
-    ]
+    ])
 
 
-@router.post("/passes")
+@router.post("/passes", response_model=PassCreatedResponse)
 async def create_business_pass(
     payload: PassCreateRequest,
-    current_user=Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     if current_user.role != "business":
         raise HTTPException(status_code=403, detail="사업자만 접근할 수 있습니다.")
 
-    profile_result = await db.execute(
-        select(BusinessProfile).where(BusinessProfile.user_id == current_user.user_id)
-    )
-    profile = profile_result.scalar_one_or_none()
-    if not profile:
+    profile_id = current_user.business_profile_id
+    if not profile_id:
         raise HTTPException(status_code=404, detail="사업자 프로필이 없습니다.")
 
     facility_result = await db.execute(
-        select(Facility).where(Facility.business_id == profile.id).order_by(Facility.id)
+        select(Facility).where(Facility.business_id == profile_id).order_by(Facility.id)
     )
     facility = facility_result.scalars().first()
 
     new_pass = Pass(
-        business_id=profile.id,
+        business_id=profile_id,
         facility_id=facility.id if facility else None,
         title=payload.title,
         terms=payload.terms,
@@ -90,7 +88,7 @@ async def create_business_pass(
     await db.commit()
     await db.refresh(new_pass)
 
-    return {
+    return FastJSONResponse({
         "id": new_pass.id,
         "title": new_pass.title,
         "terms": new_pass.terms,
@@ -98,22 +96,19 @@ async def create_business_pass(
         "duration_days": new_pass.duration_days,
         "duration_minutes": new_pass.duration_minutes,
         "status": new_pass.status,
-    }
+    })
 
 
-@router.get("/members")
+@router.get("/members", response_model=list[BusinessMember])
 async def list_business_members(
-    current_user=Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
     if current_user.role != "business":
         raise HTTPException(status_code=403, detail="사업자만 접근할 수 있습니다.")
 
-    profile_result = await db.execute(
-        select(BusinessProfile).where(BusinessProfile.user_id == current_user.user_id)
-    )
-    profile = profile_result.scalar_one_or_none()
-    if not profile:
+    profile_id = current_user.business_profile_id
+    if not profile_id:
         return []
 
     rows = await db.execute(
@@ -124,11 +119,11 @@ async def list_business_members(
             JOIN passes p ON s.pass_id = p.id
             JOIN users u ON s.user_id = u.user_id
             WHERE p.business_id = :b_id
-              AND s.status != 'cancelled'
+              AND s.status = 'active'
             ORDER BY u.user_id, p.title
             """
         ),
-        {"b_id": profile.id},
+        {"b_id": profile_id},
     )
 
     members = {}
@@ -143,4 +138,63 @@ async def list_business_members(
             }
         members[user_id]["passes"].append(row.title)
 
-    return list(members.values())
+    return FastJSONResponse(list(members.values()))
+
+
+async def _owned_pass_id(pass_id: int, current_user: CurrentUser, db: AsyncSession) -> int:
+    if current_user.role != "business":
+        raise HTTPException(status_code=403, detail="사업자만 접근할 수 있습니다.")
+    owner = (await db.execute(select(Pass.business_id).where(Pass.id == pass_id))).scalar_one_or_none()
+    if owner is None or owner != current_user.business_profile_id:
+        raise HTTPException(status_code=404, detail="이용권을 찾을 수 없습니다.")
+    return pass_id
+
+
+@router.post("/passes/{pass_id}/bankruptcy", response_model=BankruptcyProgress, status_code=202)
+async def start_pass_bankruptcy(
+    pass_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    # 쓰기 작업이므로 replica 지연으로 방금 만든 이용권을 못 찾지 않도록 primary 에서 확인합니다.
+    db: AsyncSession = Depends(get_db),
+):
+    """파산한 이용권의 결제 주문 전체를 백그라운드에서 구간별로 환불 처리합니다."""
+    await _owned_pass_id(pass_id, current_user, db)
+    return FastJSONResponse(start_bankruptcy(pass_id), status_code=202)
+
+
+@router.get("/passes/{pass_id}/bankruptcy", response_model=BankruptcyProgress)
+async def get_pass_bankruptcy(
+    pass_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    await _owned_pass_id(pass_id, current_user, db)
+    progress = bankruptcy_jobs.get(pass_id)
+    if progress is None:
+        # 진행 상황은 작업을 시작한 워커에만 있습니다.
+        raise HTTPException(status_code=404, detail="이 서버에서 실행한 일괄 환불이 없습니다.")
+    return FastJSONResponse(progress)
+
+
+@router.get("/events")
+async def business_event_stream(
+    last_event_id: int | None = Header(None, alias="Last-Event-ID"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """내 이용권의 구매/환불/취소를 Server-Sent Events 로 실시간 전달합니다.
+
+    끊겼다가 다시 연결하면 Last-Event-ID 이후 이벤트부터 이어서 받습니다.
+    """
+    if current_user.role != "business":
+        raise HTTPException(status_code=403, detail="사업자만 접근할 수 있습니다.")
+    profile_id = current_user.business_profile_id
+    if not profile_id:
+        raise HTTPException(status_code=404, detail="사업자 프로필이 없습니다.")
+    # 스트림이 열려 있는 동안 인증 조회에 쓴 DB 커넥션을 붙잡지 않도록 먼저 돌려줍니다.
+    await db.close()
+    return StreamingResponse(
+        stream_events(profile_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
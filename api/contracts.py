@@ -4,13 +4,9 @@ from decimal import Decimal, InvalidOperation
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
-router = APIRouter(prefix="/contracts", tags=["contracts"])
+from app.core.refunds import UNIT_SECONDS
 
-UNIT_SECONDS = {
-    "일": 24 * 60 * 60,
-    "시간": 60 * 60,
-    "분": 60,
-}
+router = APIRouter(prefix="/contracts", tags=["contracts"])
 
 
 class RefundRule(BaseModel):
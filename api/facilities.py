@@ -1,12 +1,43 @@
 # C:\Project\kaist\2_week\blockpass-back\api\facilities.py
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import os
+from decimal import Decimal, InvalidOperation
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, text
-from app.core.db import get_db
+from sqlalchemy import select, text, or_, and_
+from app.core.db import get_db, get_read_db, ReadSessionLocal
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from app.core.geo import bounding_box, covering_geohashes, facility_grid, haversine_km
+from app.core.responses import FastJSONResponse
+from app.core.catalog import catalog_cache, catalog_response
 from app.models.models import Facility, Pass, User, BusinessProfile
+from app.core.search import facility_search_index
+from app.schemas.schemas import FacilityListItem, PassItem, NearbyFacilityItem, FacilitySearchItem
 
 router = APIRouter(prefix="/facilities", tags=["Facility"])
 
+# 주변 검색 방식: geohash(DB 인덱스) | memory(프로세스 내 격자 인덱스)
+NEARBY_SEARCH_BACKEND = os.getenv("NEARBY_SEARCH_BACKEND", "geohash")
+NEARBY_MAX_RADIUS_KM = float(os.getenv("NEARBY_MAX_RADIUS_KM", "50"))
+
+NEARBY_COLUMNS = (
+    Facility.id,
+    Facility.business_id,
+    Facility.name,
+    Facility.category,
+    Facility.address,
+    Facility.lat,
+    Facility.lng,
+)
+
+async def _load_facility_points() -> list[dict]:
+    async with ReadSessionLocal() as session:
+        result = await session.execute(
+            select(*NEARBY_COLUMNS).where(Facility.lat.is_not(None), Facility.lng.is_not(None))
+        )
+        return [row._asdict() for row in result]
+
 # 1. 테스트용 데이터 생성 (허점 1 해결)
 @router.post("/seed")
 async def seed_facilities(db: AsyncSession = Depends(get_db)):
@@ -42,75 +73,271 @@ async def seed_facilities(db: AsyncSession = Depends(get_db)):
     await db.commit()
     return {"status": "success", "message": "테스트 데이터 생성 완료"}
 
-# 2. 시설 및 최저가 목록 조회 (허점 2 해결)
-# [api/facilities.py] get_facilities 함수 전체를 아래 내용으로 교체하세요.
-@router.get("/list")
-async def get_facilities(db: AsyncSession = Depends(get_db)):
-    # ONLY_FULL_GROUP_BY 호환: 시설별 최저가 이용권 1건을 서브쿼리로 선택
-    query = text("""
-        SELECT
-            f.id,
-            f.business_id,
-            f.name,
-            f.category,
-            f.address,
-            f.lat,
-            f.lng,
-            f.created_at,
-            p.price as min_price,
-            p.id as min_pass_id
-        FROM facilities f
-        LEFT JOIN passes p
-          ON p.id = (
-            SELECT p2.id
-            FROM passes p2
-            WHERE p2.facility_id = f.id
-            ORDER BY p2.price ASC, p2.id ASC
-            LIMIT 1
-          )
-    """)
-    result = await db.execute(query)
-    
-    # [수정] App.jsx의 요구사항인 "ETH" 표시를 위해 데이터를 가공하여 반환
-    return [
-        {
-            **dict(row._mapping),
-            "price_display": f"{row.min_price:.4f} ETH" if row.min_price else "가격 준비중"
-        } 
-        for row in result
-    ]
-
-
-@router.get("/{facility_id}/passes")
-async def get_passes_by_facility(
-    facility_id: int,
-    db: AsyncSession = Depends(get_db)
+# 2. 시설 및 최저가 목록 조회 (커서 페이지네이션 + 서버 측 필터)
+FACILITY_LIST_FIELDS = (
+    "id", "business_id", "name", "category", "address", "lat", "lng", "created_at",
+    "min_price", "min_pass_id", "price_display",
+)
+FACILITY_LIST_MAX_LIMIT = int(os.getenv("FACILITY_LIST_MAX_LIMIT", "200"))
+
+@router.get("/list", response_model=list[FacilityListItem])
+async def get_facilities(
+    request: Request,
+    cursor: str | None = Query(None, description=f"이전 응답의 {NEXT_CURSOR_HEADER} 헤더 값"),
+    limit: int = Query(50, ge=1),
+    sort: Literal["id", "price"] = Query("id", description="id: 등록순, price: 최저가순 (활성 이용권 있는 시설만)"),
+    category: str | None = None,
+    business_id: int | None = None,
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    fields: str | None = Query(None, description="쉼표로 구분한 반환 필드 (예: id,name,lat,lng)"),
+):
+    limit = min(limit, FACILITY_LIST_MAX_LIMIT)
+    selected = FACILITY_LIST_FIELDS
+    if fields:
+        selected = tuple(f.strip() for f in fields.split(",") if f.strip())
+        unknown = set(selected) - set(FACILITY_LIST_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"알 수 없는 필드: {', '.join(sorted(unknown))}")
+        if "id" not in selected:
+            selected = ("id",) + selected
+
+    # 최저가는 facilities.min_price / min_pass_id 에 미리 계산되어 있습니다.
+    price_col = Facility.min_price
+    query = select(
+        Facility.id, Facility.business_id, Facility.name, Facility.category,
+        Facility.address, Facility.lat, Facility.lng, Facility.created_at,
+        Facility.min_price, Facility.min_pass_id,
+    )
+
+    if category:
+        query = query.where(Facility.category == category)
+    if business_id is not None:
+        query = query.where(Facility.business_id == business_id)
+    if min_price is not None:
+        query = query.where(price_col >= min_price)
+    if max_price is not None:
+        query = query.where(price_col <= max_price)
+
+    after = decode_cursor(cursor) if cursor else None
+    if after and after.get("s") != sort:
+        raise HTTPException(status_code=400, detail="정렬 기준이 커서와 다릅니다.")
+    if after and (not isinstance(after.get("id"), int) or (sort == "price" and "p" not in after)):
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+    if sort == "price":
+        query = query.where(price_col.is_not(None))
+        if after:
+            # 커서는 클라이언트가 보낸 값이므로 숫자가 아니거나 NaN/Infinity 면 거절합니다.
+            try:
+                after_price = Decimal(after["p"])
+            except (InvalidOperation, TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+            if not after_price.is_finite():
+                raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+            query = query.where(or_(
+                price_col > after_price,
+                and_(price_col == after_price, Facility.id > after["id"]),
+            ))
+        query = query.order_by(price_col.asc(), Facility.id.asc())
+    else:
+        if after:
+            query = query.where(Facility.id > after["id"])
+        query = query.order_by(Facility.id.asc())
+
+    async def load_page():
+        async with ReadSessionLocal() as session:
+            result = await session.execute(query.limit(limit + 1))
+            rows = result.all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        items = []
+        for row in rows:
+            data = row._asdict()
+            # [수정] App.jsx의 요구사항인 "ETH" 표시를 위해 데이터를 가공하여 반환
+            data["price_display"] = f"{row.min_price:.4f} ETH" if row.min_price else "가격 준비중"
+            items.append({key: data.get(key) for key in selected})
+
+        headers = {}
+        if has_more:
+            last = rows[-1]
+            next_cursor = {"s": sort, "id": last.id}
+            if sort == "price":
+                next_cursor["p"] = str(last.min_price)
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(next_cursor)
+        return items, headers
+
+    # 카탈로그 캐시: 대부분의 조회는 DB까지 가지 않고, 같은 내용이면 304로 응답합니다.
+    cache_key = "list:" + json.dumps(
+        [sort, limit, category, business_id, min_price, max_price, selected, cursor]
+    )
+    entry = await catalog_cache.get(cache_key, load_page)
+    return catalog_response(request, entry)
+
+
+# 3. 주변 시설 검색 (거리순)
+@router.get("/nearby", response_model=list[NearbyFacilityItem])
+async def get_nearby_facilities(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(3.0, gt=0, description="검색 반경 (km)"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
 ):
+    if radius > NEARBY_MAX_RADIUS_KM:
+        raise HTTPException(status_code=400, detail=f"검색 반경은 최대 {NEARBY_MAX_RADIUS_KM:g}km 입니다.")
+
+    if NEARBY_SEARCH_BACKEND == "memory":
+        await facility_grid.ensure_loaded(_load_facility_points)
+        return FastJSONResponse(facility_grid.nearby(lat, lng, radius, limit))
+
+    # geohash 접두어(인덱스 범위 검색)로 후보를 좁힌 뒤 정확한 거리로 거릅니다.
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+    prefixes = covering_geohashes(lat, lng, radius)
     result = await db.execute(
-        select(Pass).where(Pass.facility_id == facility_id).order_by(Pass.created_at.desc())
+        select(*NEARBY_COLUMNS).where(
+            or_(*[Facility.geohash.like(f"{prefix}%") for prefix in prefixes]),
+            Facility.lat.between(min_lat, max_lat),
+        )
     )
-    passes = result.scalars().all()
     items = []
-    for p in passes:
-        rules = p.refund_rules
-        if isinstance(rules, str):
-            try:
-                import json
-                rules = json.loads(rules)
-            except Exception:
-                rules = []
-        items.append(
-            {
-                "id": p.id,
-                "title": p.title,
-                "price": p.price,
-                "duration_days": p.duration_days,
-                "duration_minutes": p.duration_minutes,
-                "terms": p.terms,
-                "contract_address": p.contract_address,
-                "contract_chain": p.contract_chain,
-                "refund_rules": rules,
-                "status": p.status,
-            }
+    for row in result:
+        distance = haversine_km(lat, lng, float(row.lat), float(row.lng))
+        if distance <= radius:
+            items.append({**row._asdict(), "distance_km": round(distance, 3)})
+    items.sort(key=lambda item: (item["distance_km"], item["id"]))
+    return FastJSONResponse(items[:limit])
+
+
+# 4. 시설 검색 (시설명/주소/이용권 제목·약관, 관련도순)
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", "50"))
+SEARCH_COLUMNS = (
+    Facility.id,
+    Facility.business_id,
+    Facility.name,
+    Facility.category,
+    Facility.address,
+    Facility.lat,
+    Facility.lng,
+    Facility.min_price,
+)
+
+async def _load_search_documents(facility_ids: list[int] | None):
+    facility_query = select(*SEARCH_COLUMNS)
+    pass_query = select(Pass.facility_id, Pass.title, Pass.terms).where(
+        Pass.status == "active", Pass.facility_id.is_not(None)
+    )
+    if facility_ids is not None:
+        facility_query = facility_query.where(Facility.id.in_(facility_ids))
+        pass_query = pass_query.where(Pass.facility_id.in_(facility_ids))
+    async with ReadSessionLocal() as session:
+        docs = [row._asdict() for row in await session.execute(facility_query)]
+        pass_texts: dict[int, list] = {}
+        for row in await session.execute(pass_query):
+            pass_texts.setdefault(row.facility_id, []).append((row.title, row.terms))
+    return docs, pass_texts
+
+async def warm_search_index() -> None:
+    try:
+        await facility_search_index.ensure_loaded(_load_search_documents)
+        print(f"[startup] 검색 색인 준비 완료 (시설 {len(facility_search_index)}개)")
+    except Exception as exc:
+        print(f"[startup] 검색 색인 준비 실패: {exc}")
+
+@router.get("/search", response_model=list[FacilitySearchItem])
+async def search_facilities(
+    q: str = Query(..., min_length=1, max_length=100),
+    cursor: str | None = Query(None, description=f"이전 응답의 {NEXT_CURSOR_HEADER} 헤더 값"),
+    limit: int = Query(10, ge=1),
+):
+    limit = min(limit, SEARCH_MAX_LIMIT)
+    offset = 0
+    if cursor:
+        after = decode_cursor(cursor)
+        if after.get("q") != q or not isinstance(after.get("o"), int) or after["o"] < 0:
+            raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+        offset = after["o"]
+
+    await facility_search_index.ensure_loaded(_load_search_documents)
+    items, has_more = facility_search_index.search(q, offset, limit)
+    headers = {}
+    if has_more:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor({"q": q, "o": offset + limit})
+    return FastJSONResponse(items, headers=headers)
+
+
+# 5. 이용권 목록 (시설 여러 개를 한 번에 / 시설 하나)
+FACILITY_PASSES_MAX_IDS = int(os.getenv("FACILITY_PASSES_MAX_IDS", "100"))
+PASS_ITEM_COLUMNS = (
+    Pass.facility_id,
+    Pass.id,
+    Pass.title,
+    Pass.price,
+    Pass.duration_days,
+    Pass.duration_minutes,
+    Pass.terms,
+    Pass.contract_address,
+    Pass.contract_chain,
+    Pass.refund_rules,
+    Pass.status,
+)
+
+def _pass_item(row) -> dict:
+    item = row._asdict()
+    del item["facility_id"]
+    # 예전 데이터는 refund_rules가 JSON 문자열로 저장되어 있을 수 있습니다.
+    if isinstance(item["refund_rules"], str):
+        try:
+            item["refund_rules"] = json.loads(item["refund_rules"])
+        except Exception:
+            item["refund_rules"] = []
+    return item
+
+@router.get("/passes", response_model=dict[int, list[PassItem]])
+async def get_passes_by_facilities(
+    request: Request,
+    ids: str = Query(..., description=f"쉼표로 구분한 시설 id (최대 {FACILITY_PASSES_MAX_IDS}개)"),
+):
+    try:
+        facility_ids = sorted({int(value) for value in ids.split(",") if value.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="시설 id는 숫자여야 합니다.")
+    if not facility_ids:
+        raise HTTPException(status_code=400, detail="시설 id를 하나 이상 입력해주세요.")
+    if len(facility_ids) > FACILITY_PASSES_MAX_IDS:
+        raise HTTPException(
+            status_code=400, detail=f"시설은 한 번에 최대 {FACILITY_PASSES_MAX_IDS}개까지 조회할 수 있습니다."
         )
-    return items
+
+    async def load_passes():
+        # 지도에 보이는 시설들의 이용권을 IN 쿼리 한 번으로 가져와 시설별로 묶습니다.
+        # JSON 객체 키는 문자열이어야 하므로 id를 문자열로 둡니다.
+        grouped = {str(facility_id): [] for facility_id in facility_ids}
+        async with ReadSessionLocal() as session:
+            result = await session.execute(
+                select(*PASS_ITEM_COLUMNS)
+                .where(Pass.facility_id.in_(facility_ids))
+                .order_by(Pass.facility_id, Pass.created_at.desc(), Pass.id.desc())
+            )
+            for row in result:
+                grouped[str(row.facility_id)].append(_pass_item(row))
+        return grouped, {}
+
+    # 단일 시설 라우트(passes:{id})와 응답 모양/ETag 가 섞이지 않도록 접두사를 따로 씁니다.
+    key = "passes-batch:" + ",".join(map(str, facility_ids))
+    entry = await catalog_cache.get(key, load_passes)
+    return catalog_response(request, entry)
+
+@router.get("/{facility_id}/passes", response_model=list[PassItem])
+async def get_passes_by_facility(facility_id: int, request: Request):
+    async def load_passes():
+        async with ReadSessionLocal() as session:
+            result = await session.execute(
+                select(*PASS_ITEM_COLUMNS)
+                .where(Pass.facility_id == facility_id)
+                .order_by(Pass.created_at.desc(), Pass.id.desc())
+            )
+            return [_pass_item(row) for row in result], {}
+
+    entry = await catalog_cache.get(f"passes:{facility_id}", load_passes)
+    return catalog_response(request, entry)
@@ -4,7 +4,7 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # 새로운 위치에서 engine과 get_db를 가져옵니다
-from app.core.db import get_db
+from app.core.db import get_db, pool_stats, engine, read_engine
 
 router = APIRouter()
 
@@ -20,4 +20,48 @@ async def db_health(db: AsyncSession = Depends(get_db)) -> dict:
         value = result.scalar()
         return {"db_ok": value == 1}
     except Exception as e:
-        return {"db_ok": False, "error": str(e)}
\ No newline at end of file
+        return {"db_ok": False, "error": str(e)}
+@router.get("/db/pool")
+async def db_pool() -> dict:
+    stats = pool_stats()
+    if read_engine is not engine:
+        stats["replica"] = pool_stats(read_engine)
+    return stats
+
+@router.get("/jobs/sweeper")
+async def sweeper_status() -> dict:
+    from app.core.sweeper import sweeper_stats
+    return sweeper_stats
+
+@router.get("/jobs/tx-verifier")
+async def tx_verifier_status() -> dict:
+    from app.core.chain import rpc_stats
+    from app.core.tx_verifier import tx_verifier_stats
+    return {**tx_verifier_stats, "rpc": rpc_stats}
+
+@router.get("/jobs/indexer")
+async def indexer_status() -> dict:
+    from app.core.chain_indexer import indexer_stats
+    return indexer_stats
+
+@router.get("/events/stats")
+async def outbox_status() -> dict:
+    from app.core.outbox import outbox_tailer
+    return outbox_tailer.stats()
+
+@router.get("/access/stats")
+async def access_index_status() -> dict:
+    from app.core.access import access_index
+    return access_index.stats()
+
+@router.get("/cache/stats")
+async def cache_stats() -> dict:
+    # 순환 임포트를 피하기 위해 함수 안에서 가져옵니다.
+    from api.auth import user_cache
+    from app.core.catalog import catalog_cache
+    from app.core.search import facility_search_index
+    return {
+        "user_cache": user_cache.stats(),
+        "catalog_cache": catalog_cache.stats(),
+        "search_results": facility_search_index.results.stats(),
+    }
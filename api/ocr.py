@@ -5,11 +5,12 @@ import httpx
 from dotenv import load_dotenv
 from fastapi import APIRouter, File, Form, Header, HTTPException, UploadFile, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text, select
+from sqlalchemy import text
 
-from app.core.db import get_db
-from api.auth import get_current_user
-from app.models.models import User, BusinessProfile, CustomerProfile
+from app.core.db import get_db, get_read_db
+from app.core.responses import FastJSONResponse
+from app.schemas.schemas import OCRListItem
+from api.auth import get_current_user, CurrentUser
 from fastapi.responses import Response
 from fastapi import BackgroundTasks # 추가
 
@@ -62,17 +63,14 @@ async def send_to_ai_server(document_id: int, image_bytes: bytes, role: str, pro
 async def ocr_request(
     background_tasks: BackgroundTasks,
     image: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ) -> dict:
-    # 1. 로그인 유저의 프로필 ID 조회 (허점 1 해결: .id로 수정)
+    # 1. 로그인 유저의 프로필 ID (get_current_user에서 이미 조회됨)
+    profile_id = current_user.profile_id
     if current_user.role == "business":
-        result = await db.execute(select(BusinessProfile.id).where(BusinessProfile.user_id == current_user.user_id))
-        profile_id = result.scalar_one_or_none()
         customer_profile_id, business_profile_id = None, profile_id
     else:
-        result = await db.execute(select(CustomerProfile.id).where(CustomerProfile.user_id == current_user.user_id))
-        profile_id = result.scalar_one_or_none()
         customer_profile_id, business_profile_id = profile_id, None
 
     if not profile_id:
@@ -141,33 +139,31 @@ async def ocr_request(
     return {"document_id": document_id, "status": "sent"}
 
 # 목록 조회 API (허점 2 해결: SQL 내 컬럼명을 id로 수정)
-@router.get("/list")
+@router.get("/list", response_model=list[OCRListItem])
 async def get_ocr_list(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     profile_col = "business_profile_id" if current_user.role == "business" else "customer_profile_id"
+    if not current_user.profile_id:
+        return FastJSONResponse([])
     
-    # 모델에 맞게 SELECT 하위 쿼리 컬럼명을 id로 수정
+    # 프로필 ID는 get_current_user에서 이미 조회되므로 하위 쿼리가 필요 없습니다.
     query = text(f"""
         SELECT id, status, created_at, ocr_result 
         FROM ocr_documents 
-        WHERE {profile_col} = (
-            SELECT id 
-            FROM {"business_profiles" if current_user.role == "business" else "customer_profiles"}
-            WHERE user_id = :u_id
-        )
+        WHERE {profile_col} = :p_id
         ORDER BY created_at DESC
     """)
     
-    result = await db.execute(query, {"u_id": current_user.user_id})
-    return [dict(row._mapping) for row in result]
+    result = await db.execute(query, {"p_id": current_user.profile_id})
+    return FastJSONResponse([row._asdict() for row in result])
 
 @router.get("/image/{doc_id}")
 async def get_ocr_image(
     doc_id: int,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     query = text("SELECT image_png FROM ocr_documents WHERE id = :id")
     result = await db.execute(query, {"id": doc_id})
@@ -182,17 +178,20 @@ async def get_ocr_image(
 @router.get("/result/{doc_id}")
 async def get_ocr_result_detail(
     doc_id: int,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     # [팩트체크] 내 것만 볼 수 있도록 보안 필터링 적용
     query = text("""
         SELECT ocr_result, status, created_at 
         FROM ocr_documents 
-        WHERE id = :id AND (customer_profile_id = (SELECT id FROM customer_profiles WHERE user_id = :u_id)
-        OR business_profile_id = (SELECT id FROM business_profiles WHERE user_id = :u_id))
+        WHERE id = :id AND (customer_profile_id = :c_id OR business_profile_id = :b_id)
     """)
-    result = await db.execute(query, {"id": doc_id, "u_id": current_user.user_id})
+    result = await db.execute(query, {
+        "id": doc_id,
+        "c_id": current_user.customer_profile_id,
+        "b_id": current_user.business_profile_id,
+    })
     row = result.fetchone()
 
     if not row:
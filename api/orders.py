@@ -1,11 +1,21 @@
 # C:\Project\kaist\2_week\blockpass-back\api\orders.py
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import os
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, text
-from app.core.db import get_db
-from api.auth import get_current_user
-from app.models.models import User, Pass, Order, Subscription, Refund
-from app.schemas.schemas import OrderPurchaseRequest
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from app.core.bankruptcy import BANKRUPT_STATUS
+from app.core.db import get_db, get_read_db
+from app.core.idempotency import request_fingerprint, run_idempotent
+from app.core.outbox import add_event
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.refunds import NO_REFUND, get_compiled_rules, quote_refund
+from app.core.tx_verifier import notify_pending_tx
+from api.auth import get_current_user, CurrentUser
+from app.models.models import Pass, Order, Subscription, Refund
+from app.core.responses import FastJSONResponse
+from app.schemas.schemas import OrderPurchaseRequest, MyOrderItem, RefundQuote
 from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/orders", tags=["Order"])
@@ -14,9 +24,52 @@ router = APIRouter(prefix="/orders", tags=["Order"])
 async def purchase_pass(
     pass_id: int,
     payload: OrderPurchaseRequest | None = None,
-    current_user: User = Depends(get_current_user),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
+    if idempotency_key is None:
+        return await _purchase(pass_id, payload, current_user, db)
+    # 모바일 재시도: 같은 키는 한 번만 처리하고, 이후에는 저장된 응답을 돌려줍니다.
+    fingerprint = request_fingerprint("purchase", pass_id, payload.model_dump() if payload else None)
+    return await run_idempotent(
+        current_user.user_id, idempotency_key, fingerprint,
+        lambda: _purchase(pass_id, payload, current_user, db),
+    )
+
+
+def _purchase_response(order_id: int, contract_address: str, title: str) -> dict:
+    return {
+        "status": "success",
+        "order_id": order_id,
+        "contract_address": contract_address,
+        "message": f"'{title}' 구매 및 블록체인 등록 완료!"
+    }
+
+
+async def _recorded_tx_order(
+    db: AsyncSession, chain: str | None, tx_hash: str | None, user_id: int, pass_id: int
+) -> int | None:
+    """이미 기록된 거래면 같은 사용자/이용권의 주문 id, 다른 주문의 거래면 409"""
+    if not tx_hash:
+        return None
+    result = await db.execute(
+        select(Order.id, Order.user_id, Order.pass_id).where(Order.chain == chain, Order.tx_hash == tx_hash)
+    )
+    recorded = result.first()
+    if recorded is None:
+        return None
+    if recorded.user_id != user_id or recorded.pass_id != pass_id:
+        raise HTTPException(status_code=409, detail="이미 등록된 거래입니다.")
+    return recorded.id
+
+
+async def _purchase(
+    pass_id: int,
+    payload: OrderPurchaseRequest | None,
+    current_user: CurrentUser,
+    db: AsyncSession,
+) -> dict:
     # 1. 이용권 정보 및 가격 확인
     result = await db.execute(select(Pass).where(Pass.id == pass_id))
     target_pass = result.scalar_one_or_none()
@@ -27,8 +80,20 @@ async def purchase_pass(
         raise HTTPException(status_code=403, detail="고객만 구매할 수 있습니다.")
     if not target_pass.contract_address:
         raise HTTPException(status_code=400, detail="블록체인에 배포된 이용권이 아닙니다.")
+    if target_pass.status == BANKRUPT_STATUS:
+        raise HTTPException(status_code=409, detail="파산 처리된 이용권입니다.")
     print(f"[purchase_pass] user_id={current_user.user_id} email={current_user.id} pass_id={pass_id}")
 
+    # 롤백하면 ORM 객체가 만료되므로 응답에 필요한 값을 미리 꺼내 둡니다.
+    title, contract_address = target_pass.title, target_pass.contract_address
+    tx_hash = payload.tx_hash if payload else None
+    chain = (payload.chain if payload else None) or target_pass.contract_chain
+
+    # 같은 거래 해시의 재전송이면 처음 주문을 그대로 돌려줍니다. (키 없이 재시도한 경우)
+    recorded = await _recorded_tx_order(db, chain, tx_hash, current_user.user_id, pass_id)
+    if recorded is not None:
+        return _purchase_response(recorded, contract_address, title)
+
     try:
         now = datetime.utcnow()
         existing_subs = await db.execute(
@@ -51,9 +116,11 @@ async def purchase_pass(
             user_id=current_user.user_id,
             pass_id=target_pass.id,
             amount=target_pass.price,
-            tx_hash=payload.tx_hash if payload else None,
-            chain=payload.chain if payload else target_pass.contract_chain,
+            tx_hash=tx_hash,
+            chain=chain,
             status="paid",
+            # 거래 해시가 있으면 검증 워커가 영수증을 확인할 때까지 pending
+            tx_status="pending" if tx_hash else None,
         )
         db.add(new_order)
         await db.flush() # order.id 확보
@@ -69,73 +136,179 @@ async def purchase_pass(
         new_sub = Subscription(
             user_id=current_user.user_id,
             pass_id=target_pass.id,
+            order_id=new_order.id,
             start_at=start_at, # 추가
             end_at=end_at,
             status="active"
         )
         db.add(new_sub)
+        # 사업자 대시보드 피드 (같은 트랜잭션)
+        add_event(db, target_pass.business_id, "purchase", {
+            "order_id": new_order.id,
+            "pass_id": target_pass.id,
+            "pass_title": title,
+            "facility_id": target_pass.facility_id,
+            "user_id": current_user.user_id,
+            "user_name": current_user.name,
+            "amount": target_pass.price,
+            "start_at": start_at,
+            "end_at": end_at,
+        })
 
         await db.commit()
-        return {
-            "status": "success",
-            "order_id": new_order.id,
-            "contract_address": target_pass.contract_address,
-            "message": f"'{target_pass.title}' 구매 및 블록체인 등록 완료!"
-        }
+        if tx_hash:
+            notify_pending_tx()
+        return _purchase_response(new_order.id, contract_address, title)
 
     except HTTPException:
         raise
+    except IntegrityError:
+        # 동시 요청이 유니크 제약(거래 해시 / active 구독)에 걸렸습니다.
+        await db.rollback()
+        recorded = await _recorded_tx_order(db, chain, tx_hash, current_user.user_id, pass_id)
+        if recorded is not None:
+            return _purchase_response(recorded, contract_address, title)
+        raise HTTPException(status_code=409, detail="이미 활성화된 이용권이 있습니다.")
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"구매 처리 중 오류: {str(e)}")
     # [C:\Project\kaist\2_week\blockpass-back\api\orders.py 맨 아래에 추가]
-@router.get("/my")
+MY_ORDERS_MAX_LIMIT = int(os.getenv("MY_ORDERS_MAX_LIMIT", "100"))
+
+@router.get("/my", response_model=list[MyOrderItem])
 async def get_my_orders(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    cursor: str | None = Query(None, description=f"이전 응답의 {NEXT_CURSOR_HEADER} 헤더 값"),
+    limit: int = Query(50, ge=1),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    # 내 주문, 이용권 이름, 블록체인 주소를 한 번에 가져오는 쿼리입니다.
-    query = text("""
-        SELECT o.id,
-               o.pass_id,
-               o.tx_hash,
-               o.chain,
-               p.title,
-               p.price,
-               p.duration_minutes,
-               p.terms,
-               p.contract_address,
-               p.contract_chain,
-               p.refund_rules,
-               s.start_at,
-               s.end_at,
-               s.status
-        FROM orders o
-        JOIN passes p ON o.pass_id = p.id
-        JOIN subscriptions s ON o.user_id = s.user_id AND o.pass_id = s.pass_id
-        WHERE o.user_id = :u_id
-          AND o.status != 'cancelled'
-          AND s.status NOT IN ('cancelled', 'refunded')
-        ORDER BY o.created_at DESC
-    """)
-    result = await db.execute(query, {"u_id": current_user.user_id})
+    limit = min(limit, MY_ORDERS_MAX_LIMIT)
+    # 내 주문, 이용권 이름, 블록체인 주소, 해당 주문의 구독을 한 번에 가져옵니다. (구독은 order_id 로 정확히 연결)
+    query = (
+        select(
+            Order.id, Order.pass_id, Order.tx_hash, Order.chain, Order.tx_status, Order.created_at,
+            Pass.title, Pass.price, Pass.duration_minutes, Pass.terms,
+            Pass.contract_address, Pass.contract_chain, Pass.refund_rules,
+            Subscription.start_at, Subscription.end_at, Subscription.status,
+        )
+        .join(Pass, Order.pass_id == Pass.id)
+        .outerjoin(Subscription, Subscription.order_id == Order.id)
+        .where(
+            Order.user_id == current_user.user_id,
+            Order.status != "cancelled",
+            or_(Subscription.id.is_(None), Subscription.status.not_in(("cancelled", "refunded"))),
+        )
+        .order_by(Order.created_at.desc(), Order.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        after = decode_cursor(cursor)
+        try:
+            after_created = datetime.fromisoformat(after["c"])
+            after_id = int(after["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+        query = query.where(or_(
+            Order.created_at < after_created,
+            and_(Order.created_at == after_created, Order.id < after_id),
+        ))
+
+    result = await db.execute(query)
     rows = []
     for row in result:
-        data = dict(row._mapping)
+        data = row._asdict()
         if isinstance(data.get("refund_rules"), str):
             try:
-                import json
                 data["refund_rules"] = json.loads(data["refund_rules"])
             except Exception:
                 data["refund_rules"] = []
         rows.append(data)
-    return rows
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor({"c": last["created_at"].isoformat(), "id": last["id"]})
+    return FastJSONResponse(rows, headers=headers)
+
+
+async def quote_orders(db: AsyncSession, user_id: int, order_ids: list[int] | None = None) -> list[dict]:
+    """주문별 환불 예상 금액 (컨트랙트 _calculateRefund 와 같은 계산)"""
+    query = (
+        select(
+            Order.id, Order.pass_id, Order.status, Order.amount, Pass.price,
+            Subscription.start_at.label("started_at"),
+        )
+        .join(Pass, Pass.id == Order.pass_id)
+        .outerjoin(Subscription, Subscription.order_id == Order.id)
+        .where(Order.user_id == user_id)
+        .order_by(Order.created_at.desc(), Order.id.desc())
+    )
+    if order_ids is not None:
+        query = query.where(Order.id.in_(order_ids))
+    rows = (await db.execute(query)).all()
+    compiled = await get_compiled_rules(db, [row.pass_id for row in rows])
+
+    now = datetime.utcnow()
+    quotes = []
+    for row in rows:
+        refundable = row.status == "paid"
+        rules = compiled.get(row.pass_id, NO_REFUND) if refundable else NO_REFUND
+        amount = row.amount if row.amount is not None else row.price
+        quotes.append({
+            "order_id": row.id,
+            "pass_id": row.pass_id,
+            "status": row.status,
+            "amount": amount,
+            "refundable": refundable,
+            "started_at": row.started_at,
+            **quote_refund(rules, amount, row.started_at, now),
+            "quoted_at": now,
+        })
+    return quotes
+
+
+@router.get("/refund-quotes", response_model=list[RefundQuote])
+async def get_my_refund_quotes(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    return FastJSONResponse(await quote_orders(db, current_user.user_id))
+
+
+@router.get("/{order_id}/refund-quote", response_model=RefundQuote)
+async def get_refund_quote(
+    order_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    quotes = await quote_orders(db, current_user.user_id, [order_id])
+    if not quotes:
+        raise HTTPException(status_code=404, detail="주문을 찾을 수 없습니다.")
+    return FastJSONResponse(quotes[0])
+
+
+async def _add_order_event(
+    db: AsyncSession, order: Order, event_type: str, current_user: CurrentUser, **extra
+) -> None:
+    """주문을 바꾼 트랜잭션에 이용권 사업자에게 보낼 이벤트를 추가합니다."""
+    owner = (await db.execute(select(Pass.business_id, Pass.title).where(Pass.id == order.pass_id))).first()
+    if owner is None:
+        return
+    add_event(db, owner.business_id, event_type, {
+        "order_id": order.id,
+        "pass_id": order.pass_id,
+        "pass_title": owner.title,
+        "user_id": current_user.user_id,
+        "user_name": current_user.name,
+        **extra,
+    })
 
 
 @router.delete("/{order_id}")
 async def delete_order(
     order_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
@@ -146,14 +319,11 @@ async def delete_order(
         raise HTTPException(status_code=404, detail="주문을 찾을 수 없습니다.")
 
     order.status = "cancelled"
+    # 이 주문으로 만든 구독 한 건만 바꿉니다.
     await db.execute(
-        text("""
-            UPDATE subscriptions
-            SET status = 'cancelled'
-            WHERE user_id = :u_id AND pass_id = :p_id
-        """),
-        {"u_id": current_user.user_id, "p_id": order.pass_id},
+        update(Subscription).where(Subscription.order_id == order.id).values(status="cancelled")
     )
+    await _add_order_event(db, order, "cancel", current_user)
     await db.commit()
     return {"status": "success"}
 
@@ -162,61 +332,63 @@ async def delete_order(
 async def refund_order(
     order_id: int,
     payload: OrderPurchaseRequest | None = None,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
+    # 같은 주문을 동시에 환불하지 않도록 행을 잠급니다.
     result = await db.execute(
-        select(Order).where(Order.id == order_id, Order.user_id == current_user.user_id)
+        select(Order).where(Order.id == order_id, Order.user_id == current_user.user_id).with_for_update()
     )
     order = result.scalar_one_or_none()
     if not order:
         raise HTTPException(status_code=404, detail="주문을 찾을 수 없습니다.")
+    # 상태를 바꾸기 전에 현재 시점 환불 금액을 계산합니다.
+    quote = (await quote_orders(db, current_user.user_id, [order.id]))[0]
+    if not quote["refundable"]:
+        raise HTTPException(status_code=409, detail="환불할 수 없는 주문입니다.")
 
     order.status = "refunded"
     await db.execute(
-        text("""
-            UPDATE subscriptions
-            SET status = 'refunded'
-            WHERE user_id = :u_id AND pass_id = :p_id
-        """),
-        {"u_id": current_user.user_id, "p_id": order.pass_id},
+        update(Subscription).where(Subscription.order_id == order.id).values(status="refunded")
     )
-    if payload and payload.tx_hash:
-        order.tx_hash = payload.tx_hash
-    if payload and payload.chain:
-        order.chain = payload.chain
-    db.add(Refund(order_id=order.id, refund_amount=0, reason="user_refund"))
+    # 환불 거래는 refunds 에 따로 남깁니다. orders.tx_hash 는 구매 거래 중복 확인에 쓰이므로 덮어쓰지 않습니다.
+    db.add(Refund(
+        order_id=order.id, refund_amount=quote["refund_amount"], reason="user_refund",
+        tx_hash=payload.tx_hash if payload else None, chain=payload.chain if payload else None,
+    ))
+    await _add_order_event(db, order, "refund", current_user, refund_amount=quote["refund_amount"], reason="user_refund")
     await db.commit()
-    return {"status": "success"}
+    return {"status": "success", "refund_amount": quote["refund_amount"], "refund_amount_wei": quote["refund_amount_wei"]}
 
 
 @router.post("/bankruptcy/{order_id}")
 async def bankruptcy_refund(
     order_id: int,
     payload: OrderPurchaseRequest | None = None,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
+    # 같은 주문을 동시에 환불하지 않도록 행을 잠급니다.
     result = await db.execute(
-        select(Order).where(Order.id == order_id, Order.user_id == current_user.user_id)
+        select(Order).where(Order.id == order_id, Order.user_id == current_user.user_id).with_for_update()
     )
     order = result.scalar_one_or_none()
     if not order:
         raise HTTPException(status_code=404, detail="주문을 찾을 수 없습니다.")
+    # 상태를 바꾸기 전에 현재 시점 환불 금액을 계산합니다.
+    quote = (await quote_orders(db, current_user.user_id, [order.id]))[0]
+    if not quote["refundable"]:
+        raise HTTPException(status_code=409, detail="환불할 수 없는 주문입니다.")
 
     order.status = "refunded"
     await db.execute(
-        text("""
-            UPDATE subscriptions
-            SET status = 'refunded'
-            WHERE user_id = :u_id AND pass_id = :p_id
-        """),
-        {"u_id": current_user.user_id, "p_id": order.pass_id},
+        update(Subscription).where(Subscription.order_id == order.id).values(status="refunded")
     )
-    if payload and payload.tx_hash:
-        order.tx_hash = payload.tx_hash
-    if payload and payload.chain:
-        order.chain = payload.chain
-    db.add(Refund(order_id=order.id, refund_amount=0, reason="bankruptcy"))
+    # 컨트랙트 emergencyWithdraw 는 잔액이 부족하면 잔액까지만 돌려주지만, 여기서는 규칙상 금액을 기록합니다.
+    db.add(Refund(
+        order_id=order.id, refund_amount=quote["refund_amount"], reason="bankruptcy",
+        tx_hash=payload.tx_hash if payload else None, chain=payload.chain if payload else None,
+    ))
+    await _add_order_event(db, order, "refund", current_user, refund_amount=quote["refund_amount"], reason="bankruptcy")
     await db.commit()
-    return {"status": "success"}
+    return {"status": "success", "refund_amount": quote["refund_amount"], "refund_amount_wei": quote["refund_amount_wei"]}
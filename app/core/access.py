@@ -0,0 +1,302 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\access.py
+# 시설 출입 확인: 고객 앱이 보여 주는 짧은 수명의 서명 QR 토큰과, (시설, 사용자)별 active 구독을 담은 메모리 색인
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.db import AsyncSessionLocal
+from app.core.outbox import outbox_tailer
+from app.core.security import SECRET_KEY
+from app.models.models import Facility, Pass, Subscription
+
+ACCESS_INDEX_ENABLED = os.getenv("ACCESS_INDEX_ENABLED", "true").lower() == "true"
+# 변경은 outbox 이벤트로 따라가고, 놓친 이벤트(늦은 커밋 등)까지 맞추려고 주기적으로 다시 읽습니다.
+ACCESS_INDEX_RELOAD_SECONDS = float(os.getenv("ACCESS_INDEX_RELOAD_SECONDS", "300"))
+ACCESS_INDEX_LOAD_CHUNK = int(os.getenv("ACCESS_INDEX_LOAD_CHUNK", "5000"))
+# 구독이 없다고 DB 에서 확인한 (시설, 사용자)는 잠깐 기억해 같은 QR 을 연달아 찍어도 DB 로 가지 않게 합니다.
+ACCESS_NEGATIVE_TTL_SECONDS = float(os.getenv("ACCESS_NEGATIVE_TTL_SECONDS", "2"))
+ACCESS_QR_TTL_SECONDS = int(os.getenv("ACCESS_QR_TTL_SECONDS", "60"))
+ACCESS_QR_SECRET = os.getenv("ACCESS_QR_SECRET", SECRET_KEY)
+
+_QR_KEY = hashlib.sha256(f"blockpass-access-qr:{ACCESS_QR_SECRET}".encode()).digest()
+
+
+def _sign(message: bytes) -> bytes:
+    digest = hmac.new(_QR_KEY, message, hashlib.sha256).digest()[:16]
+    return base64.urlsafe_b64encode(digest).rstrip(b"=")
+
+
+def issue_qr_token(user_id: int, now: float | None = None) -> tuple[str, int]:
+    """"사용자id.만료시각.서명" 형태의 토큰과 만료 시각(unix 초). JWT 보다 짧아 QR 코드가 작고 검증도 빠릅니다."""
+    expires_at = int(now if now is not None else time.time()) + ACCESS_QR_TTL_SECONDS
+    message = f"{user_id}.{expires_at}"
+    return f"{message}.{_sign(message.encode()).decode()}", expires_at
+
+
+def verify_qr_token(token: str, now: float | None = None) -> tuple[int | None, str]:
+    """(user_id, reason). 실패하면 user_id 는 None 이고 reason 은 invalid_token / expired_token."""
+    # 스캐너가 깨진 글자를 보낼 수 있으므로 ASCII 가 아니면 서명 비교 전에 거절합니다.
+    if not token.isascii():
+        return None, "invalid_token"
+    message, _, signature = token.rpartition(".")
+    user_part, _, expires_part = message.partition(".")
+    if not (user_part.isdigit() and expires_part.isdigit()):
+        return None, "invalid_token"
+    if not hmac.compare_digest(signature.encode(), _sign(message.encode())):
+        return None, "invalid_token"
+    if int(expires_part) < (now if now is not None else time.time()):
+        return None, "expired_token"
+    return int(user_part), "ok"
+
+
+def active_subscriptions_query(facility_id: int, user_id: int, now: datetime):
+    """한 사용자의 이 시설 active 구독. 이용권 id 를 서브쿼리로 좁혀 (user_id, pass_id, status) 인덱스를 타게 합니다."""
+    return select(Subscription.id, Subscription.order_id, Subscription.pass_id, Subscription.end_at).where(
+        Subscription.user_id == user_id,
+        Subscription.pass_id.in_(select(Pass.id).where(Pass.facility_id == facility_id)),
+        Subscription.status == "active",
+        or_(Subscription.end_at.is_(None), Subscription.end_at > now),
+    )
+
+
+def _naive_utc(value) -> datetime | None:
+    """DB 값과 비교할 수 있게 tz 없는 UTC datetime 으로 맞춥니다. (이벤트 payload 는 ISO 문자열)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class ActiveSubscriptionIndex:
+    """(facility_id, user_id) -> {구독 키: (end_at, pass_id)}.
+
+    구독 키는 주문 id 이고, 주문과 연결되지 않은 예전 구독은 -구독 id 를 씁니다.
+    구매/환불/취소(결제 실패, 온체인 환불 포함)는 outbox 이벤트로 바로 반영하고, 기간이 끝난 항목은 조회할 때 지웁니다.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.loaded_at: datetime | None = None
+        self.last_load_ms = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.db_fallbacks = 0
+        self.events = 0
+        self._entries: dict[tuple[int, int], dict[int, tuple[datetime | None, int]]] = {}
+        self._keys: dict[int, tuple[int, int]] = {}  # 구독 키 -> (facility_id, user_id)
+        self._pass_facility: dict[int, int] = {}
+        self._facility_business: dict[int, int] = {}
+        self._negative = TTLCache(maxsize=100_000, ttl=ACCESS_NEGATIVE_TTL_SECONDS)
+        # 환불/취소로 뺀 구독 키. 주문은 다시 paid 가 되지 않으므로, 늦게 도착한 purchase 이벤트
+        # (다른 워커의 커밋을 tailer 가 나중에 읽은 경우)가 되살리지 못하게 합니다. 적재할 때마다 한 세대씩 버립니다.
+        self._removed: set[int] = set()
+        self._removed_before: set[int] = set()
+        # 적재 중에 들어온 이벤트는 새 색인에도 다시 적용합니다.
+        self._pending: list[tuple[str, dict]] | None = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # --- 변경 반영 ---
+
+    def _add(self, key: int, facility_id: int, user_id: int, pass_id: int, end_at: datetime | None) -> None:
+        if key in self._removed or key in self._removed_before:
+            return
+        self._entries.setdefault((facility_id, user_id), {})[key] = (end_at, pass_id)
+        self._keys[key] = (facility_id, user_id)
+        self._negative.invalidate((facility_id, user_id))
+
+    def _remove(self, key: int) -> None:
+        self._removed.add(key)
+        self._drop(key)
+
+    def _drop(self, key: int) -> None:
+        slot = self._keys.pop(key, None)
+        if slot is None:
+            return
+        entries = self._entries.get(slot)
+        if entries is not None:
+            entries.pop(key, None)
+            if not entries:
+                del self._entries[slot]
+
+    def _apply(self, event_type: str, payload: dict) -> None:
+        if event_type == "purchase":
+            facility_id = payload.get("facility_id") or self._pass_facility.get(payload["pass_id"])
+            if facility_id is None:
+                return  # 시설에 묶이지 않은 이용권
+            self._pass_facility[payload["pass_id"]] = facility_id
+            self._add(
+                payload["order_id"], facility_id, payload["user_id"], payload["pass_id"],
+                _naive_utc(payload.get("end_at")),
+            )
+        elif event_type in ("refund", "cancel"):
+            self._remove(payload["order_id"])
+        elif event_type == "bankruptcy":
+            for order_id in payload.get("order_ids") or ():
+                self._remove(order_id)
+            # 주문과 연결되지 않은 구독은 -구독 id 키로 들어 있습니다.
+            for subscription_id in payload.get("subscription_ids") or ():
+                self._remove(-subscription_id)
+
+    def on_event(self, business_id: int, event_type: str, payload: dict) -> None:
+        """outbox 리스너. 같은 워커의 커밋은 바로, 다른 워커의 커밋은 tailer 로 옵니다. (순서가 바뀌어도 빠진 구독은 되살아나지 않습니다)"""
+        self.events += 1
+        self._apply(event_type, payload)
+        if self._pending is not None:
+            self._pending.append((event_type, payload))
+
+    # --- 적재 ---
+
+    async def load(self, chunk_size: int = ACCESS_INDEX_LOAD_CHUNK) -> int:
+        """active 구독 전체를 새 색인으로 읽은 뒤 한 번에 바꿉니다. (그동안 조회는 기존 색인으로)"""
+        started = time.perf_counter()
+        self._pending = []
+        self._removed_before, self._removed = self._removed, set()
+        try:
+            entries: dict[tuple[int, int], dict[int, tuple[datetime | None, int]]] = {}
+            keys: dict[int, tuple[int, int]] = {}
+            now = datetime.utcnow()
+            # 적재 직후 이벤트와 순서가 어긋나지 않도록 replica 가 아니라 primary 에서 읽습니다.
+            async with AsyncSessionLocal() as session:
+                facility_business = dict((await session.execute(select(Facility.id, Facility.business_id))).all())
+                pass_facility = dict((await session.execute(
+                    select(Pass.id, Pass.facility_id).where(Pass.facility_id.is_not(None))
+                )).all())
+                result = await session.stream(
+                    select(
+                        Subscription.id, Subscription.order_id, Subscription.user_id,
+                        Subscription.pass_id, Subscription.end_at, Pass.facility_id,
+                    )
+                    .join(Pass, Pass.id == Subscription.pass_id)
+                    .where(
+                        Subscription.status == "active",
+                        or_(Subscription.end_at.is_(None), Subscription.end_at > now),
+                        Pass.facility_id.is_not(None),
+                    )
+                    .execution_options(yield_per=chunk_size)
+                )
+                async for rows in result.partitions():
+                    for row in rows:
+                        key = row.order_id if row.order_id is not None else -row.id
+                        slot = (row.facility_id, row.user_id)
+                        entries.setdefault(slot, {})[key] = (_naive_utc(row.end_at), row.pass_id)
+                        keys[key] = slot
+
+            self._entries, self._keys = entries, keys
+            self._pass_facility, self._facility_business = pass_facility, facility_business
+            self._negative.clear()
+            for event_type, payload in self._pending:
+                self._apply(event_type, payload)
+        finally:
+            self._pending = None
+        self.loaded = True
+        self.loaded_at = datetime.utcnow()
+        self.last_load_ms = round((time.perf_counter() - started) * 1000, 1)
+        return len(keys)
+
+    # --- 조회 ---
+
+    def lookup(self, facility_id: int, user_id: int, now: datetime) -> tuple[int, datetime | None] | None:
+        """메모리에서 (pass_id, end_at)을 찾습니다. 여러 개면 가장 늦게 끝나는 것."""
+        entries = self._entries.get((facility_id, user_id))
+        if not entries:
+            return None
+        best = None
+        for key, (end_at, pass_id) in list(entries.items()):
+            if end_at is not None and end_at <= now:
+                self._drop(key)  # 기간이 끝난 구독 (스위퍼가 expired 로 바꾸기 전이라도)
+                continue
+            if best is None or end_at is None or (best[1] is not None and end_at > best[1]):
+                best = (pass_id, end_at)
+        return best
+
+    async def facility_business_id(self, db: AsyncSession, facility_id: int) -> int | None:
+        business_id = self._facility_business.get(facility_id)
+        if business_id is None:
+            business_id = (await db.execute(
+                select(Facility.business_id).where(Facility.id == facility_id)
+            )).scalar_one_or_none()
+            if business_id is not None:
+                self._facility_business[facility_id] = business_id
+        return business_id
+
+    async def check(self, db: AsyncSession, facility_id: int, user_id: int) -> dict:
+        """출입 가능 여부. 메모리에 없을 때만 DB 를 봅니다."""
+        now = datetime.utcnow()
+        found = self.lookup(facility_id, user_id, now)
+        source = "memory"
+        if found is None:
+            self.misses += 1
+            if self._negative.get((facility_id, user_id)) is None:
+                found = await self._check_db(db, facility_id, user_id, now)
+                source = "db"
+        else:
+            self.hits += 1
+        if found is None:
+            return {"allowed": False, "reason": "no_active_pass", "user_id": user_id, "source": source}
+        pass_id, end_at = found
+        return {
+            "allowed": True, "reason": "ok", "user_id": user_id,
+            "pass_id": pass_id, "end_at": end_at, "source": source,
+        }
+
+    async def _check_db(self, db: AsyncSession, facility_id: int, user_id: int, now: datetime):
+        self.db_fallbacks += 1
+        rows = (await db.execute(active_subscriptions_query(facility_id, user_id, now))).all()
+        if not rows:
+            self._negative.set((facility_id, user_id), True)
+            return None
+        # 다른 워커에서 방금 구매했거나 적재 전이면 여기서 색인에 넣어 다음 조회부터 메모리로 답합니다.
+        for row in rows:
+            key = row.order_id if row.order_id is not None else -row.id
+            self._add(key, facility_id, user_id, row.pass_id, _naive_utc(row.end_at))
+        return self.lookup(facility_id, user_id, now)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "loaded": self.loaded,
+            "loaded_at": self.loaded_at,
+            "last_load_ms": self.last_load_ms,
+            "subscriptions": len(self._keys),
+            "keys": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "db_fallbacks": self.db_fallbacks,
+            "events": self.events,
+            "negative_cache": self._negative.stats(),
+        }
+
+
+access_index = ActiveSubscriptionIndex()
+
+
+async def run_access_index(interval: float = ACCESS_INDEX_RELOAD_SECONDS) -> None:
+    """lifespan 에서 띄우는 작업. 이벤트 구독을 먼저 건 뒤 적재해야 그 사이 변경을 놓치지 않습니다."""
+    listening = False
+    try:
+        while True:
+            try:
+                if not listening:
+                    await outbox_tailer.listen(access_index.on_event)
+                    listening = True
+                count = await access_index.load()
+                print(f"[access] active 구독 {count:,}건 적재 ({access_index.last_load_ms:.0f}ms)")
+            except Exception as exc:
+                print(f"[access] 출입 색인 적재 실패: {exc}")
+            await asyncio.sleep(interval)
+    finally:
+        outbox_tailer.unlisten(access_index.on_event)
@@ -0,0 +1,201 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\bankruptcy.py
+# 이용권 파산 일괄 환불: 컨트랙트 votePanic 으로 파산한 이용권의 결제 주문을 구간 단위로 한꺼번에 환불 처리합니다.
+import asyncio
+import os
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable
+
+from sqlalchemy import func, insert, select, update
+
+from app.core.db import AsyncSessionLocal
+from app.core.outbox import add_event
+from app.core.refunds import get_compiled_rules, quote_refund
+from app.models.models import Order, Pass, Refund, Subscription
+
+BANKRUPTCY_CHUNK_SIZE = int(os.getenv("BANKRUPTCY_CHUNK_SIZE", "1000"))
+BANKRUPT_STATUS = "bankrupt"
+
+# 이 워커에서 실행한 일괄 환불 진행 상황 (pass_id 별)
+bankruptcy_jobs: dict[int, dict] = {}
+_running: dict[int, asyncio.Task] = {}
+
+
+def _new_progress(pass_id: int) -> dict:
+    return {
+        "pass_id": pass_id,
+        "state": "running",  # running | done | failed
+        "total_orders": 0,
+        "refunded_orders": 0,
+        "refund_amount": Decimal(0),
+        "chunks": 0,
+        "last_order_id": 0,
+        "started_at": datetime.utcnow(),
+        "finished_at": None,
+        "duration_ms": 0.0,
+        "cancelled_subscriptions": 0,
+        "error": None,
+    }
+
+
+async def _mark_pass_bankrupt(pass_id: int) -> Pass:
+    """이용권을 파산 상태로 바꿔 새 구매를 막습니다. (ORM 으로 저장해 카탈로그/최저가/검색이 갱신됩니다)"""
+    async with AsyncSessionLocal() as session:
+        target = await session.get(Pass, pass_id)
+        if target is None:
+            raise LookupError(f"pass {pass_id} not found")
+        if target.status != BANKRUPT_STATUS:
+            target.status = BANKRUPT_STATUS
+            await session.commit()
+        return target
+
+
+async def _refund_chunk(
+    target: Pass, after_id: int, chunk_size: int, now: datetime
+) -> tuple[int, int, Decimal]:
+    """paid 주문 한 구간을 잠그고 주문/구독 상태 변경과 Refund 입력을 한 트랜잭션으로 처리합니다.
+
+    (처리한 주문 수, 구간 마지막 주문 id, 환불 합계)를 돌려줍니다. 처리할 주문이 없으면 (0, after_id, 0).
+    """
+    pass_id, price = target.id, target.price
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(
+            select(Order.id, Order.amount, Subscription.start_at)
+            .outerjoin(Subscription, Subscription.order_id == Order.id)
+            .where(Order.pass_id == pass_id, Order.status == "paid", Order.id > after_id)
+            .order_by(Order.id)
+            .limit(chunk_size)
+            .with_for_update(of=Order)
+        )).all()
+        if not rows:
+            return 0, after_id, Decimal(0)
+
+        rules = (await get_compiled_rules(session, [pass_id]))[pass_id]
+        refunds = []
+        total = Decimal(0)
+        for row in rows:
+            quote = quote_refund(rules, row.amount if row.amount is not None else price, row.start_at, now)
+            refunds.append({"order_id": row.id, "refund_amount": quote["refund_amount"], "reason": "bankruptcy"})
+            total += quote["refund_amount"]
+
+        ids = [row.id for row in rows]
+        await session.execute(
+            update(Order).where(Order.id.in_(ids)).values(status="refunded")
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(
+            update(Subscription).where(Subscription.order_id.in_(ids)).values(status="refunded")
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(insert(Refund), refunds)
+        # 대시보드에는 주문별 이벤트 대신 구간마다 요약 이벤트 하나를 보냅니다.
+        add_event(session, target.business_id, "bankruptcy", {
+            "pass_id": pass_id,
+            "pass_title": target.title,
+            "order_ids": ids,
+            "refund_amount": total,
+        })
+        await session.commit()
+    return len(rows), ids[-1], total
+
+
+async def _cancel_unlinked_subscriptions(target: Pass, chunk_size: int) -> int:
+    """주문과 연결되지 않은 예전 active 구독은 환불 없이 cancelled 로 바꿉니다."""
+    pass_id = target.id
+    cancelled = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            ids = (await session.execute(
+                select(Subscription.id)
+                .where(
+                    Subscription.pass_id == pass_id,
+                    Subscription.status == "active",
+                    Subscription.order_id.is_(None),
+                )
+                .limit(chunk_size)
+                .with_for_update(skip_locked=True)
+            )).scalars().all()
+            if not ids:
+                return cancelled
+            await session.execute(
+                update(Subscription)
+                .where(Subscription.id.in_(ids), Subscription.status == "active")
+                .values(status="cancelled")
+                .execution_options(synchronize_session=False)
+            )
+            # 주문이 없어 order_ids 로는 알릴 수 없으므로 구독 id 를 실어 출입 색인에서도 바로 빠지게 합니다.
+            add_event(session, target.business_id, "bankruptcy", {
+                "pass_id": pass_id,
+                "pass_title": target.title,
+                "subscription_ids": ids,
+            })
+            await session.commit()
+        cancelled += len(ids)
+
+
+async def refund_bankrupt_pass(
+    pass_id: int,
+    chunk_size: int = BANKRUPTCY_CHUNK_SIZE,
+    progress: dict | None = None,
+    on_chunk: Callable[[dict], None] | None = None,
+) -> dict:
+    """이용권을 파산 처리하고 paid 주문 전체를 구간별로 환불합니다. 구간마다 커밋합니다.
+
+    중간에 멈춰도 다시 실행하면 아직 paid 인 주문부터 이어서 처리합니다.
+    """
+    progress = progress if progress is not None else _new_progress(pass_id)
+    started = time.perf_counter()
+    target = await _mark_pass_bankrupt(pass_id)
+    async with AsyncSessionLocal() as session:
+        progress["total_orders"] = (await session.execute(
+            select(func.count()).select_from(Order).where(Order.pass_id == pass_id, Order.status == "paid")
+        )).scalar()
+
+    # 모든 구간을 같은 시각 기준으로 계산합니다. (파산 시점의 환불율)
+    now = datetime.utcnow()
+    after_id = 0
+    while True:
+        count, after_id, amount = await _refund_chunk(target, after_id, chunk_size, now)
+        if not count:
+            break
+        progress["refunded_orders"] += count
+        progress["refund_amount"] += amount
+        progress["chunks"] += 1
+        progress["last_order_id"] = after_id
+        if on_chunk is not None:
+            on_chunk(progress)
+        if count < chunk_size:
+            break
+    progress["cancelled_subscriptions"] = await _cancel_unlinked_subscriptions(target, chunk_size)
+    progress["state"] = "done"
+    progress["finished_at"] = datetime.utcnow()
+    progress["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return progress
+
+
+def start_bankruptcy(pass_id: int) -> dict:
+    """백그라운드로 일괄 환불을 시작합니다. 이미 실행 중이면 진행 상황만 돌려줍니다."""
+    task = _running.get(pass_id)
+    if task is not None and not task.done():
+        return bankruptcy_jobs[pass_id]
+    progress = _new_progress(pass_id)
+    bankruptcy_jobs[pass_id] = progress
+
+    async def _run():
+        try:
+            await refund_bankrupt_pass(pass_id, progress=progress)
+            print(
+                f"[bankruptcy] pass_id={pass_id} 주문 {progress['refunded_orders']:,}건 환불 "
+                f"({progress['duration_ms']:.0f}ms)"
+            )
+        except Exception as exc:
+            progress["state"] = "failed"
+            progress["error"] = str(exc)
+            progress["finished_at"] = datetime.utcnow()
+            print(f"[bankruptcy] pass_id={pass_id} 일괄 환불 실패: {exc}")
+        finally:
+            _running.pop(pass_id, None)
+
+    _running[pass_id] = asyncio.create_task(_run())
+    return progress
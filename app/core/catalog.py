@@ -0,0 +1,155 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\catalog.py
+# 시설/이용권 카탈로그 응답 캐시 (버전 무효화 + ETag + stale-while-revalidate)
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.responses import dumps
+from app.models.models import Facility, Pass
+
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "30"))
+# TTL이 지난 뒤에도 이 시간 동안은 이전 응답을 주고 백그라운드에서 새로 고칩니다.
+CATALOG_CACHE_STALE_SECONDS = float(os.getenv("CATALOG_CACHE_STALE_SECONDS", "300"))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "1024"))
+
+
+class CatalogEntry:
+    __slots__ = ("version", "loaded_at", "body", "etag", "headers")
+
+    def __init__(self, version: int, body: bytes, headers: dict[str, str]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.headers = headers
+
+
+# loader는 (JSON으로 보낼 내용, 추가 응답 헤더)를 돌려줍니다.
+Loader = Callable[[], Awaitable[tuple[object, dict[str, str]]]]
+
+
+class CatalogCache:
+    """카탈로그 쓰기 때마다 version이 올라가며, 버전이 다른 항목은 즉시 버립니다."""
+
+    def __init__(self, ttl: float, stale: float, maxsize: int):
+        self.ttl = ttl
+        self.stale = stale
+        self.maxsize = maxsize
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self._entries: OrderedDict[str, CatalogEntry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def bump(self) -> None:
+        self.version += 1
+
+    async def _load(self, key: str, loader: Loader) -> CatalogEntry:
+        # 같은 키에 대한 동시 적재는 한 번만 DB로 보냅니다.
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load_now(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load_now(self, key: str, loader: Loader) -> CatalogEntry:
+        version = self.version
+        content, headers = await loader()
+        entry = CatalogEntry(version, dumps(content), headers)
+        if version == self.version:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _refresh_in_background(self, key: str, loader: Loader) -> None:
+        if key in self._inflight:
+            return
+        self.refreshes += 1
+        task = asyncio.create_task(self._load_now(key, loader))
+        self._inflight[key] = task
+
+        def _done(finished: asyncio.Task):
+            self._inflight.pop(key, None)
+            if not finished.cancelled() and finished.exception() is not None:
+                print(f"[catalog] 백그라운드 갱신 실패 ({key}): {finished.exception()}")
+
+        task.add_done_callback(_done)
+
+    async def get(self, key: str, loader: Loader) -> CatalogEntry:
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == self.version:
+            age = time.monotonic() - entry.loaded_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry
+            if age < self.ttl + self.stale:
+                self.stale_hits += 1
+                self._refresh_in_background(key, loader)
+                return entry
+        self.misses += 1
+        return await self._load(key, loader)
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "background_refreshes": self.refreshes,
+        }
+
+
+catalog_cache = CatalogCache(
+    ttl=CATALOG_CACHE_TTL_SECONDS,
+    stale=CATALOG_CACHE_STALE_SECONDS,
+    maxsize=CATALOG_CACHE_MAX_ENTRIES,
+)
+
+
+def catalog_response(request: Request, entry: CatalogEntry) -> Response:
+    """ETag를 붙이고, If-None-Match가 일치하면 본문 없이 304를 돌려줍니다."""
+    headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        if entry.etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+# 시설/이용권이 ORM으로 저장될 때마다 카탈로그 버전을 올립니다.
+# flush 시점에 한 번, 커밋 직후 한 번 더 올려서 커밋 전에 읽힌 이전 데이터가 남지 않게 합니다.
+@event.listens_for(Facility, "after_insert")
+@event.listens_for(Facility, "after_update")
+@event.listens_for(Facility, "after_delete")
+@event.listens_for(Pass, "after_insert")
+@event.listens_for(Pass, "after_update")
+@event.listens_for(Pass, "after_delete")
+def _bump_catalog_version(mapper, connection, target):
+    catalog_cache.bump()
+    session = object_session(target)
+    if session is not None:
+        session.info["catalog_dirty"] = True
+
+@event.listens_for(Session, "after_commit")
+def _bump_catalog_version_after_commit(session):
+    if session.info.pop("catalog_dirty", False):
+        catalog_cache.bump()
+
+@event.listens_for(Session, "after_rollback")
+def _clear_catalog_flag(session):
+    session.info.pop("catalog_dirty", None)
@@ -0,0 +1,123 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\chain.py
+# 이더리움 JSON-RPC 클라이언트: 체인별 노드 주소, 커넥션 풀을 공유하는 httpx 클라이언트, 배치 호출
+import asyncio
+import itertools
+import os
+from typing import Any
+
+import httpx
+
+from app.core.responses import dumps
+
+# 체인별 노드 주소: "sepolia=https://...,localhost=http://127.0.0.1:8545"
+# 목록에 없는 체인은 ETH_RPC_URL 을 씁니다.
+ETH_RPC_URL = os.getenv("ETH_RPC_URL")
+CHAIN_RPC_URLS = {
+    name.strip(): url.strip()
+    for name, _, url in (
+        item.partition("=") for item in os.getenv("CHAIN_RPC_URLS", "").split(",") if "=" in item
+    )
+}
+# 한 HTTP 요청에 담는 JSON-RPC 호출 수 (노드마다 배치 크기 제한이 있습니다)
+RPC_BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", "100"))
+# 노드 하나에 동시에 보내는 배치 요청 수
+RPC_MAX_CONCURRENCY = int(os.getenv("RPC_MAX_CONCURRENCY", "4"))
+RPC_TIMEOUT_SECONDS = float(os.getenv("RPC_TIMEOUT_SECONDS", "10"))
+
+
+class RPCError(Exception):
+    pass
+
+
+def is_rpc_error(result: Any) -> bool:
+    """rpc_batch 결과 중 노드가 오류로 답한 호출인지. (None 은 '결과 없음'으로 정상 응답)"""
+    return isinstance(result, RPCError)
+
+
+def rpc_url(chain: str | None) -> str | None:
+    return CHAIN_RPC_URLS.get(chain or "") or ETH_RPC_URL
+
+
+def rpc_configured() -> bool:
+    return bool(ETH_RPC_URL or CHAIN_RPC_URLS)
+
+
+_client: httpx.AsyncClient | None = None
+_request_ids = itertools.count(1)
+_semaphores: dict[str, asyncio.Semaphore] = {}
+rpc_stats = {"http_requests": 0, "calls": 0, "errors": 0}
+
+
+def get_client() -> httpx.AsyncClient:
+    """프로세스 전체가 같은 커넥션 풀을 씁니다. (요청마다 TCP/TLS 연결을 새로 맺지 않도록)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=RPC_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=RPC_MAX_CONCURRENCY * 4, max_keepalive_connections=RPC_MAX_CONCURRENCY * 4),
+            headers={"Content-Type": "application/json"},
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _post_batch(url: str, calls: list[tuple[str, list]]) -> list[Any]:
+    requests = [
+        {"jsonrpc": "2.0", "id": next(_request_ids), "method": method, "params": params}
+        for method, params in calls
+    ]
+    semaphore = _semaphores.setdefault(url, asyncio.Semaphore(RPC_MAX_CONCURRENCY))
+    async with semaphore:
+        response = await get_client().post(url, content=dumps(requests))
+    rpc_stats["http_requests"] += 1
+    rpc_stats["calls"] += len(requests)
+    response.raise_for_status()
+    body = response.json()
+    if not isinstance(body, list):
+        # 배치를 지원하지 않는 노드는 오류 객체 하나만 돌려줍니다.
+        raise RPCError(f"batch not supported: {body}")
+    # 응답 순서는 보장되지 않으므로 id 로 맞춥니다. 개별 호출 오류는 (raise 하지 않은) RPCError 로 돌려줘서
+    # 영수증이 아직 없다는 뜻의 null 결과와 구분합니다. 응답에서 빠진 호출도 오류로 봅니다.
+    by_id = {}
+    for item in body:
+        if item.get("error") is not None:
+            rpc_stats["errors"] += 1
+            by_id[item.get("id")] = RPCError(f"{item.get('error')}")
+        else:
+            by_id[item.get("id")] = item.get("result")
+    return [
+        by_id[request["id"]] if request["id"] in by_id else RPCError(f"{request['method']}: missing response")
+        for request in requests
+    ]
+
+
+async def rpc_batch(url: str, calls: list[tuple[str, list]], batch_size: int = RPC_BATCH_SIZE) -> list[Any]:
+    """(method, params) 목록을 batch_size 단위 배치 요청으로 나눠 동시에 보내고, 호출 순서대로 결과를 돌려줍니다.
+
+    실패한 호출 자리에는 RPCError 객체가 들어갑니다. (is_rpc_error 로 확인)
+    """
+    if not calls:
+        return []
+    chunks = [calls[i:i + batch_size] for i in range(0, len(calls), batch_size)]
+    results = await asyncio.gather(*(_post_batch(url, chunk) for chunk in chunks))
+    return [item for chunk in results for item in chunk]
+
+
+async def rpc_call(url: str, method: str, params: list) -> Any:
+    response = await get_client().post(
+        url, content=dumps({"jsonrpc": "2.0", "id": next(_request_ids), "method": method, "params": params})
+    )
+    rpc_stats["http_requests"] += 1
+    rpc_stats["calls"] += 1
+    response.raise_for_status()
+    body = response.json()
+    if body.get("error") is not None:
+        rpc_stats["errors"] += 1
+        raise RPCError(f"{method}: {body['error']}")
+    return body.get("result")
@@ -0,0 +1,356 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\chain_indexer.py
+# 체인 이벤트 인덱서: 배포된 이용권 컨트랙트의 ERC721 Transfer 로그를 블록 구간 단위로 읽어
+# 토큰 상태(pass_tokens)를 맞추고, 온체인에서 직접 환불(quit / emergencyWithdraw)된 주문을 반영합니다.
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import insert, select, tuple_, update
+
+from app.core.chain import RPCError, is_rpc_error, rpc_batch, rpc_call, rpc_configured, rpc_url
+from app.core.db import AsyncSessionLocal
+from app.core.outbox import add_event
+from app.core.refunds import NO_REFUND, get_compiled_rules, quote_refund
+from app.models.models import ChainCursor, Order, Pass, PassToken, Refund, Subscription, User
+
+INDEXER_ENABLED = os.getenv("INDEXER_ENABLED", "true" if rpc_configured() else "false").lower() == "true"
+INDEXER_INTERVAL_SECONDS = float(os.getenv("INDEXER_INTERVAL_SECONDS", "15"))
+# eth_getLogs 한 번에 조회하는 블록 수 (노드의 조회 범위/결과 수 제한에 맞춥니다)
+INDEXER_BLOCK_RANGE = int(os.getenv("INDEXER_BLOCK_RANGE", "2000"))
+# 구간 여러 개를 한 번의 배치 요청으로 보내고, 결과를 한 트랜잭션으로 반영합니다.
+INDEXER_RANGES_PER_BATCH = int(os.getenv("INDEXER_RANGES_PER_BATCH", "25"))
+# 체인 재구성(reorg)에 대비해 최신 블록에서 이만큼 뒤까지만 반영합니다.
+INDEXER_CONFIRMATIONS = int(os.getenv("INDEXER_CONFIRMATIONS", "3"))
+# 커서가 없는 체인은 이 블록부터 읽습니다.
+INDEXER_START_BLOCK = int(os.getenv("INDEXER_START_BLOCK", "0"))
+# eth_getLogs 의 address 필터 하나에 넣는 컨트랙트 수
+INDEXER_ADDRESS_CHUNK = int(os.getenv("INDEXER_ADDRESS_CHUNK", "1000"))
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+ZERO_ADDRESS = "0x" + "0" * 40
+
+indexer_stats = {
+    "runs": 0,
+    "events": 0,
+    "refunded_orders": 0,
+    "last_run_at": None,
+    "last_duration_ms": 0.0,
+    "last_error": None,
+    "cursors": {},
+}
+
+
+@dataclass(frozen=True)
+class TransferEvent:
+    block_number: int
+    log_index: int
+    tx_hash: str
+    contract: str
+    sender: str
+    recipient: str
+    token_id: int
+
+
+def _chunks(items: list, size: int = 1000):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _topic_address(topic: str) -> str:
+    return "0x" + topic[-40:].lower()
+
+
+def decode_transfers(logs: list[dict]) -> list[TransferEvent]:
+    """Transfer(address indexed, address indexed, uint256 indexed) 로그를 블록/로그 순서대로 디코딩합니다."""
+    events = []
+    for log in logs:
+        topics = log.get("topics") or []
+        if len(topics) != 4 or topics[0].lower() != TRANSFER_TOPIC or log.get("removed"):
+            continue
+        events.append(TransferEvent(
+            block_number=int(log["blockNumber"], 16),
+            log_index=int(log["logIndex"], 16),
+            tx_hash=log["transactionHash"].lower(),
+            contract=log["address"].lower(),
+            sender=_topic_address(topics[1]),
+            recipient=_topic_address(topics[2]),
+            token_id=int(topics[3], 16),
+        ))
+    events.sort(key=lambda event: (event.block_number, event.log_index))
+    return events
+
+
+async def _fetch_logs(url: str, addresses: list[str], ranges: list[tuple[int, int]]) -> list[dict]:
+    """구간별 eth_getLogs 를 한 배치로 보냅니다. 결과가 너무 많아 거절된 구간은 반으로 나눠 다시 요청합니다."""
+    address_chunks = [addresses[i:i + INDEXER_ADDRESS_CHUNK] for i in range(0, len(addresses), INDEXER_ADDRESS_CHUNK)]
+    logs = []
+    while ranges:
+        calls = [
+            ("eth_getLogs", [{"fromBlock": hex(low), "toBlock": hex(high), "address": chunk, "topics": [TRANSFER_TOPIC]}])
+            for low, high in ranges
+            for chunk in address_chunks
+        ]
+        results = await rpc_batch(url, calls)
+        per_range = len(address_chunks)
+        retry = []
+        for index, (low, high) in enumerate(ranges):
+            range_results = results[index * per_range:(index + 1) * per_range]
+            if not any(result is None or is_rpc_error(result) for result in range_results):
+                for result in range_results:
+                    logs.extend(result)
+            elif low == high:
+                raise RPCError(f"eth_getLogs failed for block {low}")
+            else:
+                middle = (low + high) // 2
+                retry.extend([(low, middle), (middle + 1, high)])
+        ranges = retry
+    return logs
+
+
+async def _block_timestamps(url: str, blocks: set[int]) -> dict[int, datetime]:
+    blocks = sorted(blocks)
+    results = await rpc_batch(url, [("eth_getBlockByNumber", [hex(block), False]) for block in blocks])
+    timestamps = {}
+    for block, result in zip(blocks, results):
+        if result is None or is_rpc_error(result):
+            raise RPCError(f"eth_getBlockByNumber failed for block {block}: {result}")
+        timestamps[block] = datetime.utcfromtimestamp(int(result["timestamp"], 16))
+    return timestamps
+
+
+async def _pass_contracts(chain: str) -> dict[str, tuple[int, str | None]]:
+    """{컨트랙트 주소(소문자): (이용권 id, 이용권 상태)}"""
+    async with AsyncSessionLocal() as session:
+        rows = await session.execute(
+            select(Pass.id, Pass.contract_address, Pass.status)
+            .where(Pass.contract_chain == chain, Pass.contract_address.is_not(None))
+        )
+        return {row.contract_address.lower(): (row.id, row.status) for row in rows}
+
+
+async def _read_cursor(chain: str) -> int:
+    async with AsyncSessionLocal() as session:
+        last_block = (await session.execute(
+            select(ChainCursor.last_block).where(ChainCursor.chain == chain)
+        )).scalar_one_or_none()
+    return last_block if last_block is not None else INDEXER_START_BLOCK - 1
+
+
+async def reset_cursor(chain: str, from_block: int) -> None:
+    """다음 실행을 from_block 부터 다시 읽게 합니다. (반영은 멱등이라 다시 읽어도 안전합니다)"""
+    async with AsyncSessionLocal() as session:
+        cursor = await session.get(ChainCursor, chain)
+        if cursor is None:
+            session.add(ChainCursor(chain=chain, last_block=from_block - 1, updated_at=datetime.utcnow()))
+        else:
+            cursor.last_block = from_block - 1
+            cursor.updated_at = datetime.utcnow()
+        await session.commit()
+
+
+async def _apply_window(
+    chain: str,
+    events: list[TransferEvent],
+    timestamps: dict[int, datetime],
+    contracts: dict[str, tuple[int, str | None]],
+    from_block: int,
+    to_block: int,
+) -> dict | None:
+    """한 구간의 이벤트와 커서 전진을 한 트랜잭션으로 반영합니다. 다른 워커가 이미 처리한 구간이면 None."""
+    summary = {"minted": 0, "burned": 0, "transferred": 0, "refunded_orders": 0}
+    async with AsyncSessionLocal() as session:
+        cursor = (await session.execute(
+            select(ChainCursor).where(ChainCursor.chain == chain).with_for_update()
+        )).scalar_one_or_none()
+        if cursor is None:
+            cursor = ChainCursor(chain=chain, last_block=from_block - 1, updated_at=datetime.utcnow())
+            session.add(cursor)
+        elif cursor.last_block != from_block - 1:
+            return None
+
+        tokens: dict[tuple[str, int], PassToken] = {}
+        keys = sorted({(event.contract, event.token_id) for event in events})
+        for chunk in _chunks(keys):
+            existing = await session.execute(
+                select(PassToken).where(
+                    PassToken.chain == chain,
+                    tuple_(PassToken.contract_address, PassToken.token_id).in_(chunk),
+                )
+            )
+            tokens.update(((token.contract_address, int(token.token_id)), token) for token in existing.scalars())
+
+        orders_by_tx = {}
+        mint_hashes = sorted({event.tx_hash for event in events if event.sender == ZERO_ADDRESS})
+        for chunk in _chunks(mint_hashes):
+            rows = await session.execute(
+                select(Order.id, Order.tx_hash).where(Order.chain == chain, Order.tx_hash.in_(chunk))
+            )
+            orders_by_tx.update((row.tx_hash.lower(), row.id) for row in rows)
+
+        burned_orders: dict[int, TransferEvent] = {}
+        for event in events:
+            key = (event.contract, event.token_id)
+            token = tokens.get(key)
+            if token is None:
+                # 인덱싱 시작 전에 발행된 토큰이면 주문 연결 없이 만듭니다.
+                token = PassToken(
+                    chain=chain, contract_address=event.contract, token_id=event.token_id, status="active",
+                )
+                tokens[key] = token
+                session.add(token)
+            if event.sender == ZERO_ADDRESS:
+                if token.minted_block is None:
+                    token.order_id = orders_by_tx.get(event.tx_hash)
+                    token.owner = event.recipient
+                    token.minted_block = event.block_number
+                    token.mint_tx_hash = event.tx_hash
+                    summary["minted"] += 1
+            elif event.recipient == ZERO_ADDRESS:
+                if token.status != "burned":
+                    token.status = "burned"
+                    token.owner = None
+                    token.burned_block = event.block_number
+                    token.burn_tx_hash = event.tx_hash
+                    summary["burned"] += 1
+                    if token.order_id is not None:
+                        burned_orders[token.order_id] = event
+            elif token.status != "burned":
+                token.owner = event.recipient
+                summary["transferred"] += 1
+        await session.flush()
+
+        if burned_orders:
+            # 앱을 거치지 않고 컨트랙트에서 바로 환불된 주문 (이미 환불/취소된 주문은 건너뜁니다)
+            rows = (await session.execute(
+                select(
+                    Order.id, Order.pass_id, Order.user_id, Order.amount, Pass.price, Pass.business_id, Pass.title,
+                    Subscription.start_at, User.name,
+                )
+                .join(Pass, Pass.id == Order.pass_id)
+                .outerjoin(Subscription, Subscription.order_id == Order.id)
+                .outerjoin(User, User.user_id == Order.user_id)
+                .where(Order.id.in_(list(burned_orders)), Order.status == "paid")
+                .with_for_update(of=Order)
+            )).all()
+            if rows:
+                compiled = await get_compiled_rules(session, [row.pass_id for row in rows])
+                refunds = []
+                for row in rows:
+                    event = burned_orders[row.id]
+                    bankrupt = contracts.get(event.contract, (None, None))[1] == "bankrupt"
+                    quote = quote_refund(
+                        compiled.get(row.pass_id, NO_REFUND),
+                        row.amount if row.amount is not None else row.price,
+                        row.start_at,
+                        timestamps[event.block_number],
+                    )
+                    reason = "onchain_emergency_withdraw" if bankrupt else "onchain_quit"
+                    refunds.append({
+                        "order_id": row.id, "refund_amount": quote["refund_amount"], "reason": reason,
+                        "tx_hash": event.tx_hash, "chain": chain,
+                    })
+                    # 대시보드와 모든 워커의 출입 색인이 알 수 있도록 같은 트랜잭션에 환불 이벤트를 씁니다.
+                    add_event(session, row.business_id, "refund", {
+                        "order_id": row.id,
+                        "pass_id": row.pass_id,
+                        "pass_title": row.title,
+                        "user_id": row.user_id,
+                        "user_name": row.name,
+                        "refund_amount": quote["refund_amount"],
+                        "reason": reason,
+                    })
+                ids = [row.id for row in rows]
+                await session.execute(
+                    update(Order).where(Order.id.in_(ids)).values(status="refunded")
+                    .execution_options(synchronize_session=False)
+                )
+                await session.execute(
+                    update(Subscription).where(Subscription.order_id.in_(ids)).values(status="refunded")
+                    .execution_options(synchronize_session=False)
+                )
+                await session.execute(insert(Refund), refunds)
+                summary["refunded_orders"] = len(ids)
+
+        cursor.last_block = to_block
+        cursor.updated_at = datetime.utcnow()
+        await session.commit()
+    return summary
+
+
+async def index_chain(chain: str, max_windows: int | None = None) -> dict:
+    """커서 다음 블록부터 (최신 - 확인 블록 수)까지 읽어 반영합니다."""
+    summary = {"chain": chain, "from_block": None, "to_block": None, "windows": 0, "events": 0,
+               "minted": 0, "burned": 0, "transferred": 0, "refunded_orders": 0}
+    url = rpc_url(chain)
+    if url is None:
+        return summary
+    contracts = await _pass_contracts(chain)
+    if not contracts:
+        return summary
+    addresses = sorted(contracts)
+    head = int(await rpc_call(url, "eth_blockNumber", []), 16) - INDEXER_CONFIRMATIONS
+    from_block = await _read_cursor(chain) + 1
+    summary["from_block"] = from_block
+    window_blocks = INDEXER_BLOCK_RANGE * INDEXER_RANGES_PER_BATCH
+    while from_block <= head and (max_windows is None or summary["windows"] < max_windows):
+        to_block = min(from_block + window_blocks - 1, head)
+        ranges = [
+            (low, min(low + INDEXER_BLOCK_RANGE - 1, to_block))
+            for low in range(from_block, to_block + 1, INDEXER_BLOCK_RANGE)
+        ]
+        events = decode_transfers(await _fetch_logs(url, addresses, ranges))
+        burn_blocks = {event.block_number for event in events if event.recipient == ZERO_ADDRESS}
+        timestamps = await _block_timestamps(url, burn_blocks) if burn_blocks else {}
+        applied = await _apply_window(chain, events, timestamps, contracts, from_block, to_block)
+        if applied is None:
+            # 다른 워커가 먼저 진행했습니다. 다음 실행에서 새 커서부터 이어갑니다.
+            break
+        for name, value in applied.items():
+            summary[name] += value
+        summary["events"] += len(events)
+        summary["windows"] += 1
+        summary["to_block"] = to_block
+        from_block = to_block + 1
+    return summary
+
+
+async def indexed_chains() -> list[str]:
+    async with AsyncSessionLocal() as session:
+        chains = (await session.execute(
+            select(Pass.contract_chain)
+            .where(Pass.contract_address.is_not(None), Pass.contract_chain.is_not(None))
+            .distinct()
+        )).scalars().all()
+    return [chain for chain in chains if rpc_url(chain) is not None]
+
+
+async def index_all_chains(max_windows: int | None = None) -> list[dict]:
+    return [await index_chain(chain, max_windows) for chain in await indexed_chains()]
+
+
+async def run_indexer(interval: float = INDEXER_INTERVAL_SECONDS) -> None:
+    """lifespan 에서 띄우는 주기 작업"""
+    while True:
+        started = time.perf_counter()
+        try:
+            for summary in await index_all_chains():
+                indexer_stats["events"] += summary["events"]
+                indexer_stats["refunded_orders"] += summary["refunded_orders"]
+                if summary["to_block"] is not None:
+                    indexer_stats["cursors"][summary["chain"]] = summary["to_block"]
+                if summary["events"]:
+                    print(
+                        f"[indexer] {summary['chain']} 블록 {summary['from_block']:,}~{summary['to_block']:,}: "
+                        f"이벤트 {summary['events']:,}건, 온체인 환불 {summary['refunded_orders']:,}건"
+                    )
+            indexer_stats["last_error"] = None
+        except Exception as exc:
+            indexer_stats["last_error"] = str(exc)
+            print(f"[indexer] 이벤트 인덱싱 실패: {exc}")
+        indexer_stats["runs"] += 1
+        indexer_stats["last_run_at"] = datetime.utcnow()
+        indexer_stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        await asyncio.sleep(interval)
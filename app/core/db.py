@@ -1,20 +1,104 @@
 # C:\Project\kaist\2_week\blockpass-back\app\core\db.py
 import os
+import time
 from dotenv import load_dotenv
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 load_dotenv()
 
 # .env 파일에 DATABASE_URL=mysql+aiomysql://user:pw@host:port/dbname 설정 필요
 DATABASE_URL = os.getenv("DATABASE_URL")
+# 읽기 전용 복제본(replica) 주소. 없으면 조회도 primary를 사용합니다.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
 
-engine = create_async_engine(DATABASE_URL, echo=True, pool_pre_ping=True)
+# 커넥션 풀 설정 (uvicorn 워커 수 x (pool_size + max_overflow) <= MySQL max_connections)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", str(DB_POOL_SIZE)))
+# SQL 로그는 동기 출력이라 운영에서는 꺼둡니다.
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """커넥션을 얻기까지 걸린 시간(대기 + 신규 연결)을 기록하는 풀"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            self.wait_count += 1
+            self.wait_total += waited
+            if waited > self.wait_max:
+                self.wait_max = waited
+
+
+def _create_engine(url: str):
+    return create_async_engine(
+        url,
+        echo=DB_ECHO,
+        poolclass=TimedQueuePool,
+        pool_pre_ping=True,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+
+
+engine = _create_engine(DATABASE_URL)
 AsyncSessionLocal = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
+
+# 조회 전용 엔진/세션 (replica 미설정 시 primary 엔진을 그대로 사용)
+read_engine = _create_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else engine
+ReadSessionLocal = sessionmaker(
+    bind=read_engine, class_=AsyncSession, expire_on_commit=False
+)
 Base = declarative_base()
 
+# 서버 시작 시 커넥션을 미리 열어 첫 요청의 연결 지연을 없앱니다.
+async def warm_pool(target_engine=engine, count: int = DB_POOL_PREWARM) -> int:
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(await target_engine.connect())
+    finally:
+        for conn in connections:
+            await conn.close()
+    return len(connections)
+
+# 커넥션 풀 상태 조회 (사용 중 / 유휴 / 오버플로 / 대기 시간)
+def pool_stats(target_engine=engine) -> dict:
+    pool = target_engine.sync_engine.pool
+    stats = {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "timeout_seconds": DB_POOL_TIMEOUT,
+    }
+    if isinstance(pool, TimedQueuePool):
+        stats.update({
+            "wait_count": pool.wait_count,
+            "wait_avg_ms": round(pool.wait_total / pool.wait_count * 1000, 3) if pool.wait_count else 0.0,
+            "wait_max_ms": round(pool.wait_max * 1000, 3),
+        })
+    return stats
+
 # FastAPI 의존성 주입용 함수
 async def get_db():
     async with AsyncSessionLocal() as session:
@@ -25,4 +109,12 @@ async def get_db():
             await session.rollback()
             raise
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+# 조회 전용 의존성: 커밋하지 않고 트랜잭션을 닫으며, replica가 있으면 replica로 보냅니다.
+async def get_read_db():
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
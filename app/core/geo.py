@@ -0,0 +1,138 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\geo.py
+# 위치 기반 검색 유틸리티: geohash 인코딩, 거리 계산, 메모리 격자 인덱스
+import asyncio
+import math
+import os
+import time
+from collections import defaultdict
+
+EARTH_RADIUS_KM = 6371.0088
+NEARBY_GRID_TTL_SECONDS = float(os.getenv("NEARBY_GRID_TTL_SECONDS", "60"))
+GEOHASH_PRECISION = 12
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # 짝수 번째 비트는 경도
+    while len(chars) < precision:
+        target, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (target[0] + target[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            target[0] = mid
+        else:
+            bits <<= 1
+            target[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lng, max_lng)
+
+    haversine_km 과 같은 구면 반지름으로 계산한 정확한 경계라서, 반경 안의 점이 사전 필터에서 빠지지 않습니다.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angle)
+    # 원 위에서 경도 차가 가장 큰 점 기준: sin(dlng) = sin(angle) / cos(lat). 극을 덮으면 모든 경도.
+    ratio = math.sin(angle) / max(math.cos(math.radians(lat)), 1e-12)
+    dlng = math.degrees(math.asin(ratio)) if ratio < 1 else 180.0
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+
+def covering_geohashes(lat: float, lng: float, radius_km: float) -> list[str]:
+    """반경 원을 덮는 geohash 접두어 목록 (셀 크기가 반경 이상인 정밀도에서 최대 9개)."""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    dlat = max_lat - lat
+    dlng = max_lng - lng
+
+    precision = 1
+    for candidate in range(1, GEOHASH_PRECISION + 1):
+        lat_bits = (5 * candidate) // 2
+        lng_bits = 5 * candidate - lat_bits
+        if 180.0 / (1 << lat_bits) >= dlat and 360.0 / (1 << lng_bits) >= dlng:
+            precision = candidate
+        else:
+            break
+
+    # 셀 크기 >= 반경이므로 반경 간격의 3x3 표본점이 모든 셀을 빠짐없이 지납니다.
+    prefixes = set()
+    for sample_lat in (lat - dlat, lat, lat + dlat):
+        for sample_lng in (lng - dlng, lng, lng + dlng):
+            clamped_lat = min(max(sample_lat, -90.0), 90.0)
+            wrapped_lng = ((sample_lng + 180.0) % 360.0) - 180.0
+            prefixes.add(encode_geohash(clamped_lat, wrapped_lng, precision))
+    return sorted(prefixes)
+
+
+class FacilityGrid:
+    """위경도 격자 기반 메모리 인덱스 (DB 공간 검색의 대체 경로)"""
+
+    def __init__(self, cell_deg: float = 0.05, ttl: float = 60.0):
+        self.cell_deg = cell_deg
+        self.ttl = ttl
+        self.loaded_at = 0.0
+        self._cells: dict[tuple[int, int], list[dict]] = defaultdict(list)
+        self._lock = asyncio.Lock()
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def is_fresh(self) -> bool:
+        return self.loaded_at and time.monotonic() - self.loaded_at < self.ttl
+
+    def invalidate(self) -> None:
+        self.loaded_at = 0.0
+
+    def build(self, facilities: list[dict]) -> None:
+        cells: dict[tuple[int, int], list[dict]] = defaultdict(list)
+        for facility in facilities:
+            if facility.get("lat") is None or facility.get("lng") is None:
+                continue
+            facility = {**facility, "lat": float(facility["lat"]), "lng": float(facility["lng"])}
+            cells[self._cell(facility["lat"], facility["lng"])].append(facility)
+        self._cells = cells
+        self.loaded_at = time.monotonic()
+
+    async def ensure_loaded(self, loader) -> None:
+        if self.is_fresh():
+            return
+        async with self._lock:
+            if not self.is_fresh():
+                self.build(await loader())
+
+    def nearby(self, lat: float, lng: float, radius_km: float, limit: int) -> list[dict]:
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+        lat_lo, lng_lo = self._cell(min_lat, min_lng)
+        lat_hi, lng_hi = self._cell(max_lat, max_lng)
+        results = []
+        for cell_lat in range(lat_lo, lat_hi + 1):
+            for cell_lng in range(lng_lo, lng_hi + 1):
+                for facility in self._cells.get((cell_lat, cell_lng), ()):
+                    distance = haversine_km(lat, lng, facility["lat"], facility["lng"])
+                    if distance <= radius_km:
+                        results.append({**facility, "distance_km": round(distance, 3)})
+        results.sort(key=lambda item: (item["distance_km"], item["id"]))
+        return results[:limit]
+
+
+# 프로세스당 하나. 시설이 ORM 으로 저장되면 커밋 직후 무효화됩니다. (app/models/models.py)
+facility_grid = FacilityGrid(ttl=NEARBY_GRID_TTL_SECONDS)
@@ -0,0 +1,148 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\idempotency.py
+# Idempotency-Key 저장소: 같은 키로 재시도된 요청에는 처음 응답을 그대로 돌려줍니다.
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.cache import TTLCache
+from app.core.db import AsyncSessionLocal
+from app.core.responses import FastJSONResponse, dumps
+from app.models.models import IdempotencyKey
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "3600"))
+# 완료된 응답은 워커 메모리에도 두어 재시도 폭주 시 DB 조회조차 하지 않습니다.
+IDEMPOTENCY_LOCAL_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_LOCAL_CACHE_SIZE", "10000"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 100
+REPLAY_HEADER = "Idempotent-Replayed"
+
+completed_responses = TTLCache(maxsize=IDEMPOTENCY_LOCAL_CACHE_SIZE, ttl=IDEMPOTENCY_TTL_SECONDS)
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """같은 키가 다른 요청에 재사용됐는지 확인하기 위한 요청 내용 해시"""
+    return hashlib.sha256(dumps(parts)).hexdigest()
+
+
+def _replay(status_code: int, body: Any) -> FastJSONResponse:
+    return FastJSONResponse(body, status_code=status_code, headers={REPLAY_HEADER: "true"})
+
+
+def _check_existing(row_fingerprint: str, fingerprint: str, status_code: int | None, body: Any):
+    if row_fingerprint != fingerprint:
+        raise HTTPException(status_code=422, detail="같은 Idempotency-Key 로 다른 요청을 보낼 수 없습니다.")
+    if status_code is None:
+        raise HTTPException(
+            status_code=409, detail="같은 요청을 처리 중입니다.", headers={"Retry-After": "1"}
+        )
+    return _replay(status_code, body)
+
+
+async def _claim(user_id: int, key: str, fingerprint: str) -> IdempotencyKey | None:
+    """키를 선점합니다. 이미 있으면 기존 행을, 새로 선점했으면 None 을 돌려줍니다."""
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as session:
+        existing = (await session.execute(
+            select(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id, IdempotencyKey.idempotency_key == key
+            )
+        )).scalar_one_or_none()
+        if existing is not None and existing.created_at > now - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS):
+            return existing
+        if existing is not None:
+            # 만료된 키는 새 요청으로 취급
+            await session.execute(delete(IdempotencyKey).where(IdempotencyKey.id == existing.id))
+        session.add(IdempotencyKey(
+            user_id=user_id, idempotency_key=key, request_fingerprint=fingerprint, created_at=now
+        ))
+        try:
+            await session.commit()
+            return None
+        except IntegrityError:
+            # 다른 워커가 같은 순간 선점했습니다.
+            await session.rollback()
+            return (await session.execute(
+                select(IdempotencyKey).where(
+                    IdempotencyKey.user_id == user_id, IdempotencyKey.idempotency_key == key
+                )
+            )).scalar_one()
+
+
+async def _complete(user_id: int, key: str, status_code: int, body: Any) -> None:
+    async with AsyncSessionLocal() as session:
+        row = (await session.execute(
+            select(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id, IdempotencyKey.idempotency_key == key
+            )
+        )).scalar_one()
+        row.status_code = status_code
+        row.response_body = json.loads(dumps(body))
+        fingerprint = row.request_fingerprint
+        await session.commit()
+    completed_responses.set((user_id, key), (fingerprint, status_code, body))
+
+
+async def _release(user_id: int, key: str) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id, IdempotencyKey.idempotency_key == key
+            )
+        )
+        await session.commit()
+
+
+async def run_idempotent(
+    user_id: int,
+    key: str,
+    fingerprint: str,
+    handler: Callable[[], Awaitable[Any]],
+):
+    """handler 를 키당 한 번만 실행합니다. 4xx 응답도 저장하고, 5xx/예외는 키를 풀어 재시도할 수 있게 합니다."""
+    if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key 는 1~100자여야 합니다.")
+
+    cached = completed_responses.get((user_id, key))
+    if cached is not None:
+        return _check_existing(cached[0], fingerprint, cached[1], cached[2])
+
+    existing = await _claim(user_id, key, fingerprint)
+    if existing is not None:
+        return _check_existing(
+            existing.request_fingerprint, fingerprint, existing.status_code, existing.response_body
+        )
+
+    try:
+        body = await handler()
+    except HTTPException as exc:
+        if exc.status_code >= 500:
+            await _release(user_id, key)
+        else:
+            await _complete(user_id, key, exc.status_code, {"detail": exc.detail})
+        raise
+    except BaseException:
+        await _release(user_id, key)
+        raise
+    await _complete(user_id, key, 200, body)
+    return body
+
+
+async def purge_expired_keys(chunk_size: int = 5000) -> int:
+    """TTL 이 지난 키를 구간별로 지웁니다. (jobs.py)"""
+    cutoff = datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+    deleted = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            ids = (await session.execute(
+                select(IdempotencyKey.id).where(IdempotencyKey.created_at < cutoff).limit(chunk_size)
+            )).scalars().all()
+            if not ids:
+                return deleted
+            await session.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)))
+            await session.commit()
+            deleted += len(ids)
@@ -0,0 +1,299 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\outbox.py
+# 사업자 대시보드 실시간 피드: 주문 변경과 같은 트랜잭션에 outbox_events 를 쓰고,
+# 프로세스당 하나의 tailer 가 새 이벤트를 읽어 접속 중인 SSE 구독자에게 나눠 줍니다.
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable
+
+from sqlalchemy import delete, func, inspect, select
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+from app.core.db import AsyncSessionLocal
+from app.core.responses import dumps
+from app.models.models import OutboxEvent
+
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "1"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+OUTBOX_GAP_TIMEOUT_SECONDS = float(os.getenv("OUTBOX_GAP_TIMEOUT_SECONDS", "5"))
+# 구독자별 대기열. 가득 차면(느린 클라이언트) 연결을 끊고, 클라이언트는 Last-Event-ID 로 다시 이어받습니다.
+OUTBOX_CLIENT_QUEUE_SIZE = int(os.getenv("OUTBOX_CLIENT_QUEUE_SIZE", "1000"))
+OUTBOX_HEARTBEAT_SECONDS = float(os.getenv("OUTBOX_HEARTBEAT_SECONDS", "15"))
+# 재접속 시 Last-Event-ID 이후로 다시 보내 주는 최대 이벤트 수
+OUTBOX_REPLAY_LIMIT = int(os.getenv("OUTBOX_REPLAY_LIMIT", "1000"))
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "72"))
+
+_DISCONNECT = object()
+
+
+def add_event(session, business_id: int | None, event_type: str, payload: dict) -> None:
+    """호출한 쪽의 트랜잭션에 이벤트를 추가합니다. 커밋되어야만 피드에 나갑니다."""
+    if business_id is None:
+        return
+    # Decimal / datetime 을 JSON 컬럼에 넣을 수 있는 값으로 바꿉니다.
+    payload = json.loads(dumps(payload))
+    event = OutboxEvent(
+        business_id=business_id,
+        event_type=event_type,
+        payload=payload,
+        created_at=datetime.utcnow(),
+    )
+    session.add(event)
+    session.info["outbox_dirty"] = True
+    # 같은 프로세스의 리스너에는 커밋 직후 바로 전달합니다. (tailer 는 같은 id 를 리스너에 다시 보내지 않습니다)
+    session.info.setdefault("outbox_local", []).append((event, business_id, event_type, payload))
+
+
+def _format(event_id: int, event_type: str, payload: dict) -> bytes:
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event_id, event_type.encode(), dumps(payload))
+
+
+class OutboxTailer:
+    """구독자나 리스너가 있는 동안만 outbox_events 를 id 순으로 폴링해 사업자별 대기열로 보냅니다."""
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_id: int | None = None
+        self.polls = 0
+        self.delivered = 0
+        self.dropped_clients = 0
+        self._subscribers: dict[int, set[asyncio.Queue]] = defaultdict(set)
+        # 모든 사업자의 이벤트를 받는 프로세스 내부 리스너: callback(business_id, event_type, payload)
+        self._listeners: list[Callable[[int, str, dict], None]] = []
+        self._seen: set[int] = set()  # last_id 보다 큰데 이미 보낸 id
+        self._local: set[int] = set()  # 커밋 직후 리스너에 먼저 보낸 id (tailer 는 SSE 에만 보냅니다)
+        self._gaps: dict[int, float] = {}  # 아직 안 보인 id -> 처음 빈 것을 본 시각
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def subscribe(self, business_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=OUTBOX_CLIENT_QUEUE_SIZE)
+        self._subscribers[business_id].add(queue)
+        self._ensure_running()
+        return queue
+
+    async def listen(self, callback: Callable[[int, str, dict], None]) -> None:
+        """현재 위치를 잡은 뒤 리스너를 등록합니다. 돌아온 뒤 커밋되는 이벤트는 모두 callback 으로 갑니다."""
+        if self.last_id is None:
+            await self._poll()
+        self._listeners.append(callback)
+        self._ensure_running()
+
+    def unlisten(self, callback: Callable[[int, str, dict], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def deliver_local(self, event_id: int, business_id: int, event_type: str, payload: dict) -> None:
+        """이 워커에서 커밋된 이벤트를 폴링을 기다리지 않고 리스너에 보냅니다. id 마다 한 번만 전달됩니다."""
+        if not self._listeners or self.last_id is None:
+            return
+        if event_id <= self.last_id or event_id in self._seen or event_id in self._local:
+            return  # tailer 가 이미 보냈거나 먼저 보낸 id
+        self._local.add(event_id)
+        self._notify_listeners(business_id, event_type, payload)
+
+    def _notify_listeners(self, business_id: int, event_type: str, payload: dict) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(business_id, event_type, payload)
+            except Exception as exc:
+                print(f"[outbox] 리스너 처리 실패 ({event_type}): {exc}")
+
+    def unsubscribe(self, business_id: int, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(business_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[business_id]
+
+    async def _poll(self) -> int:
+        """새로 보낸 이벤트 수를 돌려줍니다."""
+        async with AsyncSessionLocal() as session:
+            if self.last_id is None:
+                # 처음 시작하면 지금 이후 이벤트만 보냅니다. (지난 이벤트는 Last-Event-ID 재전송으로)
+                self.last_id = (await session.execute(select(func.coalesce(func.max(OutboxEvent.id), 0)))).scalar()
+                self._seen.clear()
+                self._local.clear()
+                self._gaps.clear()
+                return 0
+            rows = (await session.execute(
+                select(OutboxEvent.id, OutboxEvent.business_id, OutboxEvent.event_type, OutboxEvent.payload)
+                .where(OutboxEvent.id > self.last_id)
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+            )).all()
+        self.polls += 1
+        sent = 0
+        for row in rows:
+            if row.id in self._seen:
+                continue
+            self._seen.add(row.id)
+            sent += 1
+            self._dispatch(row)
+        self._advance(rows[-1].id if rows else self.last_id)
+        return sent
+
+    def _advance(self, top_id: int) -> None:
+        """보낸 id 가 연속된 곳까지 last_id 를 올립니다.
+
+        auto increment id 는 커밋 순서와 다를 수 있어서, 빈 id 는 늦게 커밋될 수 있는 것으로 보고
+        OUTBOX_GAP_TIMEOUT_SECONDS 동안 다시 확인합니다. (롤백된 id 는 그 뒤에 건너뜁니다)
+        """
+        now = time.monotonic()
+        for missing in range(self.last_id + 1, top_id):
+            if missing not in self._seen:
+                self._gaps.setdefault(missing, now)
+        while True:
+            next_id = self.last_id + 1
+            if next_id in self._seen:
+                self._seen.discard(next_id)
+            elif next_id in self._gaps and now - self._gaps[next_id] > OUTBOX_GAP_TIMEOUT_SECONDS:
+                del self._gaps[next_id]
+            else:
+                break
+            self._gaps.pop(next_id, None)
+            self.last_id = next_id
+
+    def _dispatch(self, row) -> None:
+        if row.id in self._local:
+            self._local.discard(row.id)
+        else:
+            self._notify_listeners(row.business_id, row.event_type, row.payload)
+        queues = self._subscribers.get(row.business_id)
+        if not queues:
+            return
+        message = (row.id, _format(row.id, row.event_type, row.payload))
+        for queue in list(queues):
+            try:
+                queue.put_nowait(message)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self.dropped_clients += 1
+                self.unsubscribe(row.business_id, queue)
+                # 자리가 없으므로 하나를 비우고 연결 종료 신호를 넣습니다.
+                queue.get_nowait()
+                queue.put_nowait((None, _DISCONNECT))
+
+    async def _run(self) -> None:
+        while self._subscribers or self._listeners:
+            try:
+                sent = await self._poll()
+            except Exception as exc:
+                sent = 0
+                print(f"[outbox] 이벤트 폴링 실패: {exc}")
+            if sent >= self.batch_size:
+                continue  # 밀린 이벤트가 더 있습니다.
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+        # 구독자가 모두 나가면 멈추고, 다음 구독 때 현재 위치부터 다시 시작합니다.
+        self.last_id = None
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.subscriber_count(),
+            "businesses": len(self._subscribers),
+            "listeners": len(self._listeners),
+            "running": self._task is not None and not self._task.done(),
+            "last_id": self.last_id,
+            "open_gaps": len(self._gaps),
+            "polls": self.polls,
+            "delivered": self.delivered,
+            "dropped_clients": self.dropped_clients,
+        }
+
+
+outbox_tailer = OutboxTailer(interval=OUTBOX_POLL_INTERVAL_SECONDS, batch_size=OUTBOX_BATCH_SIZE)
+
+
+async def _replay(business_id: int, after_id: int) -> list[tuple[int, bytes]]:
+    # replica 지연으로 실시간 스트림과 사이에 빈틈이 생기지 않도록 primary 에서 읽습니다.
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(
+            select(OutboxEvent.id, OutboxEvent.event_type, OutboxEvent.payload)
+            .where(OutboxEvent.business_id == business_id, OutboxEvent.id > after_id)
+            .order_by(OutboxEvent.id)
+            .limit(OUTBOX_REPLAY_LIMIT)
+        )).all()
+    return [(row.id, _format(row.id, row.event_type, row.payload)) for row in rows]
+
+
+async def stream_events(business_id: int, last_event_id: int | None) -> AsyncIterator[bytes]:
+    """SSE 본문. 먼저 구독한 뒤 놓친 이벤트를 보내고, 이후 실시간 이벤트 중 이미 보낸 id 는 건너뜁니다."""
+    queue = outbox_tailer.subscribe(business_id)
+    try:
+        yield b"retry: 3000\n\n"
+        sent_id = 0
+        if last_event_id is not None:
+            for event_id, message in await _replay(business_id, last_event_id):
+                sent_id = event_id
+                yield message
+        while True:
+            try:
+                event_id, message = await asyncio.wait_for(queue.get(), timeout=OUTBOX_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # 프록시가 유휴 연결을 끊지 않도록 주석 줄을 보냅니다.
+                yield b": keep-alive\n\n"
+                continue
+            if message is _DISCONNECT:
+                return
+            if event_id <= sent_id:
+                continue
+            sent_id = event_id
+            yield message
+    finally:
+        outbox_tailer.unsubscribe(business_id, queue)
+
+
+async def purge_old_events(chunk_size: int = 5000) -> int:
+    """보존 기간이 지난 이벤트를 구간별로 지웁니다. (jobs.py)"""
+    cutoff = datetime.utcnow() - timedelta(hours=OUTBOX_RETENTION_HOURS)
+    deleted = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            ids = (await session.execute(
+                select(OutboxEvent.id).where(OutboxEvent.created_at < cutoff).order_by(OutboxEvent.id).limit(chunk_size)
+            )).scalars().all()
+            if not ids:
+                return deleted
+            await session.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(ids)))
+            await session.commit()
+            deleted += len(ids)
+
+
+# 같은 프로세스에서 커밋된 이벤트는 폴링 주기를 기다리지 않고 바로 보냅니다.
+@sa_event.listens_for(Session, "after_commit")
+def _wake_tailer_after_commit(session):
+    if session.info.pop("outbox_dirty", False):
+        outbox_tailer.wake()
+    for event, business_id, event_type, payload in session.info.pop("outbox_local", ()):
+        identity = inspect(event).identity
+        if identity is not None:
+            outbox_tailer.deliver_local(identity[0], business_id, event_type, payload)
+
+@sa_event.listens_for(Session, "after_rollback")
+def _clear_outbox_flag(session):
+    session.info.pop("outbox_dirty", None)
+    session.info.pop("outbox_local", None)
@@ -0,0 +1,24 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\pagination.py
+# 키셋(커서) 페이지네이션용 불투명 커서 인코딩
+import base64
+import json
+
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+    return data
@@ -0,0 +1,141 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\refunds.py
+# 환불 견적 엔진: 이용권 환불 규칙을 (초 단위 기준점, 환불율) 배열로 미리 컴파일해 두고
+# 배포되는 컨트랙트의 _calculateRefund 와 같은 결과를 계산합니다.
+import json
+import os
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import TTLCache
+from app.models.models import Pass
+
+UNIT_SECONDS = {
+    "일": 24 * 60 * 60,
+    "시간": 60 * 60,
+    "분": 60,
+}
+WEI_PER_ETH = 10 ** 18
+
+# 다른 워커에서 규칙이 바뀐 경우 이 시간 안에 반영됩니다. (같은 워커의 쓰기는 즉시 반영)
+REFUND_RULES_CACHE_TTL_SECONDS = float(os.getenv("REFUND_RULES_CACHE_TTL_SECONDS", "300"))
+REFUND_RULES_CACHE_MAX_SIZE = int(os.getenv("REFUND_RULES_CACHE_MAX_SIZE", "50000"))
+
+
+@dataclass(frozen=True)
+class CompiledRefundRules:
+    thresholds: tuple[int, ...]  # 경과 시간 기준 (초, 오름차순)
+    percents: tuple[int, ...]
+
+    def percent_at(self, elapsed_seconds: int) -> tuple[int, int | None]:
+        """(환불율, 현재 환불율이 유지되는 마지막 경과 초). 컨트랙트처럼 elapsed <= 기준점인 첫 구간을 씁니다."""
+        index = bisect_left(self.thresholds, elapsed_seconds)
+        if index == len(self.thresholds):
+            return 0, None
+        return self.percents[index], self.thresholds[index]
+
+
+NO_REFUND = CompiledRefundRules((), ())
+
+
+def compile_refund_rules(rules) -> CompiledRefundRules:
+    if isinstance(rules, str):
+        try:
+            rules = json.loads(rules)
+        except Exception:
+            rules = []
+    pairs = []
+    for rule in rules or []:
+        try:
+            seconds = int(rule["period"]) * UNIT_SECONDS[rule["unit"]]
+            percent = int(rule["refund_percent"])
+        except (KeyError, TypeError, ValueError):
+            continue  # 컨트랙트 생성 시에도 거부되는 규칙은 건너뜁니다.
+        pairs.append((seconds, max(0, min(percent, 100))))
+    if not pairs:
+        return NO_REFUND
+    # 컨트랙트 생성기와 같이 기준점으로만 안정 정렬합니다.
+    pairs.sort(key=lambda item: item[0])
+    return CompiledRefundRules(tuple(p[0] for p in pairs), tuple(p[1] for p in pairs))
+
+
+compiled_rules_cache = TTLCache(maxsize=REFUND_RULES_CACHE_MAX_SIZE, ttl=REFUND_RULES_CACHE_TTL_SECONDS)
+
+
+def eth_to_wei(amount) -> int:
+    return int(Decimal(str(amount)) * WEI_PER_ETH)
+
+
+def quote_refund(
+    rules: CompiledRefundRules,
+    amount,
+    started_at: datetime | None,
+    now: datetime,
+) -> dict:
+    """결제 금액(ETH)과 이용 시작 시각으로 지금 환불받을 금액을 계산합니다."""
+    paid_wei = eth_to_wei(amount or 0)
+    elapsed = max(0, int((now - started_at).total_seconds())) if started_at else 0
+    percent, until_seconds = rules.percent_at(elapsed)
+    refund_wei = paid_wei * percent // 100
+    return {
+        "elapsed_seconds": elapsed,
+        "refund_percent": percent,
+        "refund_amount": Decimal(refund_wei).scaleb(-18),
+        # JS 숫자 범위를 넘으므로 문자열로 보냅니다.
+        "refund_amount_wei": str(refund_wei),
+        "percent_valid_until": (
+            started_at + timedelta(seconds=until_seconds)
+            if started_at and until_seconds is not None
+            else None
+        ),
+    }
+
+
+async def get_compiled_rules(db, pass_ids) -> dict[int, CompiledRefundRules]:
+    """캐시에 없는 이용권 규칙만 한 번의 쿼리로 읽어 컴파일합니다."""
+    compiled = {}
+    missing = []
+    for pass_id in set(pass_ids):
+        rules = compiled_rules_cache.get(pass_id)
+        if rules is None:
+            missing.append(pass_id)
+        else:
+            compiled[pass_id] = rules
+    if missing:
+        result = await db.execute(select(Pass.id, Pass.refund_rules).where(Pass.id.in_(missing)))
+        for pass_id, raw_rules in result:
+            compiled[pass_id] = compile_refund_rules(raw_rules)
+            compiled_rules_cache.set(pass_id, compiled[pass_id])
+    return compiled
+
+
+# 이용권이 저장되면 flush 시점에 캐시에서 빼고, 컴파일한 규칙은 커밋된 뒤에만 캐시에 넣습니다.
+# (롤백되면 저장되지 않은 규칙으로 환불 금액을 계산하지 않도록 다음 조회 때 DB 에서 다시 읽습니다)
+@event.listens_for(Pass, "after_insert")
+@event.listens_for(Pass, "after_update")
+def _compile_on_write(mapper, connection, target):
+    compiled_rules_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("refund_rules_pending", {})[target.id] = compile_refund_rules(target.refund_rules)
+
+@event.listens_for(Pass, "after_delete")
+def _forget_on_delete(mapper, connection, target):
+    compiled_rules_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("refund_rules_pending", {}).pop(target.id, None)
+
+@event.listens_for(Session, "after_commit")
+def _cache_compiled_after_commit(session):
+    for pass_id, rules in session.info.pop("refund_rules_pending", {}).items():
+        compiled_rules_cache.set(pass_id, rules)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_rules(session):
+    session.info.pop("refund_rules_pending", None)
+
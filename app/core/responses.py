@@ -0,0 +1,32 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\responses.py
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any):
+    # orjson이 기본으로 처리하지 못하는 타입 (DECIMAL 가격/좌표 등)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson으로 바로 bytes를 만드는 응답 클래스.
+
+    엔드포인트에서 이 응답을 직접 반환하면 FastAPI의 jsonable_encoder 단계를 건너뜁니다.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,245 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\search.py
+# 시설 검색용 프로세스 내 n-gram 역색인 (시설명/주소/이용권 제목·약관)
+import asyncio
+import heapq
+import math
+import operator
+import os
+import re
+import time
+import unicodedata
+from collections import defaultdict
+from itertools import repeat
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import TTLCache
+from app.models.models import Facility, Pass
+
+# 전체 재구성 주기 (같은 프로세스의 쓰기는 커밋 직후 바로 반영, 다른 워커의 쓰기는 이 주기 안에 반영)
+SEARCH_INDEX_TTL_SECONDS = float(os.getenv("SEARCH_INDEX_TTL_SECONDS", "600"))
+# 자주 입력되는 짧은 검색어(자동완성)는 결과를 캐시합니다. 색인이 바뀌면 비웁니다.
+SEARCH_RESULT_CACHE_SIZE = int(os.getenv("SEARCH_RESULT_CACHE_SIZE", "4096"))
+
+# 필드별 가중치: 이름 > 이용권 제목 > 주소 > 약관
+FIELD_WEIGHTS = {"name": 3.0, "pass_title": 2.0, "address": 1.0, "pass_terms": 0.3}
+# 시설명이 검색어로 시작하면 자동완성 순위를 올립니다.
+NAME_PREFIX_BONUS = 2.0
+
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize(text: str | None) -> str:
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def ngrams(text: str | None) -> set[str]:
+    """토큰별 글자 1-gram + 2-gram (한글은 띄어쓰기가 일정하지 않아 단어 대신 n-gram 사용)"""
+    grams = set()
+    for token in _TOKEN.findall(normalize(text)):
+        grams.update(token)
+        grams.update(token[i:i + 2] for i in range(len(token) - 1))
+    return grams
+
+
+def query_grams(query: str) -> set[str]:
+    """검색어는 2-gram만 사용 (한 글자 토큰만 1-gram) - 후보 수를 줄입니다."""
+    grams = set()
+    for token in _TOKEN.findall(normalize(query)):
+        if len(token) == 1:
+            grams.add(token)
+        else:
+            grams.update(token[i:i + 2] for i in range(len(token) - 1))
+    return grams
+
+
+class FacilitySearchIndex:
+    """시설 문서 단위 역색인. 주기적으로 전체 재구성하고, 쓰기 시에는 바뀐 시설만 다시 색인합니다."""
+
+    def __init__(self, ttl: float = 600.0, result_cache_size: int = 4096):
+        self.ttl = ttl
+        self.results = TTLCache(maxsize=result_cache_size, ttl=ttl)
+        self.loaded_at = 0.0
+        self._postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self._doc_grams: dict[int, dict[str, float]] = {}
+        self._docs: dict[int, dict] = {}
+        self._names: dict[int, str] = {}
+        self._texts: dict[int, str] = {}
+        self._dirty: set[int] = set()
+        self._lock = asyncio.Lock()
+
+    def is_fresh(self) -> bool:
+        return self.loaded_at and time.monotonic() - self.loaded_at < self.ttl
+
+    def mark_dirty(self, facility_ids) -> None:
+        self._dirty.update(facility_ids)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @staticmethod
+    def _weighted_grams(doc: dict, pass_texts: list[tuple[str | None, str | None]]) -> dict[str, float]:
+        weights: dict[str, float] = defaultdict(float)
+        for gram in ngrams(doc.get("name")):
+            weights[gram] += FIELD_WEIGHTS["name"]
+        for gram in ngrams(doc.get("address")):
+            weights[gram] += FIELD_WEIGHTS["address"]
+        # 이용권 여러 개에 같은 단어가 있어도 한 번만 셉니다.
+        title_grams, terms_grams = set(), set()
+        for title, terms in pass_texts:
+            title_grams |= ngrams(title)
+            terms_grams |= ngrams(terms)
+        for gram in title_grams:
+            weights[gram] += FIELD_WEIGHTS["pass_title"]
+        for gram in terms_grams:
+            weights[gram] += FIELD_WEIGHTS["pass_terms"]
+        return weights
+
+    def _remove(self, facility_id: int) -> None:
+        for gram in self._doc_grams.pop(facility_id, {}):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.pop(facility_id, None)
+                if not posting:
+                    del self._postings[gram]
+        self._docs.pop(facility_id, None)
+        self._names.pop(facility_id, None)
+        self._texts.pop(facility_id, None)
+
+    def _add(self, doc: dict, pass_texts) -> None:
+        facility_id = doc["id"]
+        weights = self._weighted_grams(doc, pass_texts)
+        for gram, weight in weights.items():
+            self._postings[gram][facility_id] = weight
+        self._doc_grams[facility_id] = weights
+        self._docs[facility_id] = doc
+        self._names[facility_id] = normalize(doc.get("name"))
+        # 단어 포함 여부 판단용 (약관은 길어서 제외)
+        self._texts[facility_id] = " ".join(
+            normalize(text) for text in (doc.get("name"), doc.get("address"), *(t for t, _ in pass_texts))
+        )
+
+    def upsert(self, docs: list[dict], pass_texts: dict[int, list]) -> None:
+        for doc in docs:
+            self._remove(doc["id"])
+            self._add(doc, pass_texts.get(doc["id"], []))
+
+    def remove(self, facility_ids) -> None:
+        for facility_id in facility_ids:
+            self._remove(facility_id)
+
+    def build(self, docs: list[dict], pass_texts: dict[int, list]) -> "FacilitySearchIndex":
+        fresh = FacilitySearchIndex(self.ttl)
+        fresh.upsert(docs, pass_texts)
+        return fresh
+
+    async def ensure_loaded(self, loader) -> None:
+        """loader(ids)는 (시설 문서 목록, {facility_id: [(제목, 약관)]})를 돌려줍니다. ids=None이면 전체."""
+        if self.is_fresh() and not self._dirty:
+            return
+        async with self._lock:
+            if not self.is_fresh():
+                self._dirty.clear()
+                started = time.monotonic()
+                docs, pass_texts = await loader(None)
+                # 색인 구성은 CPU 작업이라 이벤트 루프를 오래 막지 않도록 스레드에서 합니다.
+                fresh = await asyncio.to_thread(self.build, docs, pass_texts)
+                self._postings, self._doc_grams = fresh._postings, fresh._doc_grams
+                self._docs, self._names, self._texts = fresh._docs, fresh._names, fresh._texts
+                self.loaded_at = started
+                self.results.clear()
+            elif self._dirty:
+                ids, self._dirty = self._dirty, set()
+                docs, pass_texts = await loader(sorted(ids))
+                self.remove(ids)
+                self.upsert(docs, pass_texts)
+                self.results.clear()
+
+    def search(self, query: str, offset: int, limit: int) -> tuple[list[dict], bool]:
+        cache_key = (normalize(query).strip(), offset, limit)
+        cached = self.results.get(cache_key)
+        if cached is None:
+            cached = self._search(query, offset, limit)
+            self.results.set(cache_key, cached)
+        return cached
+
+    def _search(self, query: str, offset: int, limit: int) -> tuple[list[dict], bool]:
+        grams = query_grams(query)
+        if not grams:
+            return [], False
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if not posting:
+                return [], False
+            postings.append((gram, posting))
+        # 가장 짧은 posting부터 교집합 (모든 n-gram을 포함하는 시설만 후보)
+        postings.sort(key=lambda item: len(item[1]))
+        candidates = postings[0][1].keys()
+        for _, posting in postings[1:]:
+            candidates = candidates & posting.keys()
+            if not candidates:
+                return [], False
+        candidates = list(candidates)
+
+        # 후보가 많아도 파이썬 루프 대신 map/zip(C 레벨)으로 점수를 계산합니다.
+        total = max(len(self._docs), 1)
+        scores = [0.0] * len(candidates)
+        for _, posting in postings:
+            idf = math.log(1 + total / len(posting))
+            scores = list(map(operator.add, scores, map(idf.__mul__, map(posting.__getitem__, candidates))))
+
+        # 순위: 시설명이 검색어로 시작 > 검색어 단어를 그대로 포함한 수 > n-gram 점수 > id
+        prefix = normalize(query).strip()
+        starts = map(str.startswith, map(self._names.__getitem__, candidates), repeat(prefix))
+        texts = list(map(self._texts.__getitem__, candidates))
+        phrase_hits = [0] * len(candidates)
+        for token in set(_TOKEN.findall(prefix)):
+            phrase_hits = list(map(operator.add, phrase_hits, map(operator.contains, texts, repeat(token))))
+        top = heapq.nlargest(
+            offset + limit + 1,
+            zip(starts, phrase_hits, scores, map(operator.neg, candidates)),
+        )
+        items = [
+            {**self._docs[-neg_id], "score": round(score, 4)}
+            for _, _, score, neg_id in top[offset:offset + limit]
+        ]
+        return items, len(top) > offset + limit
+
+
+# 시설/이용권이 ORM으로 저장되면 커밋 후 해당 시설만 다시 색인하도록 표시합니다.
+def _touched_facility_ids(target) -> set[int]:
+    if isinstance(target, Facility):
+        return {target.id}
+    ids = {target.facility_id}
+    history = inspect(target).attrs.facility_id.history
+    ids.update(history.deleted or ())
+    return {facility_id for facility_id in ids if facility_id is not None}
+
+
+@event.listens_for(Facility, "after_insert")
+@event.listens_for(Facility, "after_update")
+@event.listens_for(Facility, "after_delete")
+@event.listens_for(Pass, "after_insert")
+@event.listens_for(Pass, "after_update")
+@event.listens_for(Pass, "after_delete")
+def _mark_search_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("search_dirty", set()).update(_touched_facility_ids(target))
+
+@event.listens_for(Session, "after_commit")
+def _flush_search_dirty(session):
+    ids = session.info.pop("search_dirty", None)
+    if ids:
+        facility_search_index.mark_dirty(ids)
+
+@event.listens_for(Session, "after_rollback")
+def _clear_search_dirty(session):
+    session.info.pop("search_dirty", None)
+
+
+facility_search_index = FacilitySearchIndex(
+    ttl=SEARCH_INDEX_TTL_SECONDS, result_cache_size=SEARCH_RESULT_CACHE_SIZE
+)
@@ -1,5 +1,8 @@
 # C:\Project\kaist\2_week\blockpass-back\app\core\security.py
 import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -15,6 +18,16 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt 전용 워커 풀 설정 (이벤트 루프 블로킹 방지)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "64"))
+
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+# 실행 중 + 대기 중인 작업 수가 이 값을 넘으면 즉시 실패시킵니다.
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT)
+
 # 비밀번호 해싱 (암호화)
 def get_password_hash(password: str) -> str:
     try:
@@ -32,6 +45,28 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+async def _run_in_hash_pool(func, *args):
+    # 대기열이 가득 차면 기다리지 않고 503으로 바로 거절합니다.
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail="요청이 많아 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_slots.release()
+
+# 비동기 비밀번호 해싱 (bcrypt 워커 풀에서 실행)
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+# 비동기 비밀번호 검증 (bcrypt 워커 풀에서 실행)
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
 # JWT 액세스 토큰 생성
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -0,0 +1,130 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\sql_metrics.py
+# 요청 단위 SQL 계측: 쿼리 수 / DB 시간 집계, Server-Timing 헤더, N+1 탐지
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+SQL_QUERY_COUNT_THRESHOLD = int(os.getenv("SQL_QUERY_COUNT_THRESHOLD", "10"))
+SQL_DB_TIME_THRESHOLD_MS = float(os.getenv("SQL_DB_TIME_THRESHOLD_MS", "200"))
+# 같은 형태의 쿼리가 이 횟수 이상 반복되면 N+1 의심으로 기록합니다.
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)")
+
+
+class RequestSQLStats:
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.fingerprints: Counter[str] = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_seconds += elapsed
+        self.fingerprints[fingerprint(statement)] += 1
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_seconds * 1000
+
+    def repeated(self) -> list[tuple[str, int]]:
+        return [
+            (fp, n) for fp, n in self.fingerprints.most_common()
+            if n >= SQL_N_PLUS_ONE_THRESHOLD
+        ]
+
+
+_current_stats: ContextVar[RequestSQLStats | None] = ContextVar("sql_stats", default=None)
+
+
+def fingerprint(statement: str) -> str:
+    # 리터럴과 IN 목록을 지워 같은 형태의 쿼리를 하나로 묶습니다.
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    normalized = _IN_LIST.sub("(?)", normalized)
+    return normalized[:200]
+
+
+def current_stats() -> RequestSQLStats | None:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # 시작 시각은 실행 컨텍스트에 둡니다. 실패한 쿼리는 컨텍스트와 함께 버려지므로
+    # 풀에 돌아가는 커넥션(conn.info)에 값이 쌓이지 않습니다.
+    if context is not None:
+        context._sql_metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_sql_metrics_started", None)
+    if started is None:
+        return
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def instrument_engine(async_engine) -> None:
+    sync_engine = async_engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SQLMetricsMiddleware:
+    """요청마다 SQL 수와 DB 시간을 모아 Server-Timing 헤더로 내보내는 ASGI 미들웨어"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSQLStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"'.encode(),
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats, time.perf_counter() - started)
+
+    def _report(self, scope, stats: RequestSQLStats, elapsed: float) -> None:
+        repeated = stats.repeated()
+        if (
+            stats.count <= SQL_QUERY_COUNT_THRESHOLD
+            and stats.total_ms <= SQL_DB_TIME_THRESHOLD_MS
+            and not repeated
+        ):
+            return
+        print(
+            f"[sql-metrics] {scope.get('method')} {scope.get('path')} "
+            f"queries={stats.count} db_ms={stats.total_ms:.1f} total_ms={elapsed * 1000:.1f}"
+        )
+        for fp, n in repeated:
+            print(f"[sql-metrics]   N+1 suspect x{n}: {fp}")
+        for fp, n in stats.fingerprints.most_common(5):
+            print(f"[sql-metrics]   x{n}: {fp}")
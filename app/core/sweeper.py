@@ -0,0 +1,87 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\sweeper.py
+# 구독 만료 스위퍼: 기간이 끝난 active 구독을 주기적으로 expired 로 바꿉니다.
+import asyncio
+import os
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app.core.db import AsyncSessionLocal
+from app.models.models import Subscription
+
+SUBSCRIPTION_SWEEP_ENABLED = os.getenv("SUBSCRIPTION_SWEEP_ENABLED", "true").lower() == "true"
+SUBSCRIPTION_SWEEP_INTERVAL_SECONDS = float(os.getenv("SUBSCRIPTION_SWEEP_INTERVAL_SECONDS", "60"))
+SUBSCRIPTION_SWEEP_BATCH_SIZE = int(os.getenv("SUBSCRIPTION_SWEEP_BATCH_SIZE", "1000"))
+# 한 번 실행에서 처리할 최대 배치 수 (밀린 양이 많아도 다음 주기로 넘겨 DB 부하를 나눕니다)
+SUBSCRIPTION_SWEEP_MAX_BATCHES = int(os.getenv("SUBSCRIPTION_SWEEP_MAX_BATCHES", "50"))
+
+sweeper_stats = {
+    "runs": 0,
+    "total_expired": 0,
+    "last_run_at": None,
+    "last_expired": 0,
+    "last_duration_ms": 0.0,
+    "last_error": None,
+}
+
+
+async def expire_subscriptions(
+    batch_size: int = SUBSCRIPTION_SWEEP_BATCH_SIZE,
+    max_batches: int | None = SUBSCRIPTION_SWEEP_MAX_BATCHES,
+) -> int:
+    """(status, end_at) 인덱스로 만료 대상을 배치 단위로 골라 바꿉니다. 배치마다 커밋합니다.
+
+    여러 워커가 동시에 돌아도 안전합니다: 다른 워커가 잡고 있는 행은 SKIP LOCKED 로 건너뛰고,
+    UPDATE 에도 status = 'active' 조건을 다시 걸어 같은 행을 두 번 세지 않습니다.
+    """
+    now = datetime.utcnow()
+    expired = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        async with AsyncSessionLocal() as session:
+            ids = (await session.execute(
+                select(Subscription.id)
+                .where(Subscription.status == "active", Subscription.end_at <= now)
+                .order_by(Subscription.end_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )).scalars().all()
+            if not ids:
+                break
+            result = await session.execute(
+                update(Subscription)
+                .where(Subscription.id.in_(ids), Subscription.status == "active")
+                .values(status="expired")
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        expired += result.rowcount or 0
+        batches += 1
+        if len(ids) < batch_size:
+            break
+    return expired
+
+
+async def run_sweeper(interval: float = SUBSCRIPTION_SWEEP_INTERVAL_SECONDS) -> None:
+    """lifespan 에서 띄우는 주기 작업. 워커들이 한꺼번에 돌지 않도록 시작 시점을 흩뜨립니다."""
+    await asyncio.sleep(random.uniform(0, interval))
+    while True:
+        started = time.perf_counter()
+        try:
+            expired = await expire_subscriptions()
+            sweeper_stats["last_error"] = None
+        except Exception as exc:
+            expired = 0
+            sweeper_stats["last_error"] = str(exc)
+            print(f"[sweeper] 구독 만료 처리 실패: {exc}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        sweeper_stats["runs"] += 1
+        sweeper_stats["total_expired"] += expired
+        sweeper_stats["last_run_at"] = datetime.utcnow()
+        sweeper_stats["last_expired"] = expired
+        sweeper_stats["last_duration_ms"] = round(elapsed_ms, 1)
+        if expired:
+            print(f"[sweeper] 만료된 구독 {expired:,}건 처리 ({elapsed_ms:.0f}ms)")
+        await asyncio.sleep(interval)
@@ -0,0 +1,213 @@
+# C:\Project\kaist\2_week\blockpass-back\app\core\tx_verifier.py
+# 구매 거래 검증 워커: 클라이언트가 보낸 tx_hash 의 영수증을 배치 JSON-RPC 로 확인해 주문을 confirmed / failed 로 바꿉니다.
+import asyncio
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, insert, select, update
+
+from app.core.chain import is_rpc_error, rpc_batch, rpc_configured, rpc_url
+from app.core.db import AsyncSessionLocal
+from app.core.outbox import add_event
+from app.models.models import BlockchainContract, Order, Pass, Subscription, User
+
+TX_VERIFY_ENABLED = os.getenv("TX_VERIFY_ENABLED", "true" if rpc_configured() else "false").lower() == "true"
+TX_VERIFY_INTERVAL_SECONDS = float(os.getenv("TX_VERIFY_INTERVAL_SECONDS", "5"))
+TX_VERIFY_BATCH_SIZE = int(os.getenv("TX_VERIFY_BATCH_SIZE", "500"))
+# 구매 직후 깨어나도 잠깐 기다려 몰려 들어온 주문을 한 배치로 묶습니다.
+TX_VERIFY_COALESCE_SECONDS = float(os.getenv("TX_VERIFY_COALESCE_SECONDS", "0.5"))
+# 이 시간이 지나도 영수증이 없으면 (드롭/교체된 거래) failed 로 처리합니다.
+TX_VERIFY_TIMEOUT_SECONDS = float(os.getenv("TX_VERIFY_TIMEOUT_SECONDS", "3600"))
+
+tx_verifier_stats = {
+    "runs": 0,
+    "confirmed": 0,
+    "failed": 0,
+    "rpc_errors": 0,
+    "last_run_at": None,
+    "last_checked": 0,
+    "last_duration_ms": 0.0,
+    "last_error": None,
+}
+_wakeup = asyncio.Event()
+
+
+def notify_pending_tx() -> None:
+    """새 pending 주문이 생겼음을 워커에 알립니다. (다음 주기를 기다리지 않도록)"""
+    _wakeup.set()
+
+
+def _receipt_verdict(receipt: dict | None, contract_address: str | None, started_at, now: datetime):
+    """(tx_status, block_number). 아직 판단할 수 없으면 None."""
+    if receipt is None:
+        if started_at is not None and started_at < now - timedelta(seconds=TX_VERIFY_TIMEOUT_SECONDS):
+            return "failed", None
+        return None
+    block_number = int(receipt["blockNumber"], 16) if receipt.get("blockNumber") else None
+    succeeded = receipt.get("status") == "0x1"
+    # 다른 컨트랙트로 보낸 거래를 이 이용권 결제로 인정하지 않습니다.
+    to_matches = not contract_address or (receipt.get("to") or "").lower() == contract_address.lower()
+    return ("confirmed" if succeeded and to_matches else "failed"), block_number
+
+
+async def _apply_verdicts(verdicts: dict[int, tuple[str, int | None]], contracts: dict[int, tuple]) -> tuple[int, int]:
+    """판정 결과를 한 트랜잭션으로 반영합니다. 다른 워커가 먼저 처리했거나 그사이 환불/취소된 주문은 건너뜁니다."""
+    async with AsyncSessionLocal() as session:
+        rows = {row.id: row for row in (await session.execute(
+            select(Order.id, Order.status, Order.pass_id, Order.user_id, Pass.business_id, Pass.title, User.name)
+            .join(Pass, Pass.id == Order.pass_id)
+            .outerjoin(User, User.user_id == Order.user_id)
+            .where(Order.id.in_(list(verdicts)), Order.tx_status == "pending", Order.status == "paid")
+            .with_for_update(of=Order)
+        ))}
+        locked = set(rows)
+        confirmed = [order_id for order_id in locked if verdicts[order_id][0] == "confirmed"]
+        failed = [order_id for order_id in locked if verdicts[order_id][0] == "failed"]
+
+        if confirmed:
+            blocks = {order_id: verdicts[order_id][1] for order_id in confirmed}
+            await session.execute(
+                update(Order)
+                .where(Order.id.in_(confirmed))
+                .values(tx_status="confirmed", tx_block_number=case(blocks, value=Order.id))
+                .execution_options(synchronize_session=False)
+            )
+            await session.execute(insert(BlockchainContract), [
+                {
+                    "order_id": order_id,
+                    "contract_address": contracts[order_id][0],
+                    "chain": contracts[order_id][1],
+                    "status": "settled",
+                }
+                for order_id in confirmed
+            ])
+        if failed:
+            # 결제가 실패했으면 주문과 이용 권한도 되돌립니다.
+            await session.execute(
+                update(Order).where(Order.id.in_(failed)).values(tx_status="failed", status="failed")
+                .execution_options(synchronize_session=False)
+            )
+            await session.execute(
+                update(Subscription)
+                .where(Subscription.order_id.in_(failed), Subscription.status == "active")
+                .values(status="cancelled")
+                .execution_options(synchronize_session=False)
+            )
+            # 대시보드와 모든 워커의 출입 색인이 알 수 있도록 취소 이벤트를 같은 트랜잭션에 씁니다.
+            for order_id in failed:
+                row = rows[order_id]
+                add_event(session, row.business_id, "cancel", {
+                    "order_id": row.id,
+                    "pass_id": row.pass_id,
+                    "pass_title": row.title,
+                    "user_id": row.user_id,
+                    "user_name": row.name,
+                    "reason": "payment_failed",
+                })
+        await session.commit()
+    return len(confirmed), len(failed)
+
+
+async def verify_pending_orders(
+    batch_size: int = TX_VERIFY_BATCH_SIZE,
+    max_batches: int | None = None,
+) -> dict:
+    """pending 주문을 id 순으로 batch_size 개씩 읽어, 체인(노드)별 배치 RPC 로 영수증을 한꺼번에 확인합니다."""
+    summary = {"checked": 0, "confirmed": 0, "failed": 0, "waiting": 0, "rpc_errors": 0, "no_rpc": 0}
+    # 검증 전에 환불/취소된 주문은 더 이상 검증 대상이 아닙니다. (tx_status NULL)
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(Order).where(Order.tx_status == "pending", Order.status != "paid").values(tx_status=None)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+    after_id = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(
+                select(
+                    Order.id, Order.chain, Order.tx_hash, Pass.contract_address,
+                    func.coalesce(Subscription.start_at, Order.created_at).label("started_at"),
+                )
+                .join(Pass, Pass.id == Order.pass_id)
+                .outerjoin(Subscription, Subscription.order_id == Order.id)
+                .where(Order.tx_status == "pending", Order.status == "paid", Order.id > after_id)
+                .order_by(Order.id)
+                .limit(batch_size)
+            )).all()
+        if not rows:
+            break
+        after_id = rows[-1].id
+        batches += 1
+
+        by_url = defaultdict(list)
+        for row in rows:
+            url = rpc_url(row.chain)
+            if url is None or not row.tx_hash:
+                summary["no_rpc"] += 1
+                continue
+            by_url[url].append(row)
+        urls = list(by_url)
+        receipts = await asyncio.gather(*(
+            rpc_batch(url, [("eth_getTransactionReceipt", [row.tx_hash]) for row in by_url[url]])
+            for url in urls
+        ))
+
+        now = datetime.utcnow()
+        verdicts, contracts = {}, {}
+        for url, url_receipts in zip(urls, receipts):
+            for row, receipt in zip(by_url[url], url_receipts):
+                summary["checked"] += 1
+                if is_rpc_error(receipt):
+                    # 노드 오류(속도 제한 등)는 '영수증 없음'이 아니므로 시간 초과 실패로 세지 않고 다음 주기에 다시 봅니다.
+                    summary["waiting"] += 1
+                    summary["rpc_errors"] += 1
+                    continue
+                verdict = _receipt_verdict(receipt, row.contract_address, row.started_at, now)
+                if verdict is None:
+                    summary["waiting"] += 1
+                    continue
+                verdicts[row.id] = verdict
+                contracts[row.id] = ((receipt or {}).get("to") or row.contract_address, row.chain)
+        if verdicts:
+            confirmed, failed = await _apply_verdicts(verdicts, contracts)
+            summary["confirmed"] += confirmed
+            summary["failed"] += failed
+        if len(rows) < batch_size:
+            break
+    return summary
+
+
+async def run_tx_verifier(interval: float = TX_VERIFY_INTERVAL_SECONDS) -> None:
+    """lifespan 에서 띄우는 주기 작업. 구매가 들어오면 주기를 기다리지 않고 바로 깨어납니다."""
+    while True:
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=interval)
+            await asyncio.sleep(TX_VERIFY_COALESCE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+        started = time.perf_counter()
+        try:
+            summary = await verify_pending_orders()
+            tx_verifier_stats["last_error"] = None
+        except Exception as exc:
+            summary = {"checked": 0, "confirmed": 0, "failed": 0, "rpc_errors": 0}
+            tx_verifier_stats["last_error"] = str(exc)
+            print(f"[tx-verifier] 거래 검증 실패: {exc}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        tx_verifier_stats["runs"] += 1
+        tx_verifier_stats["confirmed"] += summary["confirmed"]
+        tx_verifier_stats["failed"] += summary["failed"]
+        tx_verifier_stats["rpc_errors"] += summary["rpc_errors"]
+        tx_verifier_stats["last_run_at"] = datetime.utcnow()
+        tx_verifier_stats["last_checked"] = summary["checked"]
+        tx_verifier_stats["last_duration_ms"] = round(elapsed_ms, 1)
+        if summary["confirmed"] or summary["failed"]:
+            print(
+                f"[tx-verifier] 확인 {summary['confirmed']:,}건 / 실패 {summary['failed']:,}건 "
+                f"({elapsed_ms:.0f}ms)"
+            )
@@ -1,8 +1,11 @@
 # C:\Project\kaist\2_week\blockpass-back\app\models\models.py
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, DECIMAL, Date, LargeBinary, JSON, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey, DateTime, DECIMAL, Date, LargeBinary, JSON, Text, Index
+from sqlalchemy import Computed, UniqueConstraint
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session, object_session, relationship
 from sqlalchemy.sql import func
 from app.core.db import Base
+from app.core.geo import encode_geohash, facility_grid
 
 # 1. 사용자 및 프로필 그룹
 class User(Base):
@@ -44,6 +47,9 @@ class CustomerProfile(Base):
 # 2. 시설 및 이용권 그룹
 class Facility(Base):
     __tablename__ = "facilities"
+    __table_args__ = (
+        Index("ix_facilities_min_price", "min_price", "id"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     business_id = Column(Integer, ForeignKey("business_profiles.id"), nullable=False)
     name = Column(String(100))
@@ -51,13 +57,46 @@ class Facility(Base):
     address = Column(String(255))
     lat = Column(DECIMAL(10, 8))
     lng = Column(DECIMAL(11, 8))
+    geohash = Column(String(12), index=True) # 주변 검색용 (lat/lng 저장 시 자동 계산)
+    # 활성 이용권 중 최저가 (이용권 저장 시 자동 갱신, 일괄 복구: python jobs.py repair-min-prices)
+    min_price = Column(DECIMAL(20, 8))
+    min_pass_id = Column(Integer)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     business = relationship("BusinessProfile", back_populates="facilities")
     passes = relationship("Pass", back_populates="facility")
 
+@event.listens_for(Facility, "before_insert")
+@event.listens_for(Facility, "before_update")
+def _sync_facility_geohash(mapper, connection, target):
+    if target.lat is not None and target.lng is not None:
+        target.geohash = encode_geohash(float(target.lat), float(target.lng))
+    else:
+        target.geohash = None
+
+# 시설이 저장되면 주변 검색 메모리 격자를 커밋 직후 다시 만들게 합니다. (롤백되면 그대로 둡니다)
+@event.listens_for(Facility, "after_insert")
+@event.listens_for(Facility, "after_update")
+@event.listens_for(Facility, "after_delete")
+def _mark_facility_grid_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["facility_grid_dirty"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_facility_grid_after_commit(session):
+    if session.info.pop("facility_grid_dirty", False):
+        facility_grid.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _clear_facility_grid_flag(session):
+    session.info.pop("facility_grid_dirty", None)
+
 class Pass(Base):
     __tablename__ = "passes"
+    __table_args__ = (
+        Index("ix_passes_facility_price", "facility_id", "price", "id"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     business_id = Column(Integer, ForeignKey("business_profiles.id"), nullable=False)
     facility_id = Column(Integer, ForeignKey("facilities.id"))
@@ -76,6 +115,45 @@ class Pass(Base):
     facility = relationship("Facility", back_populates="passes")
     refund_policies = relationship("RefundPolicy", back_populates="target_pass")
 
+def cheapest_pass_values(facility_id) -> dict:
+    """facilities.min_price / min_pass_id 를 계산하는 상관 서브쿼리 (facility_id는 값 또는 컬럼)"""
+    passes = Pass.__table__
+    cheapest = (
+        select(passes.c.price, passes.c.id)
+        .where(passes.c.facility_id == facility_id, passes.c.status == "active")
+        .order_by(passes.c.price.asc(), passes.c.id.asc())
+        .limit(1)
+    )
+    return {
+        "min_price": cheapest.with_only_columns(passes.c.price).scalar_subquery(),
+        "min_pass_id": cheapest.with_only_columns(passes.c.id).scalar_subquery(),
+    }
+
+def refresh_facility_min_price(connection, facility_id) -> None:
+    if facility_id is None:
+        return
+    facilities = Facility.__table__
+    connection.execute(
+        update(facilities)
+        .where(facilities.c.id == facility_id)
+        .values(**cheapest_pass_values(facility_id))
+    )
+
+# 이용권 생성/가격·상태·시설 변경/삭제 시 같은 트랜잭션에서 시설 최저가를 갱신합니다.
+@event.listens_for(Pass, "after_insert")
+@event.listens_for(Pass, "after_delete")
+def _refresh_min_price_on_pass_write(mapper, connection, target):
+    refresh_facility_min_price(connection, target.facility_id)
+
+@event.listens_for(Pass, "after_update")
+def _refresh_min_price_on_pass_update(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in ("price", "status", "facility_id")):
+        return
+    facility_history = state.attrs.facility_id.history
+    for facility_id in {target.facility_id, *facility_history.deleted}:
+        refresh_facility_min_price(connection, facility_id)
+
 class RefundPolicy(Base):
     __tablename__ = "refund_policies"
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -99,13 +177,22 @@ class RefundPolicyRule(Base):
 # 3. 주문, 구독, 블록체인 연동 그룹
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_user_created", "user_id", "created_at"),
+        # 같은 온체인 거래가 두 번 기록되지 않도록 (tx_hash 가 없는 주문은 제외)
+        UniqueConstraint("chain", "tx_hash", name="uq_orders_chain_tx_hash"),
+        # 거래 검증 워커: tx_status = 'pending' 을 id 순으로 훑습니다.
+        Index("ix_orders_tx_status", "tx_status", "id"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     pass_id = Column(Integer, ForeignKey("passes.id"), nullable=False)
     amount = Column(DECIMAL(20, 8))
     tx_hash = Column(String(100))
     chain = Column(String(50))
-    status = Column(String(20), default="paid") # paid | refunded | cancelled
+    status = Column(String(20), default="paid") # paid | refunded | cancelled | failed
+    tx_status = Column(String(20)) # pending | confirmed | failed (NULL: 검증 대상 아님)
+    tx_block_number = Column(BigInteger)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="orders")
@@ -115,12 +202,22 @@ class Order(Base):
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
+    __table_args__ = (
+        Index("ix_subscriptions_user_pass_status", "user_id", "pass_id", "status"),
+        # 만료 스위퍼: status = 'active' AND end_at <= now 범위 검색
+        Index("ix_subscriptions_status_end", "status", "end_at"),
+        # (사용자, 이용권)당 active 구독은 하나만: active_flag 는 active 일 때 1, 아니면 NULL(중복 허용)
+        UniqueConstraint("user_id", "pass_id", "active_flag", name="uq_subscriptions_active"),
+        UniqueConstraint("order_id", name="uq_subscriptions_order"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     pass_id = Column(Integer, ForeignKey("passes.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id", name="fk_subscriptions_order")) # 구독을 만든 주문 (연결 전 데이터는 NULL)
     start_at = Column(DateTime(timezone=True))
     end_at = Column(DateTime(timezone=True))
     status = Column(String(20), default="active") # active | expired | refunded
+    active_flag = Column(Integer, Computed("CASE WHEN status = 'active' THEN 1 END", persisted=False))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="subscriptions")
@@ -140,15 +237,76 @@ class Refund(Base):
     __tablename__ = "refunds"
     id = Column(Integer, primary_key=True, autoincrement=True)
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    refund_amount = Column(Integer)
+    refund_amount = Column(DECIMAL(38, 18)) # ETH (wei 단위까지 정확히 저장)
     reason = Column(String(255))
+    tx_hash = Column(String(100)) # 환불 거래 (구매 거래는 orders.tx_hash 에 그대로 둡니다)
+    chain = Column(String(50))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     order = relationship("Order", back_populates="refunds")
 
+class IdempotencyKey(Base):
+    """Idempotency-Key 헤더로 들어온 요청의 처리 상태와 응답 (짧은 TTL 후 삭제)"""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "idempotency_key", name="uq_idempotency_keys_user_key"),
+        Index("ix_idempotency_keys_created", "created_at"),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, nullable=False)
+    idempotency_key = Column(String(100), nullable=False)
+    request_fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer) # NULL 이면 처리 중
+    response_body = Column(JSON)
+    created_at = Column(DateTime, nullable=False)
+
+class PassToken(Base):
+    """이용권 컨트랙트가 발행한 ERC721 토큰 (체인 이벤트 인덱서가 Transfer 로그로 채웁니다)"""
+    __tablename__ = "pass_tokens"
+    __table_args__ = (
+        UniqueConstraint("chain", "contract_address", "token_id", name="uq_pass_tokens_contract_token"),
+        Index("ix_pass_tokens_order", "order_id"),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chain = Column(String(50), nullable=False)
+    contract_address = Column(String(100), nullable=False) # 소문자
+    token_id = Column(DECIMAL(78, 0), nullable=False) # uint256
+    order_id = Column(Integer, ForeignKey("orders.id")) # 발행 거래와 같은 tx_hash 의 주문 (없으면 NULL)
+    owner = Column(String(100))
+    status = Column(String(20), default="active") # active | burned
+    minted_block = Column(BigInteger)
+    burned_block = Column(BigInteger)
+    mint_tx_hash = Column(String(100))
+    burn_tx_hash = Column(String(100))
+
+class ChainCursor(Base):
+    """체인별로 이벤트 인덱서가 반영을 마친 마지막 블록"""
+    __tablename__ = "chain_cursors"
+    chain = Column(String(50), primary_key=True)
+    last_block = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+class OutboxEvent(Base):
+    """사업자 대시보드로 보낼 주문 이벤트 (주문 변경과 같은 트랜잭션에서 기록, 보존 기간 후 삭제)"""
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # 재접속 시 Last-Event-ID 이후 이벤트 재전송
+        Index("ix_outbox_events_business_id", "business_id", "id"),
+        Index("ix_outbox_events_created", "created_at"),
+    )
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    business_id = Column(Integer, nullable=False)
+    event_type = Column(String(30), nullable=False) # purchase | refund | cancel | bankruptcy
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
 # 4. OCR 전용 테이블
 class OCRDocument(Base):
     __tablename__ = "ocr_documents"
+    __table_args__ = (
+        Index("ix_ocr_documents_customer_created", "customer_profile_id", "created_at"),
+        Index("ix_ocr_documents_business_created", "business_profile_id", "created_at"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     customer_profile_id = Column(Integer, ForeignKey("customer_profiles.id"), nullable=True)
     business_profile_id = Column(Integer, ForeignKey("business_profiles.id"), nullable=True)
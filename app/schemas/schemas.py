@@ -1,7 +1,8 @@
 # C:\Project\kaist\2_week\blockpass-back\app\schemas\schemas.py
 from pydantic import BaseModel, EmailStr, Field
 # 아래 줄이 빠져서 에러가 난 것입니다!
-from typing import Literal 
+from typing import Any, Literal 
+from datetime import datetime
 
 class UserCreate(BaseModel):
     email: EmailStr = Field(..., description="로그인용 이메일 ID")
@@ -48,3 +49,140 @@ class OrderPurchaseRequest(BaseModel):
     tx_hash: str | None = None
     chain: str | None = None
     wallet_address: str | None = None
+
+# 응답 모델 (OpenAPI 문서용, 실제 직렬화는 FastJSONResponse가 담당)
+class FacilityListItem(BaseModel):
+    id: int
+    business_id: int
+    name: str | None = None
+    category: str | None = None
+    address: str | None = None
+    lat: float | None = None
+    lng: float | None = None
+    created_at: datetime | None = None
+    min_price: float | None = None
+    min_pass_id: int | None = None
+    price_display: str
+
+class NearbyFacilityItem(BaseModel):
+    id: int
+    business_id: int
+    name: str | None = None
+    category: str | None = None
+    address: str | None = None
+    lat: float
+    lng: float
+    distance_km: float
+
+class FacilitySearchItem(BaseModel):
+    id: int
+    business_id: int
+    name: str | None = None
+    category: str | None = None
+    address: str | None = None
+    lat: float | None = None
+    lng: float | None = None
+    min_price: float | None = None
+    score: float
+
+class PassItem(BaseModel):
+    id: int
+    title: str | None = None
+    price: float | None = None
+    duration_days: int | None = None
+    duration_minutes: int | None = None
+    terms: str | None = None
+    contract_address: str | None = None
+    contract_chain: str | None = None
+    refund_rules: list[dict[str, Any]] | None = None
+    status: str | None = None
+
+class BusinessPassItem(PassItem):
+    created_at: datetime | None = None
+
+class PassCreatedResponse(BaseModel):
+    id: int
+    title: str | None = None
+    terms: str | None = None
+    price: float | None = None
+    duration_days: int | None = None
+    duration_minutes: int | None = None
+    status: str | None = None
+
+class BusinessMember(BaseModel):
+    user_id: int
+    name: str | None = None
+    wallet_address: str | None = None
+    passes: list[str]
+
+class MyOrderItem(BaseModel):
+    id: int
+    pass_id: int
+    tx_hash: str | None = None
+    chain: str | None = None
+    tx_status: str | None = None
+    created_at: datetime | None = None
+    title: str | None = None
+    price: float | None = None
+    duration_minutes: int | None = None
+    terms: str | None = None
+    contract_address: str | None = None
+    contract_chain: str | None = None
+    refund_rules: list[dict[str, Any]] | None = None
+    start_at: datetime | None = None
+    end_at: datetime | None = None
+    status: str | None = None
+
+class OCRListItem(BaseModel):
+    id: int
+    status: str | None = None
+    created_at: datetime | None = None
+    ocr_result: Any = None
+
+class RefundQuote(BaseModel):
+    order_id: int
+    pass_id: int
+    status: str | None = None
+    amount: float | None = None
+    refundable: bool
+    started_at: datetime | None = None
+    elapsed_seconds: int
+    refund_percent: int
+    refund_amount: float
+    refund_amount_wei: str
+    percent_valid_until: datetime | None = None
+    quoted_at: datetime
+
+class BankruptcyProgress(BaseModel):
+    pass_id: int
+    state: str
+    total_orders: int
+    refunded_orders: int
+    refund_amount: float
+    chunks: int
+    last_order_id: int
+    cancelled_subscriptions: int
+    started_at: datetime
+    finished_at: datetime | None = None
+    duration_ms: float
+    error: str | None = None
+
+
+class AccessQRToken(BaseModel):
+    token: str
+    expires_at: int  # unix 초
+    ttl_seconds: int
+
+
+class AccessCheckRequest(BaseModel):
+    facility_id: int
+    token: str
+
+
+class AccessCheckResult(BaseModel):
+    allowed: bool
+    reason: str  # ok | no_active_pass | invalid_token | expired_token
+    user_id: int | None = None
+    pass_id: int | None = None
+    end_at: datetime | None = None
+    source: str | None = None  # memory | db
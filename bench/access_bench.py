@@ -0,0 +1,85 @@
+# 출입 확인 지연 시간 벤치마크: QR 토큰 검증 + 메모리 색인 조회를, 출입할 때마다 DB 를 조회하는 방식과 비교합니다.
+# DATABASE_URL 의 데이터를 그대로 씁니다. (bench/generate_data.py 로 만든 DB 권장)
+#   python bench/access_bench.py --checks 100000 --miss-ratio 0.1 --db-checks 2000
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.access import access_index, active_subscriptions_query, issue_qr_token, verify_qr_token
+from app.core.db import AsyncSessionLocal, engine
+from stats import summarize
+
+
+async def run(checks: int, miss_ratio: float, db_checks: int, seed: int) -> dict:
+    started = time.perf_counter()
+    loaded = await access_index.load()
+    load_ms = (time.perf_counter() - started) * 1000
+    slots = list(access_index._entries)
+    if not slots:
+        raise SystemExit("active 구독이 없습니다. bench/generate_data.py 로 데이터를 먼저 만드세요.")
+
+    rng = random.Random(seed)
+    facilities = sorted({facility_id for facility_id, _ in slots})
+    max_user = max(user_id for _, user_id in slots)
+    samples = []
+    for _ in range(checks):
+        if rng.random() < miss_ratio:
+            # 구독이 없는 사용자 (대부분 DB 확인 후 음성 캐시에 남습니다)
+            samples.append((rng.choice(facilities), max_user + rng.randint(1, 1000)))
+        else:
+            samples.append(rng.choice(slots))
+
+    indexed_ms, allowed = {"memory": [], "db": []}, 0
+    async with AsyncSessionLocal() as session:
+        for facility_id, user_id in samples:
+            # 토큰 발급은 고객 앱 쪽 일이므로 측정에서 뺍니다. (수명이 짧아 확인 직전에 발급)
+            token = issue_qr_token(user_id)[0]
+            begin = time.perf_counter()
+            token_user, _ = verify_qr_token(token)
+            result = await access_index.check(session, facility_id, token_user)
+            indexed_ms[result["source"]].append((time.perf_counter() - begin) * 1000)
+            allowed += result["allowed"]
+
+    # 색인이 없을 때의 방식: 출입할 때마다 DB 조회 (미스 때 쓰는 것과 같은 쿼리)
+    db_ms = []
+    async with AsyncSessionLocal() as session:
+        now = datetime.utcnow()
+        for facility_id, user_id in samples[:db_checks]:
+            begin = time.perf_counter()
+            (await session.execute(active_subscriptions_query(facility_id, user_id, now))).first()
+            db_ms.append((time.perf_counter() - begin) * 1000)
+
+    return {
+        "subscriptions_loaded": loaded,
+        "load_ms": round(load_ms, 1),
+        "allowed": allowed,
+        "indexed_check": summarize(indexed_ms["memory"] + indexed_ms["db"]),
+        "indexed_check_memory_hit": summarize(indexed_ms["memory"]),
+        "indexed_check_db_fallback": summarize(indexed_ms["db"]),
+        "db_check": summarize(db_ms),
+        "index": access_index.stats(),
+    }
+
+
+async def main(args) -> None:
+    try:
+        result = await run(args.checks, args.miss_ratio, args.db_checks, args.seed)
+    finally:
+        await engine.dispose()
+    print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="출입 확인 벤치마크")
+    parser.add_argument("--checks", type=int, default=100000, help="메모리 색인으로 확인할 횟수")
+    parser.add_argument("--miss-ratio", type=float, default=0.1, help="구독이 없는 사용자 비율")
+    parser.add_argument("--db-checks", type=int, default=2000, help="비교용 DB 조회 횟수")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,37 @@
+# 벤치마크용 가짜 AI 서버: /ai/ocr 요청을 받아 바로 200을 돌려줍니다.
+# 사용법: python bench/fake_ai_server.py --port 8124 --delay-ms 20
+import argparse
+import asyncio
+
+import uvicorn
+from fastapi import FastAPI, File, Form, UploadFile
+
+app = FastAPI()
+DELAY_SECONDS = 0.0
+
+
+@app.get("/health")
+def health_check() -> dict:
+    return {"status": "ok"}
+
+
+@app.post("/ai/ocr")
+async def ai_ocr(
+    image: UploadFile = File(...),
+    document_id: str = Form(...),
+    role: str = Form(...),
+    profile_id: str = Form(...),
+) -> dict:
+    await image.read()
+    if DELAY_SECONDS:
+        await asyncio.sleep(DELAY_SECONDS)
+    return {"document_id": document_id, "status": "accepted"}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가짜 AI OCR 서버")
+    parser.add_argument("--port", type=int, default=8124)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    DELAY_SECONDS = args.delay_ms / 1000
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
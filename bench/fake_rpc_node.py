@@ -0,0 +1,145 @@
+# 개발/테스트용 가짜 이더리움 JSON-RPC 노드: 배치 요청을 받고, 미리 넣어 둔 거래 영수증/이벤트 로그를 돌려줍니다.
+# 사용법: python bench/fake_rpc_node.py --port 8545 --delay-ms 20 --max-logs 10000
+#   POST /stub/receipts  [{"hash": "0x..", "status": "0x1", "to": "0x..", "blockNumber": "0x10"}, ...]
+#   POST /stub/logs      [{"address": "0x..", "topics": [..], "blockNumber": "0x10", "logIndex": "0x0", "transactionHash": "0x.."}, ...]
+#   POST /stub/head      {"block_number": 50000}
+#   GET  /stub/stats     -> 받은 HTTP 요청 수 / RPC 호출 수
+import argparse
+import asyncio
+import bisect
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+app = FastAPI()
+DELAY_SECONDS = 0.0
+# 실제 노드처럼 결과가 너무 많은 eth_getLogs 는 오류로 돌려줍니다.
+MAX_LOGS = 10000
+BLOCK_TIME_SECONDS = 12
+
+receipts: dict[str, dict] = {}
+logs: list[tuple[int, int, dict]] = []  # (블록, 로그 순번, 로그) 정렬 유지
+state = {"block_number": 0}
+stats = {"http_requests": 0, "calls": 0}
+
+
+def _receipt(tx_hash: str):
+    receipt = receipts.get(tx_hash.lower())
+    if receipt is None:
+        return None  # 아직 채굴되지 않았거나 모르는 거래
+    return {
+        "transactionHash": tx_hash,
+        "status": receipt.get("status", "0x1"),
+        "to": receipt.get("to"),
+        "from": receipt.get("from"),
+        "blockNumber": receipt.get("blockNumber", hex(state["block_number"])),
+        "logs": [],
+    }
+
+
+def _get_logs(query: dict):
+    low = int(query.get("fromBlock", "0x0"), 16)
+    high = int(query.get("toBlock", hex(state["block_number"])), 16)
+    addresses = query.get("address")
+    if isinstance(addresses, str):
+        addresses = [addresses]
+    addresses = {address.lower() for address in addresses} if addresses else None
+    topics = query.get("topics") or []
+    topic0 = topics[0].lower() if topics and topics[0] else None
+    start = bisect.bisect_left(logs, (low, -1))
+    result = []
+    for block, _, log in logs[start:]:
+        if block > high:
+            break
+        if addresses is not None and log["address"].lower() not in addresses:
+            continue
+        if topic0 is not None and log["topics"][0].lower() != topic0:
+            continue
+        result.append(log)
+        if len(result) > MAX_LOGS:
+            return None
+    return result
+
+
+def _handle(call: dict) -> dict:
+    method, params = call.get("method"), call.get("params") or []
+    response = {"jsonrpc": "2.0", "id": call.get("id")}
+    if method == "eth_getTransactionReceipt":
+        response["result"] = _receipt(params[0])
+    elif method == "eth_getLogs":
+        result = _get_logs(params[0])
+        if result is None:
+            response["error"] = {"code": -32005, "message": f"query returned more than {MAX_LOGS} results"}
+        else:
+            response["result"] = result
+    elif method == "eth_getBlockByNumber":
+        number = int(params[0], 16)
+        if number > state["block_number"]:
+            response["result"] = None
+        else:
+            # 최신 블록이 지금 시각이 되도록 블록 시간을 거꾸로 계산합니다.
+            timestamp = int(time.time()) - (state["block_number"] - number) * BLOCK_TIME_SECONDS
+            response["result"] = {"number": hex(number), "timestamp": hex(timestamp), "transactions": []}
+    elif method == "eth_blockNumber":
+        response["result"] = hex(state["block_number"])
+    elif method == "eth_chainId":
+        response["result"] = hex(31337)
+    else:
+        response["error"] = {"code": -32601, "message": f"method not found: {method}"}
+    return response
+
+
+@app.post("/")
+async def rpc(request: Request):
+    body = await request.json()
+    stats["http_requests"] += 1
+    if DELAY_SECONDS:
+        await asyncio.sleep(DELAY_SECONDS)
+    if isinstance(body, list):
+        stats["calls"] += len(body)
+        return [_handle(call) for call in body]
+    stats["calls"] += 1
+    return _handle(body)
+
+
+@app.post("/stub/receipts")
+async def seed_receipts(items: list[dict]) -> dict:
+    for item in items:
+        receipts[item["hash"].lower()] = item
+        if item.get("blockNumber"):
+            state["block_number"] = max(state["block_number"], int(item["blockNumber"], 16))
+    return {"receipts": len(receipts)}
+
+
+@app.post("/stub/logs")
+async def seed_logs(items: list[dict]) -> dict:
+    for item in items:
+        block = int(item["blockNumber"], 16)
+        item.setdefault("removed", False)
+        logs.append((block, int(item.get("logIndex", "0x0"), 16), item))
+        state["block_number"] = max(state["block_number"], block)
+    logs.sort(key=lambda entry: entry[:2])
+    return {"logs": len(logs)}
+
+
+@app.post("/stub/head")
+async def set_head(payload: dict) -> dict:
+    state["block_number"] = int(payload["block_number"])
+    return {"block_number": state["block_number"]}
+
+
+@app.get("/stub/stats")
+def get_stats() -> dict:
+    return {**stats, "receipts": len(receipts), "logs": len(logs), "block_number": state["block_number"]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가짜 이더리움 JSON-RPC 노드")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="요청마다 추가할 지연 (노드 왕복 시간 흉내)")
+    parser.add_argument("--max-logs", type=int, default=10000, help="eth_getLogs 한 번에 돌려줄 최대 로그 수")
+    args = parser.parse_args()
+    DELAY_SECONDS = args.delay_ms / 1000
+    MAX_LOGS = args.max_logs
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
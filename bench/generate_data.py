@@ -0,0 +1,262 @@
+# 대용량 합성 데이터 생성기 (벤치마크용)
+# 같은 --seed 로 실행하면 빈 DB 기준 항상 같은 데이터가 만들어집니다.
+#
+#   python bench/generate_data.py --businesses 2000 --facilities 10000 \
+#       --customers 200000 --orders 1000000 --subscriptions 5000000 --ocr-documents 50000
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import bcrypt
+from sqlalchemy import func, insert, select, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.db import engine
+from app.core.geo import encode_geohash
+from jobs import repair_min_prices
+from app.models.models import (
+    BusinessProfile,
+    CustomerProfile,
+    Facility,
+    OCRDocument,
+    Order,
+    Pass,
+    Subscription,
+    User,
+)
+
+# 주요 도시 중심 좌표 (시설 위치를 도시 주변에 정규분포로 흩뿌립니다)
+CITY_CENTERS = [
+    ("서울특별시", 37.5665, 126.9780, 0.45),
+    ("부산광역시", 35.1796, 129.0756, 0.15),
+    ("인천광역시", 37.4563, 126.7052, 0.10),
+    ("대구광역시", 35.8714, 128.6014, 0.10),
+    ("대전광역시", 36.3504, 127.3845, 0.08),
+    ("광주광역시", 35.1595, 126.8526, 0.07),
+    ("울산광역시", 35.5384, 129.3114, 0.05),
+]
+CATEGORIES = ["gym", "gym", "gym", "studyroom", "pilates", "yoga", "etc"]
+PASS_MONTHS = [1, 3, 6, 12]
+REFUND_RULE_SETS = [
+    [{"period": 7, "unit": "일", "refund_percent": 90}, {"period": 14, "unit": "일", "refund_percent": 50}],
+    [{"period": 1, "unit": "일", "refund_percent": 100}, {"period": 30, "unit": "일", "refund_percent": 30}],
+    [{"period": 12, "unit": "시간", "refund_percent": 100}],
+    [],
+]
+SAMPLE_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5f0000000049454e44ae426082"
+)
+PASSWORD = b"bench-password"
+# 결정적인 해시를 위해 고정 salt 사용 (벤치마크 전용 계정)
+PASSWORD_HASH = bcrypt.hashpw(PASSWORD, b"$2b$12$blockpassbenchsalt0000").decode()
+
+
+def pick_city(rng: random.Random):
+    roll = rng.random()
+    acc = 0.0
+    for city in CITY_CENTERS:
+        acc += city[3]
+        if roll <= acc:
+            return city
+    return CITY_CENTERS[0]
+
+
+def random_hex(rng: random.Random, length: int) -> str:
+    return "0x" + "".join(rng.choice("0123456789abcdef") for _ in range(length))
+
+
+async def next_id(conn, column) -> int:
+    result = await conn.execute(select(func.coalesce(func.max(column), 0)))
+    return int(result.scalar()) + 1
+
+
+async def bulk_insert(table, rows, total: int, batch_size: int, label: str) -> None:
+    """rows 제너레이터를 batch_size 단위로 executemany 하고 배치마다 커밋합니다."""
+    started = time.perf_counter()
+    batch = []
+    done = 0
+
+    async def flush():
+        nonlocal batch, done
+        if not batch:
+            return
+        async with engine.begin() as conn:
+            if engine.dialect.name == "mysql":
+                await conn.execute(text("SET unique_checks = 0, foreign_key_checks = 0"))
+            await conn.execute(insert(table), batch)
+        done += len(batch)
+        batch = []
+        rate = done / max(time.perf_counter() - started, 1e-9)
+        print(f"\r[{label}] {done:,}/{total:,} ({rate:,.0f} rows/s)", end="", flush=True)
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            await flush()
+    await flush()
+    print()
+
+
+async def generate(args) -> None:
+    rng = random.Random(args.seed)
+    reference = datetime.fromisoformat(args.reference_date)
+
+    async with engine.connect() as conn:
+        user_start = await next_id(conn, User.user_id)
+        business_start = await next_id(conn, BusinessProfile.id)
+        customer_start = await next_id(conn, CustomerProfile.id)
+        facility_start = await next_id(conn, Facility.id)
+        pass_start = await next_id(conn, Pass.id)
+        order_start = await next_id(conn, Order.id)
+        subscription_start = await next_id(conn, Subscription.id)
+        ocr_start = await next_id(conn, OCRDocument.id)
+
+    business_user_ids = range(user_start, user_start + args.businesses)
+    customer_user_ids = range(user_start + args.businesses, user_start + args.businesses + args.customers)
+    business_ids = range(business_start, business_start + args.businesses)
+    customer_ids = range(customer_start, customer_start + args.customers)
+
+    def created_at(max_days: int = 365) -> datetime:
+        return reference - timedelta(seconds=rng.randrange(max_days * 24 * 60 * 60))
+
+    def user_rows():
+        for index, user_id in enumerate(business_user_ids):
+            yield {"user_id": user_id, "id": f"biz{user_id}@gen.blockpass.dev", "password_hash": PASSWORD_HASH,
+                   "name": f"사업자{index}", "role": "business", "wallet_address": random_hex(rng, 40),
+                   "created_at": created_at()}
+        for index, user_id in enumerate(customer_user_ids):
+            yield {"user_id": user_id, "id": f"user{user_id}@gen.blockpass.dev", "password_hash": PASSWORD_HASH,
+                   "name": f"고객{index}", "role": "customer", "wallet_address": random_hex(rng, 40),
+                   "created_at": created_at()}
+
+    def business_rows():
+        for profile_id, user_id in zip(business_ids, business_user_ids):
+            yield {"id": profile_id, "user_id": user_id, "business_name": f"블록패스 제휴점 {profile_id}",
+                   "registration_number": f"{rng.randrange(100, 999)}-{rng.randrange(10, 99)}-{rng.randrange(10000, 99999)}"}
+
+    def customer_rows():
+        for profile_id, user_id in zip(customer_ids, customer_user_ids):
+            yield {"id": profile_id, "user_id": user_id}
+
+    facilities = []  # (facility_id, business_id) - 이용권 생성에 사용
+
+    def facility_rows():
+        for index in range(args.facilities):
+            facility_id = facility_start + index
+            business_id = business_ids[index % len(business_ids)]
+            city, center_lat, center_lng, _ = pick_city(rng)
+            lat = round(rng.gauss(center_lat, 0.08), 8)
+            lng = round(rng.gauss(center_lng, 0.08), 8)
+            facilities.append((facility_id, business_id))
+            yield {"id": facility_id, "business_id": business_id, "name": f"{city} 블록패스 {facility_id}호점",
+                   "category": rng.choice(CATEGORIES), "address": f"{city} 테스트로 {rng.randrange(1, 999)}",
+                   "lat": lat, "lng": lng, "geohash": encode_geohash(lat, lng),
+                   "created_at": created_at()}
+
+    passes = []  # (pass_id, price, duration_minutes)
+
+    def pass_rows():
+        pass_id = pass_start
+        for facility_id, business_id in facilities:
+            for months in rng.sample(PASS_MONTHS, k=args.passes_per_facility):
+                price = round(0.005 * months * (0.6 + rng.random()), 8)
+                duration_minutes = months * 30 * 24 * 60
+                passes.append((pass_id, price, duration_minutes))
+                yield {"id": pass_id, "business_id": business_id, "facility_id": facility_id,
+                       "title": f"{months}개월 자유 이용권", "terms": "합성 데이터 이용 약관",
+                       "price": price, "duration_days": months * 30, "duration_minutes": duration_minutes,
+                       "contract_address": random_hex(rng, 40), "contract_chain": "sepolia",
+                       "refund_rules": rng.choice(REFUND_RULE_SETS), "status": "active",
+                       "created_at": created_at()}
+                pass_id += 1
+
+    orders = []  # (order_id, user_id, pass_id, duration_minutes, created_at, status) - 구독 생성에 사용
+
+    def order_rows():
+        for index in range(args.orders):
+            pass_id, price, duration_minutes = rng.choice(passes)
+            roll = rng.random()
+            status = "paid" if roll < 0.9 else ("refunded" if roll < 0.97 else "cancelled")
+            order_id, user_id, ordered_at = order_start + index, rng.choice(customer_user_ids), created_at()
+            orders.append((order_id, user_id, pass_id, duration_minutes, ordered_at, status))
+            yield {"id": order_id, "user_id": user_id, "pass_id": pass_id,
+                   "amount": price, "tx_hash": random_hex(rng, 64), "chain": "sepolia", "status": status,
+                   "created_at": ordered_at}
+
+    def subscription_rows():
+        # 주문마다 구독 하나(order_id 연결), 남는 수만큼은 주문 없이 만들어진 과거 구독으로 채웁니다.
+        active_pairs = set()  # (user_id, pass_id) 당 active 구독은 하나만 (uq_subscriptions_active)
+        for index in range(args.subscriptions):
+            if index < len(orders):
+                order_id, user_id, pass_id, duration_minutes, start_at, order_status = orders[index]
+                status = {"refunded": "refunded", "cancelled": "cancelled"}.get(order_status)
+            else:
+                pass_id, _, duration_minutes = rng.choice(passes)
+                order_id, user_id, start_at = None, rng.choice(customer_user_ids), created_at()
+                roll = rng.random()
+                status = "refunded" if roll < 0.05 else ("cancelled" if roll < 0.08 else None)
+            end_at = start_at + timedelta(minutes=duration_minutes)
+            if status is None:
+                status = "active" if end_at > reference else "expired"
+            if status == "active":
+                if (user_id, pass_id) in active_pairs:
+                    status = "cancelled"
+                else:
+                    active_pairs.add((user_id, pass_id))
+            yield {"id": subscription_start + index, "user_id": user_id, "pass_id": pass_id, "order_id": order_id,
+                   "start_at": start_at, "end_at": end_at, "status": status, "created_at": start_at}
+
+    def ocr_rows():
+        for index in range(args.ocr_documents):
+            if rng.random() < 0.5:
+                customer_id, business_id = rng.choice(customer_ids), None
+            else:
+                customer_id, business_id = None, rng.choice(business_ids)
+            yield {"id": ocr_start + index, "customer_profile_id": customer_id, "business_profile_id": business_id,
+                   "image_png": SAMPLE_PNG, "ocr_result": [{"name": f"고객{index}", "phone": "010-0000-0000"}],
+                   "status": "done", "created_at": created_at()}
+
+    batch = args.batch_size
+    await bulk_insert(User.__table__, user_rows(), args.businesses + args.customers, batch, "users")
+    await bulk_insert(BusinessProfile.__table__, business_rows(), args.businesses, batch, "business_profiles")
+    await bulk_insert(CustomerProfile.__table__, customer_rows(), args.customers, batch, "customer_profiles")
+    await bulk_insert(Facility.__table__, facility_rows(), args.facilities, batch, "facilities")
+    await bulk_insert(Pass.__table__, pass_rows(), args.facilities * args.passes_per_facility, batch, "passes")
+    await bulk_insert(Order.__table__, order_rows(), args.orders, batch, "orders")
+    await bulk_insert(Subscription.__table__, subscription_rows(), args.subscriptions, batch, "subscriptions")
+    await bulk_insert(OCRDocument.__table__, ocr_rows(), args.ocr_documents, batch, "ocr_documents")
+    # Core 일괄 INSERT는 ORM 이벤트를 타지 않으므로 최저가 컬럼을 한 번에 계산합니다.
+    await repair_min_prices(batch)
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BlockPass 대용량 합성 데이터 생성기")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--businesses", type=int, default=1000)
+    parser.add_argument("--facilities", type=int, default=10000)
+    parser.add_argument("--passes-per-facility", type=int, default=3,
+                        help=f"시설당 이용권 수 (1~{len(PASS_MONTHS)}, 기간별 하나씩)")
+    parser.add_argument("--customers", type=int, default=100000)
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--subscriptions", type=int, default=5000000)
+    parser.add_argument("--ocr-documents", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--reference-date", default="2026-10-01T00:00:00",
+                        help="생성 시각 기준일 (결과를 고정하기 위해 현재 시각 대신 사용)")
+    args = parser.parse_args()
+    if args.businesses <= 0 or args.customers <= 0 or args.facilities <= 0:
+        parser.error("--businesses, --customers, --facilities 는 1 이상이어야 합니다.")
+    if not 1 <= args.passes_per_facility <= len(PASS_MONTHS):
+        parser.error(f"--passes-per-facility 는 1~{len(PASS_MONTHS)} 사이여야 합니다. (이용권 기간 {PASS_MONTHS}개월)")
+    asyncio.run(generate(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+# BlockPass 핵심 API 부하 테스트
+# 로컬 MySQL 또는 SQLite 대체 DB를 시드한 뒤 실제 사용자 흐름을 돌리고,
+# 엔드포인트별 처리량과 p50/p95/p99를 JSON으로 출력합니다.
+#
+#   # SQLite 대체 DB + 가짜 AI 서버를 자동으로 띄워서 실행
+#   python bench/load_test.py --duration 30 --users 50 --output bench_result.json
+#
+#   # 이미 떠 있는 서버(로컬 MySQL)에 대해 실행
+#   python bench/load_test.py --base-url http://127.0.0.1:8010 --duration 60
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+from stats import summarize
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "bench-password"
+# 1x1 PNG (OCR 업로드용)
+SAMPLE_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5f0000000049454e44ae426082"
+)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.statuses[name][0] += 1
+            return None
+        self.latencies[name].append((time.perf_counter() - started) * 1000)
+        self.statuses[name][response.status_code] += 1
+        return response
+
+    def report(self, duration: float) -> dict:
+        endpoints = {}
+        for name in sorted(self.statuses):
+            values = self.latencies[name]
+            endpoints[name] = {
+                **summarize(values),
+                "rps": round(len(values) / duration, 2) if duration else 0.0,
+                "status_codes": {str(k): v for k, v in sorted(self.statuses[name].items())},
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        return {
+            "duration_s": round(duration, 3),
+            "total_requests": total,
+            "total_rps": round(total / duration, 2) if duration else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+async def register_and_login(client: httpx.AsyncClient, api: str, role: str) -> dict:
+    email = f"{role}-{uuid.uuid4().hex[:10]}@bench.blockpass.dev"
+    response = await client.post(
+        f"{api}/auth/register",
+        json={"email": email, "password": PASSWORD, "name": f"bench-{role}", "role": role},
+    )
+    response.raise_for_status()
+    response = await client.post(f"{api}/auth/login", data={"username": email, "password": PASSWORD})
+    response.raise_for_status()
+    return {"email": email, "headers": {"Authorization": f"Bearer {response.json()['access_token']}"}}
+
+
+async def seed(client: httpx.AsyncClient, api: str, businesses: int, passes_per_business: int,
+               customers: int, rng: random.Random) -> dict:
+    """API를 통해 사업자/시설/이용권/고객을 만듭니다. (대용량은 별도 생성기 사용)"""
+    business_accounts = []
+    for index in range(businesses):
+        account = await register_and_login(client, api, "business")
+        await client.patch(
+            f"{api}/auth/profile",
+            headers=account["headers"],
+            json={
+                "business_name": f"벤치 짐 {index}",
+                "address": f"대전광역시 유성구 벤치로 {index}",
+                "lat": round(36.30 + rng.random() * 0.15, 6),
+                "lng": round(127.30 + rng.random() * 0.15, 6),
+            },
+        )
+        for pass_index in range(passes_per_business):
+            await client.post(
+                f"{api}/business/passes",
+                headers=account["headers"],
+                json={
+                    "title": f"{pass_index + 1}개월 이용권",
+                    "price": round(0.01 + rng.random() * 0.2, 4),
+                    "duration_days": 30 * (pass_index + 1),
+                    "contract_address": "0x" + uuid.uuid4().hex + uuid.uuid4().hex[:8],
+                    "contract_chain": "sepolia",
+                    "refund_rules": [
+                        {"period": 7, "unit": "일", "refund_percent": 90},
+                        {"period": 14, "unit": "일", "refund_percent": 50},
+                    ],
+                },
+            )
+        business_accounts.append(account)
+
+    customer_accounts = [await register_and_login(client, api, "customer") for _ in range(customers)]
+    return {"businesses": business_accounts, "customers": customer_accounts}
+
+
+async def customer_flow(client, api, account, recorder: Recorder, rng: random.Random, deadline: float):
+    headers = account["headers"]
+    while time.perf_counter() < deadline:
+        response = await recorder.call(client, "GET /facilities/list", "GET", f"{api}/facilities/list")
+        facilities = response.json() if response is not None and response.status_code == 200 else []
+        if facilities:
+            facility = rng.choice(facilities)
+            response = await recorder.call(
+                client, "GET /facilities/{id}/passes", "GET", f"{api}/facilities/{facility['id']}/passes"
+            )
+            passes = response.json() if response is not None and response.status_code == 200 else []
+            if passes and rng.random() < 0.3:
+                target = rng.choice(passes)
+                await recorder.call(
+                    client, "POST /orders/purchase/{id}", "POST", f"{api}/orders/purchase/{target['id']}",
+                    headers=headers,
+                    json={"tx_hash": "0x" + uuid.uuid4().hex * 2, "chain": "sepolia"},
+                )
+        await recorder.call(client, "GET /orders/my", "GET", f"{api}/orders/my", headers=headers)
+        if rng.random() < 0.05:
+            await recorder.call(
+                client, "POST /ocr/request", "POST", f"{api}/ocr/request",
+                headers=headers, files={"image": ("image.png", SAMPLE_PNG, "image/png")},
+            )
+
+
+async def business_flow(client, api, account, recorder: Recorder, deadline: float):
+    while time.perf_counter() < deadline:
+        await recorder.call(client, "GET /business/members", "GET", f"{api}/business/members",
+                            headers=account["headers"])
+        await asyncio.sleep(0.2)
+
+
+async def login_flow(client, api, accounts, recorder: Recorder, rng: random.Random, deadline: float):
+    while time.perf_counter() < deadline:
+        account = rng.choice(accounts)
+        await recorder.call(client, "POST /auth/login", "POST", f"{api}/auth/login",
+                            data={"username": account["email"], "password": PASSWORD})
+        await asyncio.sleep(0.5)
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    api = f"{args.base_url}/api/v1"
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users * 2)
+    async with httpx.AsyncClient(timeout=60.0, limits=limits) as client:
+        accounts = await seed(client, api, args.businesses, args.passes_per_business,
+                              max(args.customers, args.users), rng)
+        recorder = Recorder()
+        # 회원가입은 시드 단계에서 측정합니다.
+        started = time.perf_counter()
+        deadline = started + args.duration
+        customers = accounts["customers"][: args.users]
+        tasks = [customer_flow(client, api, account, recorder, random.Random(rng.random()), deadline)
+                 for account in customers]
+        tasks += [business_flow(client, api, account, recorder, deadline) for account in accounts["businesses"]]
+        tasks.append(login_flow(client, api, accounts["customers"], recorder, random.Random(rng.random()), deadline))
+        await asyncio.gather(*tasks)
+        report = recorder.report(time.perf_counter() - started)
+    return report
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"서버가 준비되지 않았습니다: {url}")
+
+
+def start_local_stack(args, workdir: str) -> list[subprocess.Popen]:
+    """SQLite 대체 DB, 가짜 AI 서버, 백엔드 서버를 띄웁니다."""
+    env = dict(os.environ)
+    # 새 SQLite 파일은 init_db.py 로 만들고, 지정된 DATABASE_URL 은 기존 DB 이므로 마이그레이션만 적용합니다.
+    schema_command = ["migrate.py", "up"] if "DATABASE_URL" in env else ["init_db.py"]
+    env.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.sqlite')}")
+    env["AI_SERVER_URL"] = f"http://127.0.0.1:{args.ai_port}"
+    env["AI_API_KEY"] = "bench-ai-key"
+    env["DB_ECHO"] = "false"
+    subprocess.run([sys.executable, *schema_command], cwd=REPO_ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+    processes = [
+        subprocess.Popen(
+            [sys.executable, os.path.join(REPO_ROOT, "bench", "fake_ai_server.py"),
+             "--port", str(args.ai_port), "--delay-ms", str(args.ai_delay_ms)],
+            cwd=workdir, env=env,
+        ),
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"],
+            cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL,
+        ),
+    ]
+    wait_until_ready(f"http://127.0.0.1:{args.ai_port}/health")
+    wait_until_ready(f"http://127.0.0.1:{args.port}/")
+    return processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BlockPass API 부하 테스트")
+    parser.add_argument("--base-url", default=None, help="이미 실행 중인 서버 주소 (없으면 로컬 스택 실행)")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--users", type=int, default=50, help="동시 고객 수")
+    parser.add_argument("--businesses", type=int, default=20)
+    parser.add_argument("--passes-per-business", type=int, default=3)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--ai-port", type=int, default=8124)
+    parser.add_argument("--ai-delay-ms", type=float, default=20.0)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    processes = []
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            if args.base_url is None:
+                processes = start_local_stack(args, workdir)
+                args.base_url = f"http://127.0.0.1:{args.port}"
+            report = asyncio.run(run(args))
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+
+    result = {
+        "git_revision": git_revision(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        **report,
+    }
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# 로그인 폭주 상황에서의 지연 시간 벤치마크
+# 사용법: 서버를 띄운 뒤 `python bench/login_bench.py --base-url http://127.0.0.1:8010`
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+from stats import summarize
+
+
+async def timed(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> tuple[float, int]:
+    started = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    return (time.perf_counter() - started) * 1000, response.status_code
+
+
+async def run(base_url: str, logins: int, concurrency: int, probe_path: str) -> dict:
+    email = f"bench-{uuid.uuid4().hex[:8]}@blockpass.dev"
+    password = "bench-password"
+    api = f"{base_url}/api/v1"
+
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        response = await client.post(
+            f"{api}/auth/register",
+            json={"email": email, "password": password, "name": "bench", "role": "customer"},
+        )
+        response.raise_for_status()
+
+        login_times: list[float] = []
+        probe_times: list[float] = []
+        rejected = 0
+        semaphore = asyncio.Semaphore(concurrency)
+        done = asyncio.Event()
+
+        async def login_once():
+            nonlocal rejected
+            async with semaphore:
+                elapsed, code = await timed(
+                    client, "POST", f"{api}/auth/login",
+                    data={"username": email, "password": password},
+                )
+                if code == 503:
+                    rejected += 1
+                else:
+                    login_times.append(elapsed)
+
+        async def probe_loop():
+            # 로그인과 무관한 엔드포인트의 지연 시간을 계속 측정합니다.
+            while not done.is_set():
+                elapsed, _ = await timed(client, "GET", f"{base_url}{probe_path}")
+                probe_times.append(elapsed)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe_loop())
+        started = time.perf_counter()
+        await asyncio.gather(*(login_once() for _ in range(logins)))
+        duration = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {
+        "logins": logins,
+        "concurrency": concurrency,
+        "duration_s": round(duration, 3),
+        "login_rps": round(len(login_times) / duration, 2) if duration else 0.0,
+        "rejected_503": rejected,
+        "login": summarize(login_times),
+        "probe": {"path": probe_path, **summarize(probe_times)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BlockPass 로그인 부하 벤치마크")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8010")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probe-path", default="/api/v1/facilities/list")
+    args = parser.parse_args()
+    result = asyncio.run(run(args.base_url, args.logins, args.concurrency, args.probe_path))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 # C:\Project\kaist\2_week\blockpass-back\init_db.py
 import asyncio
+from sqlalchemy import inspect
 from app.core.db import engine, Base
 # 모든 모델을 미리 로드해야 테이블이 생성됩니다.
-from app.models.models import User, BusinessProfile, CustomerProfile, Facility, Pass, RefundPolicy, RefundPolicyRule, Order, Subscription, BlockchainContract, Refund, OCRDocument
+from app.models.models import User, BusinessProfile, CustomerProfile, Facility, Pass, RefundPolicy, RefundPolicyRule, Order, Subscription, BlockchainContract, Refund, IdempotencyKey, PassToken, ChainCursor, OutboxEvent, OCRDocument
+from migrate import stamp
 
 async def init_models():
     async with engine.begin() as conn:
@@ -10,8 +12,13 @@ async def init_models():
         # 1. 기존 테이블 삭제 (초기화가 필요한 경우만 주석 해제)
         # await conn.run_sync(Base.metadata.drop_all)
         
-        # 2. 모든 테이블 생성
+        # 2. 모든 테이블 생성 (빈 DB 만)
+        # create_all 은 이미 있는 테이블을 바꾸지 않으므로, 기존 DB 에 버전을 기록하면 빠진 컬럼이 적용된 것처럼 보입니다.
+        if await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names()):
+            raise SystemExit("이미 테이블이 있는 DB입니다. 스키마 변경은 `python migrate.py up` 으로 적용하세요.")
         await conn.run_sync(Base.metadata.create_all)
+        # 3. 빈 DB 에 모델(인덱스 포함) 그대로 만들었으므로 마이그레이션 버전만 기록
+        await stamp(conn)
         print("모든 테이블(OCR 포함)이 성공적으로 생성되었습니다.")
 
 if __name__ == "__main__":
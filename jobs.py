@@ -0,0 +1,112 @@
+# C:\Project\kaist\2_week\blockpass-back\jobs.py
+# 운영용 일괄 작업 실행기
+#   python jobs.py repair-min-prices [--chunk-size 5000]   # 시설별 최저가 컬럼 재계산
+#   python jobs.py purge-idempotency-keys                  # 만료된 Idempotency-Key 삭제
+#   python jobs.py expire-subscriptions [--chunk-size 1000] # 기간이 끝난 active 구독을 expired 로
+#   python jobs.py verify-transactions [--chunk-size 500]   # pending 주문의 거래 영수증 확인
+#   python jobs.py index-events [--chain sepolia] [--from-block N] # 이용권 컨트랙트 Transfer 이벤트 반영
+#   python jobs.py purge-outbox                            # 보존 기간이 지난 대시보드 이벤트 삭제
+#   python jobs.py bankrupt-pass --pass-id 42 [--chunk-size 1000] # 파산한 이용권의 결제 주문 일괄 환불
+import argparse
+import asyncio
+
+from sqlalchemy import func, select, update
+
+from app.core.bankruptcy import refund_bankrupt_pass
+from app.core.db import engine
+from app.core.idempotency import purge_expired_keys
+from app.core.outbox import purge_old_events
+from app.core.chain import close_client as close_rpc_client
+from app.core.chain_indexer import index_all_chains, index_chain, reset_cursor
+from app.core.sweeper import expire_subscriptions
+from app.core.tx_verifier import verify_pending_orders
+from app.models.models import Facility, cheapest_pass_values
+
+
+async def repair_min_prices(chunk_size: int = 5000) -> int:
+    """facilities.min_price / min_pass_id 를 id 구간별로 다시 계산합니다. (구간마다 커밋)"""
+    facilities = Facility.__table__
+    async with engine.connect() as conn:
+        max_id = (await conn.execute(select(func.coalesce(func.max(facilities.c.id), 0)))).scalar()
+    updated = 0
+    for low in range(0, max_id, chunk_size):
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                update(facilities)
+                .where(facilities.c.id > low, facilities.c.id <= low + chunk_size)
+                .values(**cheapest_pass_values(facilities.c.id))
+            )
+            updated += result.rowcount or 0
+        print(f"\r[repair-min-prices] {min(low + chunk_size, max_id):,}/{max_id:,}", end="", flush=True)
+    print()
+    return updated
+
+
+async def run_command(args) -> None:
+    try:
+        if args.command == "repair-min-prices":
+            updated = await repair_min_prices(args.chunk_size)
+            print(f"시설 {updated:,}건의 최저가를 갱신했습니다.")
+        elif args.command == "purge-idempotency-keys":
+            deleted = await purge_expired_keys(args.chunk_size)
+            print(f"만료된 Idempotency-Key {deleted:,}건을 삭제했습니다.")
+        elif args.command == "expire-subscriptions":
+            expired = await expire_subscriptions(args.chunk_size, max_batches=None)
+            print(f"구독 {expired:,}건을 만료 처리했습니다.")
+        elif args.command == "verify-transactions":
+            summary = await verify_pending_orders(args.chunk_size)
+            print(
+                f"거래 {summary['checked']:,}건 확인: 확인됨 {summary['confirmed']:,}, 실패 {summary['failed']:,}, "
+                f"대기 {summary['waiting']:,}, RPC 미설정 {summary['no_rpc']:,}"
+            )
+        elif args.command == "index-events":
+            if args.from_block is not None:
+                if args.chain is None:
+                    raise SystemExit("--from-block 는 --chain 과 함께 써야 합니다.")
+                await reset_cursor(args.chain, args.from_block)
+            summaries = [await index_chain(args.chain)] if args.chain else await index_all_chains()
+            for summary in summaries:
+                print(
+                    f"[{summary['chain']}] 블록 {summary['from_block']}~{summary['to_block']}: "
+                    f"이벤트 {summary['events']:,}건 (발행 {summary['minted']:,}, 소각 {summary['burned']:,}, "
+                    f"이전 {summary['transferred']:,}), 온체인 환불 주문 {summary['refunded_orders']:,}건"
+                )
+        elif args.command == "purge-outbox":
+            deleted = await purge_old_events(args.chunk_size)
+            print(f"지난 대시보드 이벤트 {deleted:,}건을 삭제했습니다.")
+        elif args.command == "bankrupt-pass":
+            if args.pass_id is None:
+                raise SystemExit("--pass-id 가 필요합니다.")
+            progress = await refund_bankrupt_pass(
+                args.pass_id,
+                args.chunk_size,
+                on_chunk=lambda p: print(
+                    f"\r[bankrupt-pass] {p['refunded_orders']:,}/{p['total_orders']:,}", end="", flush=True
+                ),
+            )
+            print()
+            print(
+                f"주문 {progress['refunded_orders']:,}건 환불 (합계 {progress['refund_amount']} ETH), "
+                f"주문 없는 구독 {progress['cancelled_subscriptions']:,}건 취소"
+            )
+    finally:
+        await close_rpc_client()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BlockPass 일괄 작업")
+    parser.add_argument("command", choices=[
+        "repair-min-prices", "purge-idempotency-keys", "expire-subscriptions", "verify-transactions",
+        "index-events", "purge-outbox", "bankrupt-pass",
+    ])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--pass-id", type=int)
+    parser.add_argument("--chain")
+    parser.add_argument("--from-block", type=int)
+    args = parser.parse_args()
+    asyncio.run(run_command(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 # C:\Project\kaist\2_week\blockpass-back\main.py
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -9,15 +11,65 @@ from fastapi.staticfiles import StaticFiles # [신규] 이미지 조회를 위
 from api.health import router as health_router
 from api.auth import router as auth_router 
 from api.ocr import router as ocr_router
-from api.facilities import router as facility_router # 추가
+from api.facilities import router as facility_router, warm_search_index # 추가
 from api.orders import router as order_router
 from api.business import router as business_router
+from api.access import router as access_router
 # from api.contracts import router as contract_router # 계약서 기능 활성화 시 주석 해제
+from app.core.db import engine, read_engine, warm_pool
+from app.core.sweeper import SUBSCRIPTION_SWEEP_ENABLED, run_sweeper
+from app.core.tx_verifier import TX_VERIFY_ENABLED, run_tx_verifier
+from app.core.chain_indexer import INDEXER_ENABLED, run_indexer
+from app.core.chain import close_client as close_rpc_client
+from app.core.outbox import outbox_tailer
+from app.core.access import ACCESS_INDEX_ENABLED, run_access_index
+from app.core.sql_metrics import SQLMetricsMiddleware, instrument_engine
+from app.core.responses import FastJSONResponse
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 서버 시작: DB 커넥션 풀 미리 채우기
+    try:
+        warmed = await warm_pool()
+        if read_engine is not engine:
+            warmed += await warm_pool(read_engine)
+        print(f"[startup] DB 커넥션 {warmed}개 준비 완료")
+    except Exception as exc:
+        print(f"[startup] DB 커넥션 예열 실패: {exc}")
+    # 검색 색인은 시간이 걸리므로 요청을 받으면서 백그라운드로 만듭니다.
+    search_warmup = asyncio.create_task(warm_search_index())
+    # 기간이 끝난 구독을 주기적으로 expired 로 정리
+    sweeper = asyncio.create_task(run_sweeper()) if SUBSCRIPTION_SWEEP_ENABLED else None
+    # 구매 거래 영수증 확인 (RPC 노드가 설정된 경우)
+    tx_verifier = asyncio.create_task(run_tx_verifier()) if TX_VERIFY_ENABLED else None
+    # 이용권 컨트랙트 이벤트(발행/소각)를 따라가며 온체인 환불 반영
+    indexer = asyncio.create_task(run_indexer()) if INDEXER_ENABLED else None
+    # 출입 확인용 active 구독 색인 (적재 전에는 DB 로 확인)
+    access_loader = asyncio.create_task(run_access_index()) if ACCESS_INDEX_ENABLED else None
+    yield
+    # 서버 종료: 커넥션 정리
+    search_warmup.cancel()
+    if sweeper is not None:
+        sweeper.cancel()
+    if tx_verifier is not None:
+        tx_verifier.cancel()
+    if indexer is not None:
+        indexer.cancel()
+    if access_loader is not None:
+        access_loader.cancel()
+    await close_rpc_client()
+    await outbox_tailer.stop()
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
 
 app = FastAPI(
     title="BlockPass Modular Backend",
     description="인증, OCR, 정적 파일 서빙이 통합된 최종 백엔드 시스템",
     version="0.3.0",
+    lifespan=lifespan,
+    # 모든 JSON 응답을 orjson으로 직렬화
+    default_response_class=FastJSONResponse,
     # Swagger UI에서 자물쇠 버튼을 활성화하기 위한 설정
     swagger_ui_parameters={"operationsSorter": "method"} 
 )
@@ -29,8 +81,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 커서 페이지네이션 응답 헤더를 프런트엔드에서 읽을 수 있도록 노출
+    expose_headers=["X-Next-Cursor"],
 )
 
+# 요청별 SQL 수 / DB 시간 계측 (Server-Timing 헤더 + 임계치 초과 로그)
+instrument_engine(engine)
+instrument_engine(read_engine)
+app.add_middleware(SQLMetricsMiddleware)
+
 # 2. 업로드 사진 조회를 위한 정적 경로 설정 (허점 1 해결)
 # 서버 로컬의 static/uploads 폴더를 /static 주소로 연결합니다.
 os.makedirs("static/uploads", exist_ok=True)
@@ -51,6 +110,7 @@ app.include_router(ocr_router, prefix="/api/v1", tags=["OCR"])
 app.include_router(facility_router, prefix="/api/v1") # 라우터 등록
 app.include_router(order_router, prefix="/api/v1")
 app.include_router(business_router, prefix="/api/v1")
+app.include_router(access_router, prefix="/api/v1")
 # app.include_router(contract_router, prefix="/api/v1", tags=["Contract"])
 
 @app.get("/")
@@ -0,0 +1,227 @@
+# C:\Project\kaist\2_week\blockpass-back\migrate.py
+# 버전 관리형 스키마 마이그레이션 실행기
+#   python migrate.py status            # 적용 현황
+#   python migrate.py up [--target N]   # 정방향 적용
+#   python migrate.py down [--target N] # 롤백 (기본: 마지막 1개)
+#   python migrate.py stamp [--target N]  # 실행 없이 적용된 것으로 기록 (create_all로 만든 DB용)
+#   python migrate.py explain           # 주요 쿼리가 인덱스를 타는지 EXPLAIN으로 확인
+import argparse
+import asyncio
+import os
+import re
+import sys
+
+from sqlalchemy import text
+
+from app.core.db import engine
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql", "migrations")
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.(up|down)\.sql$")
+
+VERSION_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# (이름, 쿼리, 확인할 테이블/별칭, 정렬까지 인덱스로 처리해야 하는지)
+HOT_QUERIES = [
+    (
+        "purchase_pass: active subscription",
+        "SELECT id FROM subscriptions WHERE user_id = 1 AND pass_id = 1 AND status = 'active'",
+        "subscriptions",
+        False,
+    ),
+    (
+        "/orders/my",
+        "SELECT o.id FROM orders o WHERE o.user_id = 1 AND o.status != 'cancelled' ORDER BY o.created_at DESC",
+        "o",
+        True,
+    ),
+    (
+        "/facilities/list (sort=price)",
+        "SELECT id FROM facilities WHERE min_price IS NOT NULL ORDER BY min_price ASC, id ASC LIMIT 50",
+        "facilities",
+        True,
+    ),
+    (
+        "pass write: cheapest pass refresh",
+        "SELECT p2.id FROM passes p2 WHERE p2.facility_id = 1 ORDER BY p2.price ASC, p2.id ASC LIMIT 1",
+        "p2",
+        True,
+    ),
+    (
+        "/ocr/list (customer)",
+        "SELECT id FROM ocr_documents WHERE customer_profile_id = 1 ORDER BY created_at DESC",
+        "ocr_documents",
+        True,
+    ),
+    (
+        "/ocr/list (business)",
+        "SELECT id FROM ocr_documents WHERE business_profile_id = 1 ORDER BY created_at DESC",
+        "ocr_documents",
+        True,
+    ),
+    (
+        "/facilities/nearby: geohash prefix",
+        "SELECT id, lat, lng FROM facilities WHERE geohash LIKE 'wydm%'",
+        "facilities",
+        False,
+    ),
+    (
+        "subscription sweeper",
+        "SELECT id FROM subscriptions WHERE status = 'active' AND end_at <= NOW() ORDER BY end_at LIMIT 1000",
+        "subscriptions",
+        True,
+    ),
+    (
+        "tx verifier: pending orders",
+        "SELECT id FROM orders WHERE tx_status = 'pending' AND id > 0 ORDER BY id LIMIT 500",
+        "orders",
+        True,
+    ),
+]
+
+
+def load_migrations() -> list[dict]:
+    migrations: dict[int, dict] = {}
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version, name, direction = int(match.group(1)), match.group(2), match.group(3)
+        entry = migrations.setdefault(version, {"version": version, "name": name})
+        entry[direction] = os.path.join(MIGRATIONS_DIR, filename)
+    for entry in migrations.values():
+        if "up" not in entry or "down" not in entry:
+            raise SystemExit(f"마이그레이션 {entry['version']:04d}에 up/down 스크립트가 모두 필요합니다.")
+    return [migrations[v] for v in sorted(migrations)]
+
+
+def split_statements(path: str) -> list[str]:
+    with open(path, "r", encoding="utf-8") as handle:
+        lines = [line for line in handle if not line.lstrip().startswith("--")]
+    return [stmt.strip() for stmt in "".join(lines).split(";") if stmt.strip()]
+
+
+async def applied_versions(conn) -> set[int]:
+    await conn.execute(text(VERSION_TABLE_DDL))
+    result = await conn.execute(text("SELECT version FROM schema_migrations"))
+    return {row[0] for row in result}
+
+
+async def record_version(conn, migration: dict) -> None:
+    await conn.execute(
+        text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n)"),
+        {"v": migration["version"], "n": migration["name"]},
+    )
+
+
+async def migrate_up(target: int | None = None) -> None:
+    async with engine.begin() as conn:
+        applied = await applied_versions(conn)
+    for migration in load_migrations():
+        if migration["version"] in applied:
+            continue
+        if target is not None and migration["version"] > target:
+            break
+        print(f"[up] {migration['version']:04d}_{migration['name']}")
+        # MySQL DDL은 암묵적으로 커밋되므로 마이그레이션 단위로 나눠 기록합니다.
+        async with engine.begin() as conn:
+            for statement in split_statements(migration["up"]):
+                await conn.execute(text(statement))
+            await record_version(conn, migration)
+
+
+async def migrate_down(target: int | None = None) -> None:
+    async with engine.begin() as conn:
+        applied = await applied_versions(conn)
+    pending = [m for m in reversed(load_migrations()) if m["version"] in applied]
+    if target is None:
+        pending = pending[:1]
+    else:
+        pending = [m for m in pending if m["version"] > target]
+    for migration in pending:
+        print(f"[down] {migration['version']:04d}_{migration['name']}")
+        async with engine.begin() as conn:
+            for statement in split_statements(migration["down"]):
+                await conn.execute(text(statement))
+            await conn.execute(
+                text("DELETE FROM schema_migrations WHERE version = :v"),
+                {"v": migration["version"]},
+            )
+
+
+async def stamp(conn, target: int | None = None) -> None:
+    """create_all로 이미 최신 스키마가 만들어진 DB에 버전만 기록합니다."""
+    applied = await applied_versions(conn)
+    for migration in load_migrations():
+        if target is not None and migration["version"] > target:
+            break
+        if migration["version"] not in applied:
+            await record_version(conn, migration)
+
+
+async def show_status() -> None:
+    async with engine.begin() as conn:
+        applied = await applied_versions(conn)
+    for migration in load_migrations():
+        mark = "x" if migration["version"] in applied else " "
+        print(f"[{mark}] {migration['version']:04d}_{migration['name']}")
+    print(f"schema version: {max(applied) if applied else 0}")
+
+
+async def explain_hot_queries() -> bool:
+    if engine.dialect.name != "mysql":
+        print(f"EXPLAIN 확인은 MySQL에서만 지원합니다. (현재: {engine.dialect.name})")
+        return False
+    ok = True
+    async with engine.connect() as conn:
+        for name, query, table, check_sort in HOT_QUERIES:
+            result = await conn.execute(text(f"EXPLAIN {query}"))
+            rows = [dict(row._mapping) for row in result]
+            plan = next((r for r in rows if r.get("table") == table), rows[0] if rows else {})
+            key = plan.get("key")
+            extra = plan.get("Extra") or ""
+            passed = bool(key) and plan.get("type") != "ALL"
+            if check_sort and "filesort" in extra:
+                passed = False
+            ok = ok and passed
+            print(
+                f"[{'PASS' if passed else 'FAIL'}] {name}: "
+                f"type={plan.get('type')} key={key} rows={plan.get('rows')} extra={extra}"
+            )
+    return ok
+
+
+async def run_command(command: str, target: int | None) -> bool:
+    try:
+        if command == "status":
+            await show_status()
+        elif command == "up":
+            await migrate_up(target)
+        elif command == "down":
+            await migrate_down(target)
+        elif command == "stamp":
+            async with engine.begin() as conn:
+                await stamp(conn, target)
+        elif command == "explain":
+            return await explain_hot_queries()
+        return True
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BlockPass 스키마 마이그레이션")
+    parser.add_argument("command", choices=["status", "up", "down", "stamp", "explain"])
+    parser.add_argument("--target", type=int, default=None, help="목표 스키마 버전")
+    args = parser.parse_args()
+    if not asyncio.run(run_command(args.command, args.target)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
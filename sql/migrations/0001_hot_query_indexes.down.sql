@@ -0,0 +1,25 @@
+-- 0001 롤백: 복합 인덱스 제거
+-- MySQL은 새 복합 인덱스가 외래키를 커버하면 기존 FK 인덱스를 자동으로 지우므로,
+-- 외래키용 단일 컬럼 인덱스를 먼저 만든 뒤 복합 인덱스를 제거합니다.
+
+ALTER TABLE subscriptions
+  ADD INDEX ix_subscriptions_user_id (user_id),
+  DROP INDEX ix_subscriptions_user_pass_status,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE orders
+  ADD INDEX ix_orders_user_id (user_id),
+  DROP INDEX ix_orders_user_created,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE passes
+  ADD INDEX ix_passes_facility_id (facility_id),
+  DROP INDEX ix_passes_facility_price,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE ocr_documents
+  ADD INDEX ix_ocr_documents_customer_profile_id (customer_profile_id),
+  ADD INDEX ix_ocr_documents_business_profile_id (business_profile_id),
+  DROP INDEX ix_ocr_documents_customer_created,
+  DROP INDEX ix_ocr_documents_business_created,
+  ALGORITHM=INPLACE, LOCK=NONE;
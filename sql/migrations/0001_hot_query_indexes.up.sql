@@ -0,0 +1,22 @@
+-- 0001: 주요 조회 쿼리용 복합 인덱스 (InnoDB 온라인 DDL, 테이블 잠금 없음)
+
+-- purchase_pass: subscriptions WHERE user_id AND pass_id AND status
+ALTER TABLE subscriptions
+  ADD INDEX ix_subscriptions_user_pass_status (user_id, pass_id, status),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- /orders/my: orders WHERE user_id ORDER BY created_at
+ALTER TABLE orders
+  ADD INDEX ix_orders_user_created (user_id, created_at),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- /facilities/list: passes WHERE facility_id ORDER BY price, id
+ALTER TABLE passes
+  ADD INDEX ix_passes_facility_price (facility_id, price, id),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- /ocr/list: ocr_documents WHERE *_profile_id ORDER BY created_at
+ALTER TABLE ocr_documents
+  ADD INDEX ix_ocr_documents_customer_created (customer_profile_id, created_at),
+  ADD INDEX ix_ocr_documents_business_created (business_profile_id, created_at),
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,6 @@
+-- 0002 롤백: geohash 컬럼 제거
+
+ALTER TABLE facilities
+  DROP INDEX ix_facilities_geohash,
+  DROP COLUMN geohash,
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,11 @@
+-- 0002: 주변 시설 검색용 geohash 컬럼 + 인덱스
+
+ALTER TABLE facilities
+  ADD COLUMN geohash VARCHAR(12) NULL,
+  ADD INDEX ix_facilities_geohash (geohash),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- 기존 시설 좌표로 geohash 채우기 (ST_GeoHash 인자 순서: 경도, 위도)
+UPDATE facilities
+SET geohash = ST_GeoHash(lng, lat, 12)
+WHERE lat IS NOT NULL AND lng IS NOT NULL;
@@ -0,0 +1,7 @@
+-- 0003 롤백: 최저가 비정규화 컬럼 제거
+
+ALTER TABLE facilities
+  DROP INDEX ix_facilities_min_price,
+  DROP COLUMN min_price,
+  DROP COLUMN min_pass_id,
+  ALGORITHM=INPLACE, LOCK=NONE;
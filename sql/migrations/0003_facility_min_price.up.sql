@@ -0,0 +1,20 @@
+-- 0003: 시설별 최저가 이용권 비정규화 컬럼 (목록 조회의 상관 서브쿼리 제거)
+
+ALTER TABLE facilities
+  ADD COLUMN min_price DECIMAL(20,8) NULL,
+  ADD COLUMN min_pass_id INT NULL,
+  ADD INDEX ix_facilities_min_price (min_price, id),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- 초기 값 채우기 (대용량 테이블은 `python jobs.py repair-min-prices` 로 구간별 실행 권장)
+UPDATE facilities f
+SET f.min_price = (
+      SELECT p.price FROM passes p
+      WHERE p.facility_id = f.id AND p.status = 'active'
+      ORDER BY p.price ASC, p.id ASC LIMIT 1
+    ),
+    f.min_pass_id = (
+      SELECT p.id FROM passes p
+      WHERE p.facility_id = f.id AND p.status = 'active'
+      ORDER BY p.price ASC, p.id ASC LIMIT 1
+    );
@@ -0,0 +1,5 @@
+-- 0004 롤백: 환불 금액을 정수 컬럼으로 되돌림 (소수점 이하 금액은 잘립니다)
+
+ALTER TABLE refunds
+  MODIFY COLUMN refund_amount INT NULL,
+  ALGORITHM=COPY, LOCK=SHARED;
@@ -0,0 +1,6 @@
+-- 0004: 환불 금액을 실제 ETH 금액으로 기록 (정수 -> wei 정밀도 DECIMAL)
+-- 컬럼 타입 변경은 테이블 복사가 필요합니다. refunds 는 작은 테이블이라 짧게 끝납니다.
+
+ALTER TABLE refunds
+  MODIFY COLUMN refund_amount DECIMAL(38,18) NULL,
+  ALGORITHM=COPY, LOCK=SHARED;
@@ -0,0 +1,15 @@
+-- 0005 롤백
+
+DROP TABLE idempotency_keys;
+
+ALTER TABLE subscriptions
+  DROP INDEX uq_subscriptions_active,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE subscriptions
+  DROP COLUMN active_flag,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE orders
+  DROP INDEX uq_orders_chain_tx_hash,
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,30 @@
+-- 0005: 구매 경로 무결성 (중복 거래 / 중복 active 구독 방지) + Idempotency-Key 저장소
+-- 적용 전 중복 데이터가 있으면 유니크 인덱스 생성이 실패합니다. 아래 쿼리로 먼저 확인하세요.
+--   SELECT chain, tx_hash, COUNT(*) FROM orders WHERE tx_hash IS NOT NULL GROUP BY chain, tx_hash HAVING COUNT(*) > 1;
+--   SELECT user_id, pass_id, COUNT(*) FROM subscriptions WHERE status = 'active' GROUP BY user_id, pass_id HAVING COUNT(*) > 1;
+
+ALTER TABLE orders
+  ADD UNIQUE INDEX uq_orders_chain_tx_hash (chain, tx_hash),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- 가상 컬럼 추가는 메타데이터만 바뀝니다.
+ALTER TABLE subscriptions
+  ADD COLUMN active_flag INT AS (CASE WHEN status = 'active' THEN 1 END) VIRTUAL,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE subscriptions
+  ADD UNIQUE INDEX uq_subscriptions_active (user_id, pass_id, active_flag),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+CREATE TABLE idempotency_keys (
+  id INT NOT NULL AUTO_INCREMENT,
+  user_id INT NOT NULL,
+  idempotency_key VARCHAR(100) NOT NULL,
+  request_fingerprint VARCHAR(64) NOT NULL,
+  status_code INT NULL,
+  response_body JSON NULL,
+  created_at DATETIME NOT NULL,
+  PRIMARY KEY (id),
+  UNIQUE KEY uq_idempotency_keys_user_key (user_id, idempotency_key),
+  KEY ix_idempotency_keys_created (created_at)
+);
@@ -0,0 +1,5 @@
+-- 0006 롤백
+
+ALTER TABLE subscriptions
+  DROP INDEX ix_subscriptions_status_end,
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,5 @@
+-- 0006: 구독 만료 스위퍼용 인덱스 (status = 'active' AND end_at <= now)
+
+ALTER TABLE subscriptions
+  ADD INDEX ix_subscriptions_status_end (status, end_at),
+  ALGORITHM=INPLACE, LOCK=NONE;
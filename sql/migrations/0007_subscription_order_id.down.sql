@@ -0,0 +1,10 @@
+-- 0007 롤백
+
+ALTER TABLE subscriptions
+  DROP FOREIGN KEY fk_subscriptions_order,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE subscriptions
+  DROP INDEX uq_subscriptions_order,
+  DROP COLUMN order_id,
+  ALGORITHM=INPLACE, LOCK=NONE;
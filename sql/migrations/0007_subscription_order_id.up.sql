@@ -0,0 +1,37 @@
+-- 0007: 구독 -> 주문 연결 키 (주문 조회/환불/취소가 해당 구독 한 건만 다루도록)
+
+ALTER TABLE subscriptions
+  ADD COLUMN order_id INT NULL,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- 기존 데이터 연결: (사용자, 이용권)별로 주문 순서와 구독 시작 순서를 1:1로 짝짓습니다.
+-- 짝이 없는 구독(주문 없이 만들어진 데이터)은 NULL 로 남습니다.
+UPDATE subscriptions s
+JOIN (
+  SELECT sr.id AS subscription_id, orr.id AS order_id
+  FROM (
+    SELECT id, user_id, pass_id,
+           ROW_NUMBER() OVER (PARTITION BY user_id, pass_id ORDER BY start_at, id) AS rn
+    FROM subscriptions
+  ) sr
+  JOIN (
+    SELECT id, user_id, pass_id,
+           ROW_NUMBER() OVER (PARTITION BY user_id, pass_id ORDER BY created_at, id) AS rn
+    FROM orders
+  ) orr ON orr.user_id = sr.user_id AND orr.pass_id = sr.pass_id AND orr.rn = sr.rn
+) matched ON matched.subscription_id = s.id
+SET s.order_id = matched.order_id
+WHERE s.order_id IS NULL;
+
+ALTER TABLE subscriptions
+  ADD UNIQUE INDEX uq_subscriptions_order (order_id),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- 외래 키 검사를 끄면 테이블 복사 없이(INPLACE) 제약을 추가할 수 있습니다. (위 백필로 값은 이미 유효)
+SET foreign_key_checks = 0;
+
+ALTER TABLE subscriptions
+  ADD CONSTRAINT fk_subscriptions_order FOREIGN KEY (order_id) REFERENCES orders (id),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+SET foreign_key_checks = 1;
@@ -0,0 +1,8 @@
+ALTER TABLE orders
+  DROP INDEX ix_orders_tx_status,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE orders
+  DROP COLUMN tx_block_number,
+  DROP COLUMN tx_status,
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,12 @@
+-- 0008: 구매 거래 검증 상태 (pending -> confirmed | failed)
+-- 기존 주문은 NULL(검증 대상 아님)로 남습니다. 다시 검증하려면 tx_status = 'pending' 으로 바꾸면 됩니다.
+
+ALTER TABLE orders
+  ADD COLUMN tx_status VARCHAR(20) NULL,
+  ADD COLUMN tx_block_number BIGINT NULL,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- 검증 워커: tx_status = 'pending' 을 id 순으로 훑습니다.
+ALTER TABLE orders
+  ADD INDEX ix_orders_tx_status (tx_status, id),
+  ALGORITHM=INPLACE, LOCK=NONE;
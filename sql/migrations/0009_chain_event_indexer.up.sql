@@ -0,0 +1,26 @@
+-- 0009: 체인 이벤트 인덱서 (이용권 토큰 상태 + 체인별 처리 블록 체크포인트)
+
+CREATE TABLE pass_tokens (
+  id INT NOT NULL AUTO_INCREMENT,
+  chain VARCHAR(50) NOT NULL,
+  contract_address VARCHAR(100) NOT NULL,
+  token_id DECIMAL(78, 0) NOT NULL,
+  order_id INT NULL,
+  owner VARCHAR(100) NULL,
+  status VARCHAR(20) NULL,
+  minted_block BIGINT NULL,
+  burned_block BIGINT NULL,
+  mint_tx_hash VARCHAR(100) NULL,
+  burn_tx_hash VARCHAR(100) NULL,
+  PRIMARY KEY (id),
+  UNIQUE KEY uq_pass_tokens_contract_token (chain, contract_address, token_id),
+  KEY ix_pass_tokens_order (order_id),
+  CONSTRAINT pass_tokens_ibfk_1 FOREIGN KEY (order_id) REFERENCES orders (id)
+);
+
+CREATE TABLE chain_cursors (
+  chain VARCHAR(50) NOT NULL,
+  last_block BIGINT NOT NULL,
+  updated_at DATETIME NOT NULL,
+  PRIMARY KEY (chain)
+);
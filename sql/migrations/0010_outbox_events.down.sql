@@ -0,0 +1 @@
+DROP TABLE outbox_events;
@@ -0,0 +1,12 @@
+-- 0010: 사업자 대시보드 실시간 피드용 outbox (주문 변경과 같은 트랜잭션에서 기록)
+
+CREATE TABLE outbox_events (
+  id BIGINT NOT NULL AUTO_INCREMENT,
+  business_id INT NOT NULL,
+  event_type VARCHAR(30) NOT NULL,
+  payload JSON NOT NULL,
+  created_at DATETIME NOT NULL,
+  PRIMARY KEY (id),
+  KEY ix_outbox_events_business_id (business_id, id),
+  KEY ix_outbox_events_created (created_at)
+);
@@ -0,0 +1,6 @@
+-- 0011 롤백
+
+ALTER TABLE refunds
+  DROP COLUMN chain,
+  DROP COLUMN tx_hash,
+  ALGORITHM=INPLACE, LOCK=NONE;
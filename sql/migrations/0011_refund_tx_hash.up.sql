@@ -0,0 +1,8 @@
+-- 0011: 환불 거래를 refunds 에 기록
+-- 예전에는 환불 거래가 orders.tx_hash 를 덮어써서, 환불된 구매 거래로 다시 구매할 수 있었습니다.
+-- 이미 덮어쓴 주문은 원래 구매 거래를 알 수 없으므로 그대로 둡니다.
+
+ALTER TABLE refunds
+  ADD COLUMN tx_hash VARCHAR(100) NULL,
+  ADD COLUMN chain VARCHAR(50) NULL,
+  ALGORITHM=INPLACE, LOCK=NONE;